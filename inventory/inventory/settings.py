@@ -42,6 +42,7 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    'management.instrumentation.RequestMetricsMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
@@ -75,12 +76,72 @@ WSGI_APPLICATION = 'inventory.wsgi.application'
 # Database
 # https://docs.djangoproject.com/en/5.1/ref/settings/#databases
 
-from pymongo import MongoClient
-
-MONGO_CLIENT = MongoClient("mongodb://localhost:27017/")
-MONGO_DB = MONGO_CLIENT["invmng"]
-CUSTOMERS_COLLECTION = MONGO_DB["customers"]
-WORKPLACES_COLLECTION = MONGO_DB["workplaces"]
+# MongoDB connection, shared by the whole process through management/mongo.py
+MONGO_URI = os.environ.get("MONGO_URI", "mongodb://localhost:27017/")
+MONGO_MAIN_DB = os.environ.get("MONGO_MAIN_DB", "invmng")  # customers, workplaces and contact messages
+MONGO_MAX_POOL_SIZE = int(os.environ.get("MONGO_MAX_POOL_SIZE", "100"))
+MONGO_MIN_POOL_SIZE = int(os.environ.get("MONGO_MIN_POOL_SIZE", "0"))
+MONGO_WAIT_QUEUE_TIMEOUT_MS = int(os.environ.get("MONGO_WAIT_QUEUE_TIMEOUT_MS", "0")) or None
+MONGO_SERVER_SELECTION_TIMEOUT_MS = int(os.environ.get("MONGO_SERVER_SELECTION_TIMEOUT_MS", "30000"))
+MONGO_COMPRESSORS = os.environ.get("MONGO_COMPRESSORS", "")  # e.g. "zstd,snappy,zlib"
+
+# Run add_sale's stock deduction and order insert in one transaction.
+# Requires MongoDB running as a replica set.
+SALE_USE_TRANSACTIONS = os.environ.get("SALE_USE_TRANSACTIONS", "0") == "1"
+
+# Order sequence numbers each worker reserves per workspace with one counter update.
+# Numbers left unused when a worker stops are skipped, never reused.
+ORDER_ID_BLOCK_SIZE = int(os.environ.get("ORDER_ID_BLOCK_SIZE", "50"))
+
+# Number of workspaces whose items and recipes are kept in memory per worker.
+CATALOG_CACHE_WORKSPACES = int(os.environ.get("CATALOG_CACHE_WORKSPACES", "64"))
+
+# Largest order file (bytes) the /import_orders/ view imports within the request;
+# bigger files are refused with a pointer to the import_orders management command.
+ORDER_IMPORT_MAX_UPLOAD_BYTES = int(os.environ.get("ORDER_IMPORT_MAX_UPLOAD_BYTES", str(10 * 1024 * 1024)))
+
+# Create missing workspace indexes in the background when the app starts.
+MONGO_ENSURE_INDEXES_ON_STARTUP = os.environ.get("MONGO_ENSURE_INDEXES_ON_STARTUP", "1") == "1"
+
+# Background forecast jobs: pool size, how long a result is served, and how long
+# a running job may hold its lease before another worker may restart it (seconds).
+FORECAST_WORKERS = int(os.environ.get("FORECAST_WORKERS", "2"))
+FORECAST_RESULT_TTL = int(os.environ.get("FORECAST_RESULT_TTL", "900"))
+FORECAST_JOB_LEASE = int(os.environ.get("FORECAST_JOB_LEASE", "600"))
+
+# Route the dashboard read endpoints to the async views (management/async_views.py).
+# Enable when serving inventory.asgi:application with an ASGI server such as uvicorn.
+ASYNC_DASHBOARD_VIEWS = os.environ.get("ASYNC_DASHBOARD_VIEWS", "0") == "1"
+
+# Request threads per worker process (gunicorn --threads). The sync /dashboard_data/
+# view hands three of its four queries to a per-process pool sized for that many
+# concurrent bundles; when the pool is busy the request thread runs them itself.
+WEB_THREADS = int(os.environ.get("WEB_THREADS", "4"))
+DASHBOARD_QUERY_THREADS = int(os.environ.get("DASHBOARD_QUERY_THREADS", str(3 * WEB_THREADS)))
+
+# Requests slower than this (milliseconds) log the MongoDB commands they issued.
+SLOW_REQUEST_MS = int(os.environ.get("SLOW_REQUEST_MS", "500"))
+
+# Response cache of the workspace read endpoints (management/response_cache.py).
+# Entries expire after RESPONSE_CACHE_TTL seconds; past MAX_ENTRIES a quarter of
+# them is culled, and responses over RESPONSE_CACHE_MAX_BYTES are never stored.
+# Use django.core.cache.backends.filebased.FileBasedCache with a directory as
+# RESPONSE_CACHE_LOCATION to share the cache between local worker processes.
+RESPONSE_CACHE_MAX_BYTES = int(os.environ.get("RESPONSE_CACHE_MAX_BYTES", str(1024 * 1024)))
+CACHES = {
+    "default": {
+        "BACKEND": "django.core.cache.backends.locmem.LocMemCache",
+    },
+    "responses": {
+        "BACKEND": os.environ.get("RESPONSE_CACHE_BACKEND", "django.core.cache.backends.locmem.LocMemCache"),
+        "LOCATION": os.environ.get("RESPONSE_CACHE_LOCATION", "responses"),
+        "TIMEOUT": int(os.environ.get("RESPONSE_CACHE_TTL", "300")),
+        "OPTIONS": {
+            "MAX_ENTRIES": int(os.environ.get("RESPONSE_CACHE_MAX_ENTRIES", "1000")),
+            "CULL_FREQUENCY": 4,
+        },
+    },
+}
 
 DATABASES = {
     'default': {
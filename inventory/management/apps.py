@@ -1,6 +1,17 @@
 from django.apps import AppConfig
+from django.conf import settings
 
 
 class ManagementConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'management'
+
+    def ready(self):
+        if not getattr(settings, "MONGO_ENSURE_INDEXES_ON_STARTUP", True):
+            return
+
+        from .indexes import ensure_indexes_in_background
+        from .models import WorkplaceModel
+        from .mongo import get_db
+
+        ensure_indexes_in_background(get_db, lambda: WorkplaceModel().list_workplace_names())
@@ -0,0 +1,167 @@
+"""Async versions of the dashboard read endpoints.
+
+Served under an ASGI server (``inventory.asgi``), each view awaits its
+MongoDB reads on the event loop instead of holding a worker thread, so one
+process can keep many dashboards in flight. Queries and response shapes are
+shared with the sync views through ``dashboard`` and ``rollups``.
+"""
+import asyncio
+from datetime import datetime
+
+from .dashboard import (
+    INVENTORY_DATA_PROJECTION, INVENTORY_ITEMS_PROJECTION, ITEMS_PROJECTION, TOTALS_PROJECTION,
+    dashboard_bundle, inventory_chart, inventory_stats,
+)
+from .listing import Listing, ListingError
+from .mongo import get_async_db
+from .response_cache import cached_response
+from .responses import JsonResponse
+from .rollups import (
+    BY_ITEM, BY_ITEM_REVENUE_KEY, BY_ITEM_REVENUE_PROJECTION, DAILY, DISTRIBUTION_QUERY, TOTALS,
+    TOTALS_QUANTITY_PROJECTION, daily_sales_pipeline, stats_window, summarize_distribution,
+    summarize_sales_by_item, summarize_sales_stats,
+)
+
+
+async def _workspace_db(request):
+    """Returns the async database of the logged-in workspace, or None."""
+    workspace = await request.session.aget("workspace")
+    if not workspace:
+        return None
+    return get_async_db(workspace)
+
+
+def _not_logged_in():
+    return JsonResponse({"error": "Not logged in"}, status=401)
+
+
+@cached_response("get_inventory_items")
+async def get_inventory_items(request):
+    """Fetches all inventory items for the logged-in workspace."""
+    db = await _workspace_db(request)
+    if db is None:
+        return _not_logged_in()
+
+    try:
+        listing = Listing.from_request(request)
+    except ListingError as e:
+        return JsonResponse({"error": e.message}, status=e.status)
+
+    if listing.stream:
+        return listing.astream_response(db["inventory"], INVENTORY_ITEMS_PROJECTION)
+    inventory_items, next_cursor = await listing.apage(db["inventory"], INVENTORY_ITEMS_PROJECTION)
+    return JsonResponse(listing.payload({"items": inventory_items}, next_cursor))
+
+
+@cached_response("get_items")
+async def get_items(request):
+    """Fetches all items with SKU, item name, category, size, price, and item ID for the logged-in workspace."""
+    db = await _workspace_db(request)
+    if db is None:
+        return _not_logged_in()
+
+    try:
+        listing = Listing.from_request(request)
+    except ListingError as e:
+        return JsonResponse({"error": e.message}, status=e.status)
+
+    if listing.stream:
+        return listing.astream_response(db["items"], ITEMS_PROJECTION)
+    items, next_cursor = await listing.apage(db["items"], ITEMS_PROJECTION)
+    return JsonResponse(listing.payload({"items": items}, next_cursor))
+
+
+@cached_response("get_inventory_data")
+async def get_inventory_data(request):
+    """Fetches ingredient IDs, names and quantities for the inventory chart."""
+    db = await _workspace_db(request)
+    if db is None:
+        return _not_logged_in()
+
+    try:
+        listing = Listing.from_request(request)
+    except ListingError as e:
+        return JsonResponse({"error": e.message}, status=e.status)
+
+    if listing.stream:
+        return listing.astream_response(db.inventory, INVENTORY_DATA_PROJECTION)
+    inventory_data, next_cursor = await listing.apage(db.inventory, INVENTORY_DATA_PROJECTION)
+    return JsonResponse(listing.payload(inventory_chart(inventory_data), next_cursor))
+
+
+@cached_response("get_inventory_stats")
+async def get_inventory_stats(request):
+    """Fetches inventory statistics: total items, out-of-stock count, and low-stock count."""
+    db = await _workspace_db(request)
+    if db is None:
+        return _not_logged_in()
+
+    inventory = await db.inventory.find({}, {"_id": 0, "quantity": 1}).to_list(None)
+    return JsonResponse(inventory_stats(inventory))
+
+
+@cached_response("get_sales_stats", daily=True)
+async def get_sales_stats(request):
+    """Fetches weekly, monthly, yearly and total sales from the daily rollups."""
+    db = await _workspace_db(request)
+    if db is None:
+        return _not_logged_in()
+
+    today = datetime.utcnow().date()
+    _, start = stats_window(today)
+
+    async def daily_rows():
+        cursor = await db[DAILY].aggregate(daily_sales_pipeline(start))
+        return await cursor.to_list(None)
+
+    # The two rollup reads are independent, so they run concurrently
+    rows, totals = await asyncio.gather(
+        daily_rows(),
+        db[TOTALS].find({}, TOTALS_QUANTITY_PROJECTION).sort("_id", 1).to_list(None),
+    )
+    return JsonResponse(summarize_sales_stats(rows, totals, today))
+
+
+@cached_response("get_sales_distribution")
+async def get_sales_distribution(request):
+    """Fetches the number of order lines per order type."""
+    db = await _workspace_db(request)
+    if db is None:
+        return _not_logged_in()
+
+    totals = await db[TOTALS].find(DISTRIBUTION_QUERY, {"lines": 1}).to_list(None)
+    return JsonResponse({"sales_types": summarize_distribution(totals)})
+
+
+@cached_response("get_sales_data")
+async def get_sales_data(request):
+    """Fetches total sales amount per item, highest first."""
+    db = await _workspace_db(request)
+    if db is None:
+        return _not_logged_in()
+
+    docs = await db[BY_ITEM].find({}, BY_ITEM_REVENUE_PROJECTION).sort(BY_ITEM_REVENUE_KEY).to_list(None)
+    return JsonResponse({"sales_data": summarize_sales_by_item(docs)})
+
+
+@cached_response("dashboard_data", daily=True)
+async def get_dashboard_data(request):
+    """Fetches every dashboard widget in one response, running the queries concurrently."""
+    db = await _workspace_db(request)
+    if db is None:
+        return _not_logged_in()
+
+    today = datetime.utcnow().date()
+    _, start = stats_window(today)
+
+    async def daily_rows():
+        cursor = await db[DAILY].aggregate(daily_sales_pipeline(start))
+        return await cursor.to_list(None)
+
+    inventory, items, rows, totals = await asyncio.gather(
+        db.inventory.find({}, INVENTORY_DATA_PROJECTION).to_list(None),
+        db["items"].find({}, ITEMS_PROJECTION).to_list(None),
+        daily_rows(),
+        db[TOTALS].find({}, TOTALS_PROJECTION).sort("_id", 1).to_list(None),
+    )
+    return JsonResponse(dashboard_bundle(inventory, items, rows, totals, today))
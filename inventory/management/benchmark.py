@@ -0,0 +1,197 @@
+"""Synthetic workspaces and a request driver for the performance benchmark suite.
+
+``seed_workspace`` fills a scratch workspace database with a generated
+catalog, stock and order history at a given scale and brings its rollups
+and forecast features up to date; ``create_bench_login`` optionally adds a
+workplace login for it, which ``drop_workspace`` removes again.
+``run_scenario`` drives one endpoint
+through the Django test client and reports latency percentiles,
+throughput and MongoDB commands per request, using the command counter on
+the shared client.
+"""
+import random
+import secrets
+import statistics
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta
+
+from django.conf import settings
+from django.contrib.auth.hashers import make_password
+from django.test import Client
+
+from .catalog import bump_catalog_version
+from .indexes import ensure_indexes
+from .mongo import command_counter
+from .rollups import rebuild_rollups
+
+SCALES = {
+    "small": {"items": 50, "ingredients": 100, "recipe_lines": 4, "orders": 10_000},
+    "medium": {"items": 200, "ingredients": 400, "recipe_lines": 6, "orders": 1_000_000},
+    "large": {"items": 1000, "ingredients": 2000, "recipe_lines": 8, "orders": 10_000_000},
+}
+SEED_BATCH_SIZE = 10_000
+HISTORY_DAYS = 730
+ORDER_TYPES = ["dine-in", "takeout"]
+
+
+def synthetic_catalog(scale, rng):
+    """Returns ``(items, recipe, inventory)`` documents for a scale."""
+    ingredients = [
+        {"ing_id": f"ING{i:05d}", "name": f"Ingredient {i}", "inv_id": f"INV{i:05d}",
+         "ing_meas": "g", "quantity": 10**12}
+        for i in range(scale["ingredients"])
+    ]
+    items, recipe = [], []
+    for i in range(scale["items"]):
+        sku = f"SKU{i:05d}"
+        items.append({
+            "item_id": f"IT{i:05d}", "item_name": f"Item {i}", "sku": sku,
+            "item_cat": f"Category {i % 8}", "item_size": "M", "item_price": round(rng.uniform(2, 30), 2),
+        })
+        for ingredient in rng.sample(ingredients, scale["recipe_lines"]):
+            recipe.append({"sku": sku, "ing_id": ingredient["ing_id"], "quantity": rng.randint(1, 50)})
+    return items, recipe, ingredients
+
+
+def synthetic_orders(items, count, rng, end):
+    """Yields order lines spread over the last two years, as add_sale writes them."""
+    start = end - timedelta(days=HISTORY_DAYS)
+    for n in range(count):
+        item = items[rng.randrange(len(items))]
+        ts = start + timedelta(seconds=rng.randrange(HISTORY_DAYS * 86400))
+        yield {
+            "row_id": str(uuid.uuid4()),
+            "order_id": f"ORD{n + 1:03d}",
+            "date": ts.isoformat() + "+00:00",
+            "ts": ts,
+            "item_id": item["item_id"],
+            "item_name": item["item_name"],
+            "sku": item["sku"],
+            "item_price": item["item_price"],
+            "quantity": rng.randint(1, 3),
+            "cust_name": "bench",
+            "in_or_out": ORDER_TYPES[n % 2],
+        }
+
+
+def seed_workspace(client, workspace, scale, seed=0):
+    """Drops and regenerates a scratch workspace; returns the seeded sizes and timings."""
+    from .mlload import rebuild_feature_state
+
+    rng = random.Random(seed)
+    started = time.perf_counter()
+    client.drop_database(workspace)
+    db = client[workspace]
+    ensure_indexes(db)
+
+    items, recipe, inventory = synthetic_catalog(scale, rng)
+    db["items"].insert_many(items)
+    db.recipe.insert_many(recipe)
+    db.inventory.insert_many(inventory)
+
+    batch = []
+    for order in synthetic_orders(items, scale["orders"], rng, datetime.utcnow()):
+        batch.append(order)
+        if len(batch) >= SEED_BATCH_SIZE:
+            db.orders.insert_many(batch, ordered=False)
+            batch = []
+    if batch:
+        db.orders.insert_many(batch, ordered=False)
+    db.counters.update_one({"_id": "order_id"}, {"$set": {"seq": scale["orders"]}}, upsert=True)
+    orders_seconds = time.perf_counter() - started
+
+    rebuild_rollups(db)
+    rebuild_feature_state(db)
+    bump_catalog_version(db)
+    return {
+        "workspace": workspace, **scale,
+        "seed_seconds": round(time.perf_counter() - started, 1),
+        "orders_seconds": round(orders_seconds, 1),
+    }
+
+
+def bench_login_email(workspace):
+    return f"{workspace}@bench.local"
+
+
+def _workplaces(client):
+    return client[getattr(settings, "MONGO_MAIN_DB", "invmng")]["workplaces"]
+
+
+def create_bench_login(client, workspace, password=None):
+    """Adds a workplace login for a scratch workspace and returns ``(email, password)``.
+
+    Without ``password`` a random one is generated, so no account with a
+    known password is left on a server the suite is pointed at.
+    """
+    email = bench_login_email(workspace)
+    password = password or secrets.token_urlsafe(16)
+    _workplaces(client).update_one(
+        {"email": email},
+        {"$set": {"name": workspace, "email": email, "password": make_password(password)}},
+        upsert=True,
+    )
+    return email, password
+
+
+def drop_workspace(client, workspace):
+    """Drops a scratch workspace database and its bench login, if one was created."""
+    client.drop_database(workspace)
+    _workplaces(client).delete_one({"email": bench_login_email(workspace), "name": workspace})
+
+
+def logged_in_client(workspace):
+    """Returns a test client whose session is logged into ``workspace``."""
+    client = Client()
+    session = client.session
+    session["workspace"] = workspace
+    session["user_type"] = "workplace"
+    session.save()
+    client.cookies[settings.SESSION_COOKIE_NAME] = session.session_key
+    return client
+
+
+def percentile(samples, q):
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(round(q / 100 * (len(ordered) - 1))))]
+
+
+def run_scenario(workspace, call, requests, concurrency=1, warmup=5):
+    """Sends ``requests`` calls of ``call(client, n)`` and returns latency, throughput and Mongo ops."""
+    local = threading.local()
+
+    def client():
+        if not hasattr(local, "client"):
+            local.client = logged_in_client(workspace)
+        return local.client
+
+    def timed(n):
+        started = time.perf_counter()
+        response = call(client(), n)
+        return time.perf_counter() - started, response.status_code
+
+    for n in range(warmup):
+        timed(n)
+
+    ops_before = command_counter.stats()["total"]
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        results = list(pool.map(timed, range(requests)))
+    wall = time.perf_counter() - started
+    ops = command_counter.stats()["total"] - ops_before
+
+    latencies = [seconds * 1000 for seconds, _ in results]
+    return {
+        "requests": requests,
+        "concurrency": concurrency,
+        "errors": sum(1 for _, status in results if status >= 400),
+        "latency_ms_p50": round(percentile(latencies, 50), 3),
+        "latency_ms_p95": round(percentile(latencies, 95), 3),
+        "latency_ms_p99": round(percentile(latencies, 99), 3),
+        "latency_ms_mean": round(statistics.fmean(latencies), 3),
+        "throughput_rps": round(requests / wall, 1) if wall else None,
+        "mongo_ops_per_request": round(ops / requests, 2) if requests else None,
+    }
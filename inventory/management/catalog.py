@@ -0,0 +1,101 @@
+"""In-process cache of each workspace's menu items and recipes.
+
+Entries are validated against the workspace's catalog version counter, so a
+lookup costs one small ``meta`` read instead of re-reading ``items`` and
+``recipe``. Anything that writes to those collections must call
+``bump_catalog_version`` afterwards.
+"""
+import threading
+from collections import OrderedDict
+
+from django.conf import settings
+
+from .versions import CATALOG, DATA, bump_version, get_version
+
+
+class WorkspaceCatalog:
+    """Snapshot of one workspace's items and recipes at a given catalog version."""
+
+    def __init__(self, version, items, recipe_items):
+        self.version = version
+        self.items_by_name = {}
+        self.items_by_id = {}
+        self.recipes_by_sku = {}
+
+        for item in items:
+            if item.get("item_name") is not None:
+                self.items_by_name.setdefault(item["item_name"], item)
+            if item.get("item_id") is not None:
+                self.items_by_id.setdefault(item["item_id"], item)
+        for recipe_item in recipe_items:
+            self.recipes_by_sku.setdefault(recipe_item.get("sku"), []).append(recipe_item)
+
+
+def load_catalog(db, version):
+    """Reads a workspace's full catalog from MongoDB."""
+    items = list(db.items.find({}, {"_id": 0}))
+    recipe_items = list(db.recipe.find({}, {"_id": 0}))
+    return WorkspaceCatalog(version, items, recipe_items)
+
+
+class CatalogCache:
+    """LRU of WorkspaceCatalog snapshots keyed by workspace database name."""
+
+    def __init__(self, max_workspaces=64):
+        self.max_workspaces = max_workspaces
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, db):
+        """Returns the catalog for ``db``, re-fetching it only if its version changed."""
+        # Read the version before the data so a concurrent write is never cached as current
+        version = get_version(db, CATALOG)
+
+        with self._lock:
+            entry = self._entries.get(db.name)
+            if entry is not None and entry.version == version:
+                self._entries.move_to_end(db.name)
+                self.hits += 1
+                return entry
+            self.misses += 1
+
+        catalog = load_catalog(db, version)
+
+        with self._lock:
+            self._entries[db.name] = catalog
+            self._entries.move_to_end(db.name)
+            while len(self._entries) > self.max_workspaces:
+                self._entries.popitem(last=False)
+        return catalog
+
+    def invalidate(self, workspace=None):
+        """Drops one workspace's snapshot, or every snapshot when no workspace is given."""
+        with self._lock:
+            if workspace is None:
+                self._entries.clear()
+            else:
+                self._entries.pop(workspace, None)
+
+    def stats(self):
+        """Returns hit/miss counters and the number of cached workspaces."""
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_ratio": self.hits / lookups if lookups else 0.0,
+                "workspaces": len(self._entries),
+                "max_workspaces": self.max_workspaces,
+            }
+
+
+catalog_cache = CatalogCache(getattr(settings, "CATALOG_CACHE_WORKSPACES", 64))
+
+
+def bump_catalog_version(db):
+    """Marks a workspace's items and recipes as changed so every worker re-fetches them."""
+    catalog_cache.invalidate(db.name)
+    bump_version(db, DATA)
+    return bump_version(db, CATALOG)
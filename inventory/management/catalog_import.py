@@ -0,0 +1,172 @@
+"""Bulk ingestion of stock receipts, menu items and recipe rows.
+
+Rows are validated in one pass and coalesced per target document: several
+receipts for the same ingredient become one ``$inc``, and repeated item or
+recipe rows keep the last value. The resulting upserts are applied in
+unordered ``bulk_write`` batches, and rows that fail validation or whose
+write fails are reported with their row numbers. Catalog changes bump the
+catalog version; stock changes bump the data version.
+
+Row fields per kind:
+
+- ``inventory``: ``ing_id`` or ``name``, positive ``quantity`` received, optional
+  ``name``, ``inv_id``, ``ing_meas``, ``ing_weight``, ``item_type``
+- ``items``: ``item_id``, ``item_name``, ``sku``, ``item_price``, optional
+  ``item_cat``, ``item_size``
+- ``recipe``: ``sku``, ``ing_id``, ``quantity`` per item, optional ``recipe_id``
+"""
+import math
+
+from pymongo import UpdateOne
+from pymongo.errors import BulkWriteError
+
+from .catalog import bump_catalog_version
+from .order_import import ImportRowError
+from .versions import DATA, bump_version
+
+KINDS = ("inventory", "items", "recipe")
+WRITE_BATCH_SIZE = 1000
+MAX_REPORTED_ERRORS = 100
+
+INVENTORY_FIELDS = ("name", "inv_id", "ing_meas", "ing_weight", "item_type")
+ITEM_FIELDS = ("item_cat", "item_size")
+
+
+def _text(row, field, required=False):
+    value = row.get(field)
+    if isinstance(value, str):
+        value = value.strip()
+    if value in (None, ""):
+        if required:
+            raise ImportRowError(f"Missing {field}")
+        return None
+    return value
+
+
+def _number(row, field):
+    value = _text(row, field, required=True)
+    try:
+        number = float(value)
+    except (TypeError, ValueError):
+        raise ImportRowError(f"{field} is not a number: {value!r}")
+    if not math.isfinite(number):
+        raise ImportRowError(f"{field} is not a number: {value!r}")
+    return int(number) if number.is_integer() else number
+
+
+def _inventory_key(row):
+    ing_id = _text(row, "ing_id")
+    if ing_id is not None:
+        return ("ing_id", ing_id)
+    name = _text(row, "name")
+    if name is None:
+        raise ImportRowError("Missing ing_id or name")
+    return ("name", name)
+
+
+class _Coalescer:
+    """Folds validated rows into one pending update per target document."""
+
+    def __init__(self, kind):
+        self.kind = kind
+        self.updates = {}
+        self.rows = {}
+
+    def add(self, row_number, row):
+        if not isinstance(row, dict):
+            raise ImportRowError("Row is not an object")
+        getattr(self, f"_add_{self.kind}")(row_number, row)
+
+    def _track(self, key, row_number):
+        self.rows.setdefault(key, []).append(row_number)
+
+    def _add_inventory(self, row_number, row):
+        key = _inventory_key(row)
+        quantity = _number(row, "quantity")
+        if quantity <= 0:
+            # A receipt only ever adds stock; corrections go through the inventory form
+            raise ImportRowError(f"quantity received must be positive: {row.get('quantity')!r}")
+        fields = {field: _text(row, field) for field in INVENTORY_FIELDS if _text(row, field) is not None}
+        fields.pop(key[0], None)
+        update = self.updates.setdefault(key, {"quantity": 0, "fields": {}})
+        update["quantity"] += quantity
+        update["fields"].update(fields)
+        self._track(key, row_number)
+
+    def _add_items(self, row_number, row):
+        item_id = _text(row, "item_id", required=True)
+        fields = {
+            "item_name": _text(row, "item_name", required=True),
+            "sku": _text(row, "sku", required=True),
+            "item_price": _number(row, "item_price"),
+        }
+        fields.update({field: _text(row, field) for field in ITEM_FIELDS if _text(row, field) is not None})
+        self.updates[("item_id", item_id)] = fields
+        self._track(("item_id", item_id), row_number)
+
+    def _add_recipe(self, row_number, row):
+        key = (_text(row, "sku", required=True), _text(row, "ing_id", required=True))
+        fields = {"quantity": _number(row, "quantity")}
+        if _text(row, "recipe_id") is not None:
+            fields["recipe_id"] = _text(row, "recipe_id")
+        self.updates[key] = fields
+        self._track(key, row_number)
+
+    def operations(self):
+        """Yields ``(rows, operation)`` for every coalesced target document."""
+        for key, update in self.updates.items():
+            if self.kind == "inventory":
+                field, value = key
+                change = {"$inc": {"quantity": update["quantity"]}}
+                if update["fields"]:
+                    change["$set"] = update["fields"]
+                operation = UpdateOne({field: value}, change, upsert=True)
+            elif self.kind == "items":
+                operation = UpdateOne({"item_id": key[1]}, {"$set": update}, upsert=True)
+            else:
+                operation = UpdateOne({"sku": key[0], "ing_id": key[1]}, {"$set": update}, upsert=True)
+            yield self.rows[key], operation
+
+
+def ingest(db, kind, rows, batch_size=WRITE_BATCH_SIZE):
+    """Validates, coalesces and writes ``rows`` of one kind; returns a per-row report."""
+    if kind not in KINDS:
+        raise ValueError(f"Unsupported kind: {kind}")
+
+    report = {"kind": kind, "rows_read": 0, "rows_rejected": 0, "operations": 0,
+              "upserted": 0, "modified": 0, "errors": []}
+
+    def reject(row_numbers, message):
+        report["rows_rejected"] += len(row_numbers)
+        for row_number in row_numbers:
+            if len(report["errors"]) < MAX_REPORTED_ERRORS:
+                report["errors"].append({"row": row_number, "error": message})
+
+    coalescer = _Coalescer(kind)
+    for row_number, row in enumerate(rows, 1):
+        report["rows_read"] += 1
+        try:
+            coalescer.add(row_number, row)
+        except ImportRowError as e:
+            reject([row_number], str(e))
+
+    pending = list(coalescer.operations())
+    for start in range(0, len(pending), batch_size):
+        batch = pending[start:start + batch_size]
+        try:
+            result = db[kind].bulk_write([operation for _, operation in batch], ordered=False)
+            details = result.bulk_api_result
+        except BulkWriteError as e:
+            details = e.details
+            for error in details.get("writeErrors", []):
+                reject(batch[error["index"]][0], error.get("errmsg", "Write failed"))
+        report["operations"] += len(batch)
+        report["upserted"] += details.get("nUpserted", 0)
+        report["modified"] += details.get("nModified", 0)
+
+    if pending:
+        if kind == "inventory":
+            bump_version(db, DATA)
+        else:
+            bump_catalog_version(db)
+    return report
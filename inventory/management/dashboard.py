@@ -0,0 +1,116 @@
+"""Queries and response shaping shared by the sync and async dashboard views."""
+import contextvars
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor
+
+from django.conf import settings
+
+from .rollups import DAILY, ORDER_TYPES, TOTALS, daily_sales_pipeline, stats_window, summarize_sales_stats
+
+INVENTORY_ITEMS_PROJECTION = {"_id": 0, "name": 1, "quantity": 1}
+ITEMS_PROJECTION = {"_id": 0, "sku": 1, "item_name": 1, "item_cat": 1, "item_size": 1, "item_price": 1, "item_id": 1}
+INVENTORY_DATA_PROJECTION = {"_id": 0, "ing_id": 1, "name": 1, "quantity": 1}
+
+
+def inventory_stats(inventory):
+    """Counts total, out-of-stock and low-stock inventory items."""
+    return {
+        "total_items": len(inventory),
+        "out_of_stock": sum(1 for item in inventory if item.get("quantity", 0) <= 0),
+        "low_stock": sum(1 for item in inventory if 0 < item.get("quantity", 0) < 10)
+    }
+
+
+def inventory_chart(inventory_data):
+    """Splits inventory documents into the parallel arrays the dashboard chart expects."""
+    name = []
+    inventory = []
+    labels = []
+    for item in inventory_data:
+        name.append(item["name"])
+        labels.append(item["ing_id"])  # Ingredient IDs or names
+        inventory.append(item["quantity"])  # Inventory quantity
+    return {"labels": labels, "inventory": inventory, "name": name}
+
+
+# -------------------- Dashboard Bundle -------------------- #
+# One read of sales_totals serves both the all-time total and the distribution
+TOTALS_PROJECTION = {"quantity": 1, "lines": 1}
+
+_query_pool = None
+_query_pool_lock = threading.Lock()
+
+
+class QueryPool:
+    """Runs bundle queries on idle pool threads, or in the caller's thread when none is idle.
+
+    A query never waits for a pool thread, so under load concurrent bundles
+    fall back to running their queries one after the other instead of
+    queueing behind each other's.
+    """
+
+    def __init__(self, threads):
+        self._executor = ThreadPoolExecutor(max_workers=threads, thread_name_prefix="dashboard")
+        self._idle = threading.BoundedSemaphore(threads)
+
+    def submit(self, query):
+        """Starts ``query`` and returns a Future; runs in a copy of the caller's context."""
+        context = contextvars.copy_context()
+        if not self._idle.acquire(blocking=False):
+            future = Future()
+            try:
+                future.set_result(context.run(query))
+            except Exception as e:
+                future.set_exception(e)
+            return future
+
+        def run():
+            try:
+                return context.run(query)
+            finally:
+                self._idle.release()
+
+        return self._executor.submit(run)
+
+
+def _get_query_pool():
+    """Returns this process's pool for the sync bundle view's queries."""
+    global _query_pool
+    with _query_pool_lock:
+        if _query_pool is None:
+            _query_pool = QueryPool(getattr(settings, "DASHBOARD_QUERY_THREADS", 12))
+        return _query_pool
+
+
+def dashboard_bundle(inventory, items, daily_rows, totals, today):
+    """Builds every dashboard widget from one result per query.
+
+    Each key holds exactly what the widget's own endpoint returns, so the page
+    can use the bundle in place of the individual requests.
+    """
+    return {
+        "inventory_items": {"items": [{"name": item.get("name"), "quantity": item.get("quantity")} for item in inventory]},
+        "items": {"items": items},
+        "inventory_stats": inventory_stats(inventory),
+        "inventory_data": inventory_chart(inventory),
+        "sales_stats": summarize_sales_stats(daily_rows, totals, today),
+        "sales_distribution": {"sales_types": {
+            doc["_id"]: doc.get("lines", 0) for doc in totals if doc["_id"] in ORDER_TYPES
+        }},
+    }
+
+
+def dashboard_data(db, today):
+    """Runs the four dashboard queries concurrently and builds the bundle.
+
+    Three go to the query pool (attributed to the calling request through
+    its context); the calling thread runs the fourth meanwhile.
+    """
+    _, start = stats_window(today)
+    pool = _get_query_pool()
+
+    inventory = pool.submit(lambda: list(db.inventory.find({}, INVENTORY_DATA_PROJECTION)))
+    items = pool.submit(lambda: list(db["items"].find({}, ITEMS_PROJECTION)))
+    daily_rows = pool.submit(lambda: list(db[DAILY].aggregate(daily_sales_pipeline(start))))
+    totals = list(db[TOTALS].find({}, TOTALS_PROJECTION).sort("_id", 1))
+    return dashboard_bundle(inventory.result(), items.result(), daily_rows.result(), totals, today)
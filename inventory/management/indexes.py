@@ -0,0 +1,137 @@
+"""Declarative index specification for workspace databases.
+
+``INDEX_SPEC`` lists, per collection, the indexes every workspace database
+must have. ``ensure_indexes`` creates whatever is missing (index builds are
+idempotent), ``index_drift`` compares a database against the spec and
+``sync_indexes`` first drops the indexes that conflict with it, which
+``create_indexes`` would otherwise refuse to replace.
+Lookups by ``_id`` (``counters``, ``meta``, ``sales_totals``) are served by
+the index MongoDB always creates, so those collections need no entry here.
+"""
+import logging
+import threading
+
+from pymongo import ASCENDING, IndexModel
+
+from .rollups import BY_ITEM, BY_ITEM_REVENUE_KEY, DAILY, DAILY_KEY, PENDING_FIELD
+
+logger = logging.getLogger(__name__)
+
+INDEX_SPEC = {
+    "items": [
+        IndexModel([("item_name", ASCENDING)], name="item_name_1"),
+        IndexModel([("item_id", ASCENDING)], name="item_id_1"),
+    ],
+    "recipe": [
+        IndexModel([("sku", ASCENDING)], name="sku_1"),
+    ],
+    "inventory": [
+        IndexModel([("ing_id", ASCENDING)], name="ing_id_1"),
+        IndexModel([("name", ASCENDING)], name="name_1"),
+    ],
+    "orders": [
+        IndexModel([("ts", ASCENDING)], name="ts_1"),
+        IndexModel([("date", ASCENDING)], name="date_1"),
+        IndexModel([("item_id", ASCENDING)], name="item_id_1"),
+        # Only order lines whose rollups failed carry the field
+        IndexModel([(PENDING_FIELD, ASCENDING)], name="pending_rollups_1", sparse=True),
+    ],
+    DAILY: [
+        IndexModel(DAILY_KEY, name="date_1_item_id_1_in_or_out_1", unique=True),
+    ],
+    BY_ITEM: [
+        IndexModel(BY_ITEM_REVENUE_KEY, name="revenue_-1"),
+    ],
+}
+
+
+def _spec_key(model):
+    doc = model.document
+    return list(doc["key"].items()), bool(doc.get("unique", False)), bool(doc.get("sparse", False))
+
+
+def _existing_key(info):
+    return list(info["key"]), bool(info.get("unique", False)), bool(info.get("sparse", False))
+
+
+def ensure_indexes(db):
+    """Creates every index in INDEX_SPEC that ``db`` does not have yet."""
+    created = {}
+    for collection, models in INDEX_SPEC.items():
+        created[collection] = db[collection].create_indexes(models)
+    return created
+
+
+def index_drift(db):
+    """Compares ``db`` with INDEX_SPEC.
+
+    Returns ``{collection: {"missing": [...], "mismatched": [...], "extra": [...]}}``
+    for every collection that differs from the spec.
+    """
+    drift = {}
+    for collection, models in INDEX_SPEC.items():
+        existing = {
+            name: _existing_key(info)
+            for name, info in db[collection].index_information().items()
+            if name != "_id_"
+        }
+        missing, mismatched = [], []
+        for model in models:
+            name = model.document["name"]
+            if name not in existing:
+                missing.append(name)
+            elif existing[name] != _spec_key(model):
+                mismatched.append(name)
+        expected = {model.document["name"] for model in models}
+        extra = sorted(set(existing) - expected)
+
+        if missing or mismatched or extra:
+            drift[collection] = {"missing": missing, "mismatched": mismatched, "extra": extra}
+    return drift
+
+
+def sync_indexes(db):
+    """Drops indexes that conflict with INDEX_SPEC, then creates everything missing.
+
+    An index conflicts when it has a spec name but a different definition,
+    or the key of a spec index under another name. Returns
+    ``{collection: [dropped index names]}``.
+    """
+    dropped = {}
+    for collection, models in INDEX_SPEC.items():
+        wanted = {model.document["name"]: _spec_key(model) for model in models}
+        wanted_keys = {str(key) for key, _, _ in wanted.values()}
+        for name, info in db[collection].index_information().items():
+            if name == "_id_":
+                continue
+            current = _existing_key(info)
+            if (name in wanted and current != wanted[name]) or (name not in wanted and str(current[0]) in wanted_keys):
+                db[collection].drop_index(name)
+                dropped.setdefault(collection, []).append(name)
+    ensure_indexes(db)
+    return dropped
+
+
+def ensure_all_workspace_indexes(get_db, workspaces):
+    """Applies INDEX_SPEC to every workspace database, logging failures instead of raising."""
+    for workspace in workspaces:
+        try:
+            ensure_indexes(get_db(workspace))
+        except Exception:
+            logger.exception("Could not ensure indexes for workspace %s", workspace)
+
+
+def ensure_indexes_in_background(get_db, list_workspaces):
+    """Runs ensure_all_workspace_indexes on a daemon thread so startup never waits on MongoDB."""
+
+    def run():
+        try:
+            workspaces = list_workspaces()
+        except Exception:
+            logger.exception("Could not list workspaces for index provisioning")
+            return
+        ensure_all_workspace_indexes(get_db, workspaces)
+
+    thread = threading.Thread(target=run, name="ensure-workspace-indexes", daemon=True)
+    thread.start()
+    return thread
@@ -0,0 +1,268 @@
+"""Per-request MongoDB and serialization instrumentation.
+
+``RequestMetricsMiddleware`` opens a ``RequestStats`` for every request in a
+context variable. ``RequestCommandListener`` (registered on the shared
+clients) adds each MongoDB command the request issues, with its duration,
+and ``management.responses.JsonResponse`` adds the time spent encoding
+JSON. When the response is ready the middleware:
+
+- adds a ``Server-Timing`` header (``db``, ``json`` and ``total``),
+- records the figures in the Prometheus histograms served at ``/metrics``,
+- logs the command list of requests slower than ``SLOW_REQUEST_MS``.
+
+Metrics are kept per worker process; scrape every worker.
+"""
+import bisect
+import contextvars
+import logging
+import threading
+import time
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from pymongo import monitoring
+
+logger = logging.getLogger(__name__)
+
+_current = contextvars.ContextVar("request_stats", default=None)
+
+MAX_LOGGED_COMMANDS = 50
+
+
+class RequestStats:
+    """MongoDB commands and JSON encoding time of one request."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._pending = {}
+        self.commands = []
+        self.db_seconds = 0.0
+        self.json_seconds = 0.0
+
+    def command_started(self, key, name, collection):
+        with self._lock:
+            self._pending[key] = (name, collection)
+
+    def command_finished(self, key, name, seconds, failed=False):
+        with self._lock:
+            name, collection = self._pending.pop(key, (name, None))
+            self.commands.append((name, collection, seconds, failed))
+            self.db_seconds += seconds
+
+    def add_json(self, seconds):
+        with self._lock:
+            self.json_seconds += seconds
+
+
+def current_stats():
+    """Returns the RequestStats of the request being handled, or None outside a request."""
+    return _current.get()
+
+
+def record_json_serialization(seconds):
+    stats = _current.get()
+    if stats is not None:
+        stats.add_json(seconds)
+
+
+class RequestCommandListener(monitoring.CommandListener):
+    """Attributes every MongoDB command to the request that issued it."""
+
+    @staticmethod
+    def _key(event):
+        return event.connection_id, event.request_id
+
+    def started(self, event):
+        stats = _current.get()
+        if stats is not None:
+            collection = event.command.get(event.command_name)
+            stats.command_started(
+                self._key(event), event.command_name, collection if isinstance(collection, str) else None
+            )
+
+    def succeeded(self, event):
+        stats = _current.get()
+        if stats is not None:
+            stats.command_finished(self._key(event), event.command_name, event.duration_micros / 1e6)
+
+    def failed(self, event):
+        stats = _current.get()
+        if stats is not None:
+            stats.command_finished(self._key(event), event.command_name, event.duration_micros / 1e6, failed=True)
+
+
+request_command_listener = RequestCommandListener()
+
+
+# -------------------- Prometheus Metrics -------------------- #
+SECONDS_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+COUNT_BUCKETS = (0, 1, 2, 3, 5, 8, 13, 21, 34, 55, 89, 144)
+
+
+def _labels(names, values):
+    pairs = []
+    for name, value in zip(names, values):
+        escaped = str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+        pairs.append(f'{name}="{escaped}"')
+    return ",".join(pairs)
+
+
+class Histogram:
+    """Cumulative-bucket histogram per label set, rendered in the Prometheus text format."""
+
+    def __init__(self, name, help_text, label_names, buckets):
+        self.name = name
+        self.help_text = help_text
+        self.label_names = label_names
+        self.buckets = buckets
+        self._series = {}
+
+    def observe(self, labels, value):
+        series = self._series.setdefault(labels, {"buckets": [0] * len(self.buckets), "sum": 0.0, "count": 0})
+        index = bisect.bisect_left(self.buckets, value)
+        if index < len(self.buckets):
+            series["buckets"][index] += 1
+        series["sum"] += value
+        series["count"] += 1
+
+    def render(self):
+        lines = [f"# HELP {self.name} {self.help_text}", f"# TYPE {self.name} histogram"]
+        for labels, series in sorted(self._series.items()):
+            label_text = _labels(self.label_names, labels)
+            cumulative = 0
+            for bound, count in zip(self.buckets, series["buckets"]):
+                cumulative += count
+                lines.append(f'{self.name}_bucket{{{label_text},le="{bound}"}} {cumulative}')
+            lines.append(f'{self.name}_bucket{{{label_text},le="+Inf"}} {series["count"]}')
+            lines.append(f"{self.name}_sum{{{label_text}}} {series['sum']}")
+            lines.append(f"{self.name}_count{{{label_text}}} {series['count']}")
+        return lines
+
+
+class Counter:
+    """Monotonic counter per label set, rendered in the Prometheus text format."""
+
+    def __init__(self, name, help_text, label_names):
+        self.name = name
+        self.help_text = help_text
+        self.label_names = label_names
+        self._values = {}
+
+    def inc(self, labels, amount=1):
+        self._values[labels] = self._values.get(labels, 0) + amount
+
+    def render(self):
+        lines = [f"# HELP {self.name} {self.help_text}", f"# TYPE {self.name} counter"]
+        for labels, value in sorted(self._values.items()):
+            lines.append(f"{self.name}{{{_labels(self.label_names, labels)}}} {value}")
+        return lines
+
+
+class RequestMetrics:
+    """The request histograms and counters of this worker process."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.request_seconds = Histogram(
+            "inventory_request_duration_seconds", "Time to produce a response, per view.",
+            ("view", "method"), SECONDS_BUCKETS,
+        )
+        self.db_seconds = Histogram(
+            "inventory_request_mongo_seconds", "Time spent in MongoDB commands per request.",
+            ("view",), SECONDS_BUCKETS,
+        )
+        self.db_commands = Histogram(
+            "inventory_request_mongo_commands", "MongoDB commands issued per request.",
+            ("view",), COUNT_BUCKETS,
+        )
+        self.json_seconds = Histogram(
+            "inventory_request_json_seconds", "Time spent serializing JSON responses per request.",
+            ("view",), SECONDS_BUCKETS,
+        )
+        self.commands = Counter(
+            "inventory_mongo_commands_total", "MongoDB commands by view and command name.",
+            ("view", "command"),
+        )
+
+    def observe(self, view, method, total_seconds, stats):
+        with self._lock:
+            self.request_seconds.observe((view, method), total_seconds)
+            self.db_seconds.observe((view,), stats.db_seconds)
+            self.db_commands.observe((view,), len(stats.commands))
+            self.json_seconds.observe((view,), stats.json_seconds)
+            for name, _, _, _ in stats.commands:
+                self.commands.inc((view, name))
+
+    def render(self):
+        """Returns every metric in the Prometheus text exposition format."""
+        with self._lock:
+            lines = []
+            for metric in (self.request_seconds, self.db_seconds, self.db_commands, self.json_seconds, self.commands):
+                lines.extend(metric.render())
+            return "\n".join(lines) + "\n"
+
+
+request_metrics = RequestMetrics()
+
+
+# -------------------- Middleware -------------------- #
+def server_timing(stats, total_seconds):
+    return (
+        f'db;dur={stats.db_seconds * 1000:.2f};desc="MongoDB ({len(stats.commands)} commands)", '
+        f'json;dur={stats.json_seconds * 1000:.2f};desc="JSON serialization", '
+        f"total;dur={total_seconds * 1000:.2f}"
+    )
+
+
+class RequestMetricsMiddleware:
+    """Measures every request's MongoDB usage and JSON serialization (see the module docstring)."""
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.async_mode = iscoroutinefunction(get_response)
+        if self.async_mode:
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if self.async_mode:
+            return self.__acall__(request)
+        stats = RequestStats()
+        token = _current.set(stats)
+        started = time.perf_counter()
+        try:
+            response = self.get_response(request)
+        finally:
+            _current.reset(token)
+        return self._finish(request, response, stats, time.perf_counter() - started)
+
+    async def __acall__(self, request):
+        stats = RequestStats()
+        token = _current.set(stats)
+        started = time.perf_counter()
+        try:
+            response = await self.get_response(request)
+        finally:
+            _current.reset(token)
+        return self._finish(request, response, stats, time.perf_counter() - started)
+
+    def _finish(self, request, response, stats, total_seconds):
+        match = getattr(request, "resolver_match", None)
+        view = match.view_name if match else "unresolved"
+
+        response["Server-Timing"] = server_timing(stats, total_seconds)
+        request_metrics.observe(view, request.method, total_seconds, stats)
+
+        if total_seconds * 1000 >= getattr(settings, "SLOW_REQUEST_MS", 500):
+            commands = ", ".join(
+                f"{name}{'(' + collection + ')' if collection else ''} {seconds * 1000:.1f}ms{' FAILED' if failed else ''}"
+                for name, collection, seconds, failed in stats.commands[:MAX_LOGGED_COMMANDS]
+            )
+            logger.warning(
+                "Slow request %s %s (%s): %.1fms total, %.1fms in %d MongoDB commands, %.1fms JSON: %s",
+                request.method, request.path, view, total_seconds * 1000, stats.db_seconds * 1000,
+                len(stats.commands), stats.json_seconds * 1000, commands or "no commands",
+            )
+        return response
@@ -0,0 +1,164 @@
+"""Background forecast jobs for the restocking page.
+
+Forecasts run in a local process pool instead of the request thread. Each
+workspace has one job document in its ``forecast_jobs`` collection that
+doubles as a lease: whichever worker flips it to ``running`` first starts
+the computation, so concurrent requests from any number of web workers
+collapse into a single run. The finished result is kept on the same
+document and served until it is older than ``FORECAST_RESULT_TTL``; a later
+run that fails leaves it in place, and its error is reported next to it.
+"""
+import logging
+import multiprocessing
+import os
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime, timedelta
+
+from django.conf import settings
+from pymongo import ReturnDocument
+from pymongo.errors import DuplicateKeyError
+
+from .mongo import get_db
+
+logger = logging.getLogger(__name__)
+
+JOBS_COLLECTION = "forecast_jobs"
+RESTOCKING_JOB = "restocking"
+
+_executor = None
+_executor_lock = threading.Lock()
+
+
+def _result_ttl():
+    return timedelta(seconds=getattr(settings, "FORECAST_RESULT_TTL", 900))
+
+
+def _lease():
+    return timedelta(seconds=getattr(settings, "FORECAST_JOB_LEASE", 600))
+
+
+def init_django_worker(settings_module):
+    """Prepares a freshly spawned pool process to use Django and MongoDB."""
+    os.environ.setdefault("DJANGO_SETTINGS_MODULE", settings_module)
+    import django
+
+    django.setup()
+
+
+def get_executor():
+    """Returns the process pool shared by this web worker, creating it on first use."""
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            _executor = ProcessPoolExecutor(
+                max_workers=getattr(settings, "FORECAST_WORKERS", 2),
+                mp_context=multiprocessing.get_context("spawn"),
+                initializer=init_django_worker,
+                initargs=(os.environ.get("DJANGO_SETTINGS_MODULE", "inventory.settings"),),
+            )
+        return _executor
+
+
+def run_restocking_job(workspace):
+    """Pool entry point: computes a workspace's forecast and stores it on its job document."""
+    from .mlload import run_forecast
+    from .restocking import restocking_report
+
+    db = get_db(workspace)
+    jobs = db[JOBS_COLLECTION]
+    try:
+        predictions = run_forecast(db)
+        item_sales_predictions, restocking_recommendations = restocking_report(db, predictions)
+        jobs.update_one({"_id": RESTOCKING_JOB}, {"$set": {
+            "status": "done",
+            "generated_at": datetime.utcnow(),
+            "result": {
+                "item_sales_predictions": item_sales_predictions,
+                "restocking_recommendations": restocking_recommendations,
+            },
+            "error": None,
+        }})
+    except Exception as e:
+        logger.exception("Forecast job failed for workspace %s", workspace)
+        jobs.update_one({"_id": RESTOCKING_JOB}, {"$set": {
+            "status": "failed", "error": str(e), "failed_at": datetime.utcnow(),
+        }})
+
+
+def _on_done(workspace, future):
+    """Records a failure of the pool itself (e.g. a crashed process) on the job document."""
+    error = future.exception()
+    if error is None:
+        return
+    get_db(workspace)[JOBS_COLLECTION].update_one(
+        {"_id": RESTOCKING_JOB, "status": "running"},
+        {"$set": {"status": "failed", "error": str(error), "failed_at": datetime.utcnow()}},
+    )
+
+
+def is_fresh(job, now=None):
+    """True when the job holds a result younger than the TTL."""
+    if not job or not job.get("result") or not job.get("generated_at"):
+        return False
+    return (now or datetime.utcnow()) - job["generated_at"] < _result_ttl()
+
+
+def job_status(db):
+    """Returns the workspace's job document, or None if no forecast was ever requested."""
+    return db[JOBS_COLLECTION].find_one({"_id": RESTOCKING_JOB})
+
+
+def claimable(now):
+    """Filter matching the job document unless a live run holds its lease."""
+    return {"_id": RESTOCKING_JOB, "$or": [
+        {"status": {"$ne": "running"}},
+        {"lease_until": {"$lt": now}},
+    ]}
+
+
+def request_forecast(db, force=False):
+    """Returns the job document, starting a new run unless a fresh result or a live run exists."""
+    now = datetime.utcnow()
+    job = job_status(db)
+    if not force and is_fresh(job, now):
+        return job
+
+    try:
+        claimed = db[JOBS_COLLECTION].find_one_and_update(
+            claimable(now),
+            {"$set": {"status": "running", "started_at": now, "lease_until": now + _lease(), "error": None}},
+            upsert=True,
+            return_document=ReturnDocument.AFTER,
+        )
+    except DuplicateKeyError:
+        # Another worker holds the running lease
+        return job_status(db)
+
+    future = get_executor().submit(run_restocking_job, db.name)
+    future.add_done_callback(lambda f: _on_done(db.name, f))
+    return claimed
+
+
+def job_payload(job):
+    """Serializes a job document for the prediction page.
+
+    A failed run that left an earlier result behind is served as ``done``
+    with that result and its ``generated_at``; the failure is reported as
+    ``last_error``. ``error`` is only set when there is no result to show.
+    """
+    if not job:
+        return {"status": "idle"}
+    status = job.get("status")
+    if status == "failed" and job.get("result"):
+        status = "done"
+    payload = {
+        "status": status,
+        "generated_at": job["generated_at"].isoformat() if job.get("generated_at") else None,
+        "fresh": is_fresh(job),
+    }
+    if job.get("error"):
+        payload["error" if status == "failed" else "last_error"] = job["error"]
+    if job.get("result"):
+        payload.update(job["result"])
+    return payload
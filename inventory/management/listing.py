@@ -0,0 +1,153 @@
+"""Keyset pagination and streamed output for collection listings.
+
+Listings are ordered by ``_id``, which every collection indexes and which
+is unique, so a page is one indexed range scan no matter how deep it is:
+``?limit=N`` returns the first page and a ``next`` cursor, and
+``?after=<cursor>&limit=N`` continues from there. Without either parameter
+the whole listing is returned in one response, as before.
+
+``?stream=1`` instead sends newline-delimited JSON, encoding each document
+as the cursor yields it, so memory stays bounded by the driver batch size.
+When a limit is reached the last line is ``{"next": <cursor>}``.
+"""
+import base64
+import json
+
+import bson
+from django.core.serializers.json import DjangoJSONEncoder
+from django.http import StreamingHttpResponse
+
+PAGE_MAX_LIMIT = 1000
+PAGE_DEFAULT_LIMIT = 100
+STREAM_BATCH_SIZE = 1000
+NDJSON = "application/x-ndjson"
+
+
+class ListingError(Exception):
+    """Invalid pagination parameters, reported to the client with ``status``."""
+
+    def __init__(self, message, status=400):
+        super().__init__(message)
+        self.message = message
+        self.status = status
+
+
+def encode_cursor(value):
+    """Turns the last ``_id`` of a page into an opaque URL-safe cursor."""
+    return base64.urlsafe_b64encode(bson.encode({"_id": value})).decode().rstrip("=")
+
+
+def decode_cursor(token):
+    try:
+        return bson.decode(base64.urlsafe_b64decode(token + "=" * (-len(token) % 4)))["_id"]
+    except Exception:
+        raise ListingError("Invalid cursor")
+
+
+def _with_id(projection):
+    """Returns ``projection`` adjusted so the cursor always yields ``_id``.
+
+    An inclusion projection gets ``_id: 1`` added. An empty or exclusion
+    projection already returns ``_id`` unless it excludes it, so only that
+    exclusion is dropped; an empty result means every field.
+    """
+    fields = {key: value for key, value in projection.items() if key != "_id"}
+    if any(fields.values()):
+        return {**fields, "_id": 1}
+    return fields or None
+
+
+def _ndjson_line(doc):
+    return json.dumps(doc, cls=DjangoJSONEncoder) + "\n"
+
+
+class Listing:
+    """Pagination and output mode requested for one listing."""
+
+    def __init__(self, after=None, limit=None, stream=False):
+        self.after = after
+        self.limit = limit
+        self.stream = stream
+
+    @classmethod
+    def from_request(cls, request):
+        """Reads ``after``, ``limit`` and ``stream`` from the query string."""
+        after = request.GET.get("after")
+        limit = request.GET.get("limit")
+        stream = request.GET.get("stream") in ("1", "true")
+
+        if limit is not None:
+            try:
+                limit = int(limit)
+            except ValueError:
+                raise ListingError("limit must be an integer")
+            if not 1 <= limit <= PAGE_MAX_LIMIT:
+                raise ListingError(f"limit must be between 1 and {PAGE_MAX_LIMIT}")
+        elif after is not None:
+            limit = PAGE_DEFAULT_LIMIT
+
+        return cls(decode_cursor(after) if after is not None else None, limit, stream)
+
+    @property
+    def paginated(self):
+        return self.limit is not None
+
+    def find(self, collection, projection):
+        """Returns the cursor over this listing's range, one extra document past the limit."""
+        query = {"_id": {"$gt": self.after}} if self.after is not None else {}
+        cursor = collection.find(query, _with_id(projection)).sort("_id", 1)
+        if self.paginated:
+            cursor = cursor.limit(self.limit + 1)
+        return cursor
+
+    def _split(self, docs):
+        """Drops the look-ahead document and returns ``(docs, next_cursor)``."""
+        next_cursor = None
+        if self.paginated and len(docs) > self.limit:
+            docs = docs[:self.limit]
+            next_cursor = encode_cursor(docs[-1]["_id"])
+        for doc in docs:
+            doc.pop("_id", None)
+        return docs, next_cursor
+
+    def page(self, collection, projection):
+        """Reads one page (or the whole listing) and returns ``(docs, next_cursor)``."""
+        return self._split(list(self.find(collection, projection)))
+
+    async def apage(self, collection, projection):
+        """Async counterpart of ``page`` for an AsyncMongoClient collection."""
+        return self._split(await self.find(collection, projection).to_list(None))
+
+    def payload(self, body, next_cursor):
+        """Adds the ``next`` cursor to a response body when the listing is paginated."""
+        if self.paginated:
+            body["next"] = next_cursor
+        return body
+
+    def _line(self, doc, count):
+        """Encodes one streamed document, or the trailing ``next`` line once the limit is passed."""
+        if self.paginated and count > self.limit:
+            return _ndjson_line({"next": encode_cursor(self._last_id)})
+        self._last_id = doc.pop("_id", None)
+        return _ndjson_line(doc)
+
+    def stream_response(self, collection, projection):
+        """Streams the listing as newline-delimited JSON."""
+
+        def lines():
+            cursor = self.find(collection, projection).batch_size(STREAM_BATCH_SIZE)
+            for count, doc in enumerate(cursor, 1):
+                yield self._line(doc, count)
+
+        return StreamingHttpResponse(lines(), content_type=NDJSON)
+
+    def astream_response(self, collection, projection):
+        """Async counterpart of ``stream_response``, served from the event loop under ASGI."""
+
+        async def lines():
+            count = 0
+            async for doc in self.find(collection, projection).batch_size(STREAM_BATCH_SIZE):
+                count += 1
+                yield self._line(doc, count)
+
+        return StreamingHttpResponse(lines(), content_type=NDJSON)
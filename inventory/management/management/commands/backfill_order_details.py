@@ -0,0 +1,61 @@
+from django.core.management.base import BaseCommand, CommandError
+from pymongo import UpdateMany
+
+from management.catalog import load_catalog
+from management.models import WorkplaceModel
+from management.mongo import get_db
+from management.rollups import RollupRebuildError, rebuild_rollups
+
+
+class Command(BaseCommand):
+    help = (
+        "Stamps item_price and sku (and item_name where missing) from the current catalog onto "
+        "orders recorded before add_sale stored them, then rebuilds the sales rollups so revenue "
+        "includes those orders. Only orders without item_price are touched, and menu items without a "
+        "price are skipped, so it can be re-run once the catalog is complete. "
+        "Historical prices are unknown; today's catalog price is used. The rollup rebuild can lose "
+        "a sale recorded just as it finishes, so run it during a quiet period or pass --skip-rollups "
+        "and rebuild later with rebuild_sales_rollups."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("workspaces", nargs="*", help="Workspace database names (default: all registered workplaces)")
+        parser.add_argument("--skip-rollups", action="store_true", help="Do not rebuild the sales rollups afterwards")
+
+    def handle(self, *args, **options):
+        workspaces = options["workspaces"] or WorkplaceModel().list_workplace_names()
+
+        for workspace in workspaces:
+            db = get_db(workspace)
+            catalog = load_catalog(db, version=None)
+
+            # One indexed update per menu item instead of one per order line
+            operations = []
+            for item_id, item in catalog.items_by_id.items():
+                # Items without a price are left for a later run; a null item_price
+                # from an earlier run matches too and is repaired
+                details = {field: item[field] for field in ("item_price", "sku") if item.get(field) is not None}
+                if "item_price" in details:
+                    operations.append(UpdateMany(
+                        {"item_id": item_id, "item_price": None},
+                        {"$set": details},
+                    ))
+                if item.get("item_name") is not None:
+                    operations.append(UpdateMany(
+                        {"item_id": item_id, "item_name": {"$exists": False}},
+                        {"$set": {"item_name": item["item_name"]}},
+                    ))
+            stamped = db.orders.bulk_write(operations, ordered=False).modified_count if operations else 0
+            unpriced = db.orders.count_documents({"item_price": None})
+
+            self.stdout.write(
+                f"{workspace}: {stamped} order updates applied, "
+                f"{unpriced} orders still without a price (no catalog item or no catalog price)"
+            )
+            if not options["skip_rollups"]:
+                try:
+                    counts = rebuild_rollups(db)
+                except RollupRebuildError as e:
+                    raise CommandError(f"{workspace}: {e}; retry during a quiet period")
+                self.stdout.write(f"{workspace}: rebuilt rollups for {counts['items']} menu items")
+        self.stdout.write(self.style.SUCCESS(f"Backfilled order details for {len(workspaces)} workspace(s)"))
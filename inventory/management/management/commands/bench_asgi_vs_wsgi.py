@@ -0,0 +1,120 @@
+import http.cookiejar
+import json
+import re
+import statistics
+import time
+import urllib.parse
+import urllib.request
+from concurrent.futures import ThreadPoolExecutor
+
+from django.core.management.base import BaseCommand, CommandError
+
+DASHBOARD_ENDPOINTS = [
+    "get_inventory_items/",
+    "get_items/",
+    "get_inventory_data/",
+    "get_inventory_stats/",
+    "get_sales_stats/",
+    "get_sales_distribution/",
+    "get_sales_data/",
+]
+
+
+def login(base_url, email, password):
+    """Logs in through the workplace login form and returns the session cookie value."""
+    jar = http.cookiejar.CookieJar()
+    opener = urllib.request.build_opener(urllib.request.HTTPCookieProcessor(jar))
+    login_url = urllib.parse.urljoin(base_url, "workplace/login/")
+
+    page = opener.open(login_url).read().decode()
+    match = re.search(r'name="csrfmiddlewaretoken" value="([^"]+)"', page)
+    if not match:
+        raise CommandError(f"No CSRF token on {login_url}")
+
+    data = urllib.parse.urlencode({
+        "csrfmiddlewaretoken": match.group(1), "email": email, "password": password,
+    }).encode()
+    request = urllib.request.Request(login_url, data=data, headers={"Referer": login_url})
+    opener.open(request).read()
+
+    session = next((cookie.value for cookie in jar if cookie.name == "sessionid"), None)
+    if not session:
+        raise CommandError(f"Login to {base_url} failed")
+    return session
+
+
+def percentile(samples, q):
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(round(q / 100 * (len(ordered) - 1))))]
+
+
+def run_load(base_url, session, requests, concurrency, endpoints):
+    """Fires ``requests`` dashboard reads with ``concurrency`` clients and returns latency figures."""
+    headers = {"Cookie": f"sessionid={session}"}
+    urls = [urllib.parse.urljoin(base_url, endpoints[i % len(endpoints)]) for i in range(requests)]
+
+    def fetch(url):
+        started = time.perf_counter()
+        try:
+            with urllib.request.urlopen(urllib.request.Request(url, headers=headers)) as response:
+                response.read()
+                ok = response.status == 200
+        except Exception:
+            ok = False
+        return time.perf_counter() - started, ok
+
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        results = list(pool.map(fetch, urls))
+    wall = time.perf_counter() - started
+
+    latencies = [seconds * 1000 for seconds, ok in results if ok]
+    summary = {
+        "base_url": base_url,
+        "requests": requests,
+        "errors": sum(1 for _, ok in results if not ok),
+        "wall_seconds": round(wall, 3),
+        "requests_per_second": round(len(latencies) / wall, 1) if wall else None,
+    }
+    if latencies:
+        summary.update({
+            "latency_ms_mean": round(statistics.fmean(latencies), 2),
+            "latency_ms_p50": round(percentile(latencies, 50), 2),
+            "latency_ms_p95": round(percentile(latencies, 95), 2),
+            "latency_ms_p99": round(percentile(latencies, 99), 2),
+        })
+    return summary
+
+
+class Command(BaseCommand):
+    help = (
+        "Compares the dashboard read endpoints served by a WSGI deployment and an ASGI "
+        "deployment (ASYNC_DASHBOARD_VIEWS=1) under the same concurrent load."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--wsgi-url", default="http://127.0.0.1:8000/", help="Base URL of the WSGI server")
+        parser.add_argument("--asgi-url", default="http://127.0.0.1:8001/", help="Base URL of the ASGI server")
+        parser.add_argument("--email", help="Workplace login used on both servers")
+        parser.add_argument("--password")
+        parser.add_argument("--session-cookie", help="Reuse an existing sessionid instead of logging in")
+        parser.add_argument("--requests", type=int, default=2000, help="Requests per server")
+        parser.add_argument("--concurrency", type=int, default=100, help="Concurrent clients")
+        parser.add_argument("--warmup", type=int, default=50, help="Unmeasured requests sent first")
+
+    def handle(self, *args, **options):
+        if not options["session_cookie"] and not (options["email"] and options["password"]):
+            raise CommandError("Pass --email and --password, or --session-cookie")
+
+        report = {"concurrency": options["concurrency"], "endpoints": DASHBOARD_ENDPOINTS}
+        for label in ("wsgi", "asgi"):
+            base_url = options[f"{label}_url"]
+            session = options["session_cookie"] or login(base_url, options["email"], options["password"])
+            if options["warmup"]:
+                run_load(base_url, session, options["warmup"], options["concurrency"], DASHBOARD_ENDPOINTS)
+            report[label] = run_load(base_url, session, options["requests"], options["concurrency"], DASHBOARD_ENDPOINTS)
+
+        wsgi_rps, asgi_rps = report["wsgi"]["requests_per_second"], report["asgi"]["requests_per_second"]
+        if wsgi_rps and asgi_rps:
+            report["asgi_speedup"] = round(asgi_rps / wsgi_rps, 2)
+        self.stdout.write(json.dumps(report, indent=2))
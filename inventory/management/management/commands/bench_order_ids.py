@@ -0,0 +1,100 @@
+import json
+import multiprocessing
+import os
+import statistics
+import time
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+
+from django.core.management.base import BaseCommand
+
+from management.catalog import bump_catalog_version
+from management.jobs import init_django_worker
+from management.mongo import get_client, get_db
+from management.order_ids import OrderIdAllocator
+from management.sales import record_sale
+
+ITEM = {"item_id": "BENCH1", "item_name": "Bench Item", "sku": "BENCH_SKU", "item_price": 1.0}
+
+
+def seed_workspace(db):
+    """Creates a one-item catalog with enough stock that no benchmark sale is rejected."""
+    for name in ("items", "recipe", "inventory", "orders", "counters", "sales_daily", "sales_totals", "sales_by_item"):
+        db[name].drop()
+    db["items"].insert_one(dict(ITEM))
+    db.recipe.insert_one({"sku": ITEM["sku"], "ing_id": "BENCH_ING", "quantity": 1})
+    db.inventory.insert_one({"ing_id": "BENCH_ING", "name": "Bench Ingredient", "quantity": 10**12})
+    bump_catalog_version(db)
+
+
+def run_sales(workspace, block_size, threads, sales):
+    """Runs ``sales`` add_sale calls over ``threads`` threads; returns latencies and the IDs used."""
+    allocator = OrderIdAllocator(block_size)
+    db = get_db(workspace)
+    ticket = [{"item_name": ITEM["item_name"], "quantity": 1}]
+
+    def sale(_):
+        started = time.perf_counter()
+        order_id = allocator.next_order_id(db)
+        record_sale(db, order_id, "bench", "takeout", ticket)
+        return time.perf_counter() - started, order_id
+
+    with ThreadPoolExecutor(max_workers=threads) as pool:
+        results = list(pool.map(sale, range(sales)))
+    return [seconds for seconds, _ in results], [order_id for _, order_id in results], allocator.reservations
+
+
+def percentile(samples, q):
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(round(q / 100 * (len(ordered) - 1))))]
+
+
+class Command(BaseCommand):
+    help = (
+        "Measures add_sale throughput with many concurrent callers using per-sale counter "
+        "updates (block size 1) and block-allocated order IDs, in a scratch workspace."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--workspace", default="bench_order_ids", help="Scratch database, dropped afterwards")
+        parser.add_argument("--processes", type=int, default=4, help="Worker processes, like web server workers")
+        parser.add_argument("--threads", type=int, default=16, help="Concurrent callers per process")
+        parser.add_argument("--sales", type=int, default=2000, help="Sales per process")
+        parser.add_argument("--block-sizes", default="1,50", help="Comma-separated block sizes to compare")
+        parser.add_argument("--keep", action="store_true", help="Keep the scratch database")
+
+    def handle(self, *args, **options):
+        workspace = options["workspace"]
+        context = multiprocessing.get_context("spawn")
+        settings_module = os.environ.get("DJANGO_SETTINGS_MODULE", "inventory.settings")
+        report = {"processes": options["processes"], "threads": options["threads"], "runs": []}
+
+        for block_size in [int(size) for size in options["block_sizes"].split(",")]:
+            seed_workspace(get_db(workspace))
+            with ProcessPoolExecutor(
+                max_workers=options["processes"], mp_context=context,
+                initializer=init_django_worker, initargs=(settings_module,),
+            ) as pool:
+                started = time.perf_counter()
+                futures = [
+                    pool.submit(run_sales, workspace, block_size, options["threads"], options["sales"])
+                    for _ in range(options["processes"])
+                ]
+                results = [future.result() for future in futures]
+                wall = time.perf_counter() - started
+
+            latencies = [seconds * 1000 for result in results for seconds in result[0]]
+            order_ids = [order_id for result in results for order_id in result[1]]
+            report["runs"].append({
+                "block_size": block_size,
+                "sales": len(order_ids),
+                "duplicate_ids": len(order_ids) - len(set(order_ids)),
+                "counter_updates": sum(result[2] for result in results),
+                "sales_per_second": round(len(order_ids) / wall, 1),
+                "latency_ms_p50": round(percentile(latencies, 50), 2),
+                "latency_ms_p99": round(percentile(latencies, 99), 2),
+                "latency_ms_mean": round(statistics.fmean(latencies), 2),
+            })
+
+        if not options["keep"]:
+            get_client().drop_database(workspace)
+        self.stdout.write(json.dumps(report, indent=2))
@@ -0,0 +1,78 @@
+import json
+import random
+import time
+import tracemalloc
+from datetime import datetime, timedelta
+
+from django.core.management.base import BaseCommand
+
+from management.mlload import LOAD_BATCH_SIZE, frame_from_orders, load_orders
+from management.mongo import get_db
+
+
+def synthetic_orders(rows, items=50, seed=0):
+    """Yields order documents in the same mix of date formats found in production."""
+    rng = random.Random(seed)
+    start = datetime(2023, 1, 1)
+    for _ in range(rows):
+        when = start + timedelta(minutes=rng.randrange(2 * 365 * 24 * 60))
+        doc = {"item_id": f"IT{rng.randrange(items):03d}", "quantity": rng.randint(1, 4)}
+        kind = rng.random()
+        if kind < 0.5:
+            doc["ts"] = when
+        elif kind < 0.8:
+            doc["date"] = when.strftime("%d/%m/%y %H:%M")
+        else:
+            doc["date"] = when.isoformat() + "+00:00"
+        yield doc
+
+
+class Command(BaseCommand):
+    help = (
+        "Measures load time and peak Python memory of the forecasting order loader, "
+        "either on synthetic documents or on a real workspace."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--rows", type=int, default=5_000_000, help="Synthetic order lines to load")
+        parser.add_argument("--batch-size", type=int, default=LOAD_BATCH_SIZE)
+        parser.add_argument("--workspace", help="Load this workspace's orders from MongoDB instead of synthetic data")
+
+    def handle(self, *args, **options):
+        batch_size = options["batch_size"]
+
+        if options["workspace"]:
+            source = options["workspace"]
+            load = lambda: load_orders(get_db(source), batch_size=batch_size)
+            generation_seconds = 0.0
+        else:
+            source = f"synthetic:{options['rows']}"
+            # Time the document generator alone so it can be subtracted from the load time
+            started = time.perf_counter()
+            for _ in synthetic_orders(options["rows"]):
+                pass
+            generation_seconds = time.perf_counter() - started
+            load = lambda: frame_from_orders(synthetic_orders(options["rows"]), batch_size)
+
+        # Timing and memory are measured in separate runs: tracemalloc slows allocation-heavy code down
+        started = time.perf_counter()
+        frame = load()
+        elapsed = time.perf_counter() - started
+        del frame
+
+        tracemalloc.start()
+        frame = load()
+        _, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+
+        load_seconds = max(elapsed - generation_seconds, 0.0)
+        self.stdout.write(json.dumps({
+            "source": source,
+            "batch_size": batch_size,
+            "rows_loaded": len(frame),
+            "load_seconds": round(load_seconds, 3),
+            "generation_seconds": round(generation_seconds, 3),
+            "rows_per_second": round(len(frame) / load_seconds) if load_seconds else None,
+            "peak_memory_mb": round(peak / 2**20, 1),
+            "frame_memory_mb": round(frame.memory_usage(deep=True).sum() / 2**20, 1),
+        }, indent=2))
@@ -0,0 +1,164 @@
+import json
+import platform
+import random
+import subprocess
+from datetime import datetime
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.test.utils import override_settings
+from django.urls import reverse
+
+from management.benchmark import SCALES, create_bench_login, drop_workspace, run_scenario, seed_workspace
+from management.jobs import JOBS_COLLECTION, RESTOCKING_JOB, run_restocking_job
+from management.mongo import get_client, get_db
+
+READ_ENDPOINTS = [
+    "get_inventory_items",
+    "get_items",
+    "get_inventory_data",
+    "get_inventory_stats",
+    "get_sales_stats",
+    "get_sales_distribution",
+    "get_sales_data",
+    "dashboard_data",
+]
+
+
+class JobOutcome:
+    """Stands in for a response when a scenario calls the forecast job directly."""
+
+    def __init__(self, status_code):
+        self.status_code = status_code
+
+
+def git_revision():
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], cwd=settings.BASE_DIR,
+            capture_output=True, text=True, check=True,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+class Command(BaseCommand):
+    help = (
+        "Seeds a synthetic workspace at a given scale and drives add_sale, add_inventory, every "
+        "dashboard read endpoint and the restocking forecast through the Django test client. "
+        "Prints latency percentiles, throughput and MongoDB operations per request as JSON."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--scale", choices=SCALES, default="small")
+        parser.add_argument("--orders", type=int, help="Override the scale's order line count")
+        parser.add_argument("--items", type=int, help="Override the scale's menu item count")
+        parser.add_argument("--workspace", help="Scratch database name (default: bench_<scale>)")
+        parser.add_argument("--reuse", action="store_true", help="Use the existing scratch workspace without reseeding")
+        parser.add_argument("--requests", type=int, default=200, help="Measured requests per scenario")
+        parser.add_argument("--forecast-runs", type=int, default=3, help="Measured runs of the restocking job")
+        parser.add_argument("--concurrency", type=int, default=1, help="Concurrent test clients")
+        parser.add_argument("--scenarios", help="Comma-separated subset of scenarios to run")
+        parser.add_argument("--response-cache", action="store_true",
+                            help="Keep the response cache on (off by default so reads hit MongoDB)")
+        parser.add_argument("--seed", type=int, default=0)
+        parser.add_argument("--output", help="Also write the JSON report to this file")
+        parser.add_argument("--drop", action="store_true", help="Drop the scratch workspace and its login afterwards")
+        parser.add_argument(
+            "--create-login", action="store_true",
+            help="Add a workplace login <workspace>@bench.local, to point other benchmarks at a running server",
+        )
+        parser.add_argument("--login-password", help="Password for --create-login (default: a random one, printed)")
+
+    def handle(self, *args, **options):
+        scale = dict(SCALES[options["scale"]])
+        for key in ("orders", "items"):
+            if options[key] is not None:
+                scale[key] = options[key]
+        workspace = options["workspace"] or f"bench_{options['scale']}"
+
+        report = {
+            "revision": git_revision(),
+            "started_at": datetime.utcnow().isoformat() + "Z",
+            "python": platform.python_version(),
+            "response_cache": options["response_cache"],
+        }
+        if options["reuse"]:
+            if get_db(workspace)["items"].estimated_document_count() == 0:
+                raise CommandError(f"Workspace {workspace} has not been seeded")
+            report["workspace"] = {"workspace": workspace, "reused": True}
+        else:
+            self.stderr.write(f"Seeding {workspace} with {scale['orders']} order lines...")
+            report["workspace"] = seed_workspace(get_client(), workspace, scale, seed=options["seed"])
+        if options["create_login"]:
+            email, password = create_bench_login(get_client(), workspace, options["login_password"])
+            # Kept out of the JSON report, which is meant to be stored and shared
+            self.stderr.write(f"Workplace login: {email} / {password}")
+        sample_items = [doc["item_name"] for doc in get_db(workspace)["items"].find({}, {"item_name": 1}).limit(20)]
+
+        overrides = {
+            # Cookie sessions keep the suite independent of the SQL session table
+            "SESSION_ENGINE": "django.contrib.sessions.backends.signed_cookies",
+            "ALLOWED_HOSTS": [*settings.ALLOWED_HOSTS, "testserver"],
+        }
+        if not options["response_cache"]:
+            overrides["CACHES"] = {
+                **settings.CACHES,
+                "responses": {"BACKEND": "django.core.cache.backends.dummy.DummyCache"},
+            }
+
+        rng = random.Random(options["seed"])
+        scenarios = {}
+        for name in READ_ENDPOINTS:
+            scenarios[name] = lambda client, n, url=reverse(name): client.get(url)
+        scenarios["add_sale"] = lambda client, n: client.post(
+            reverse("add_sale"),
+            data=json.dumps({
+                "cust_name": "bench", "in_or_out": "takeout",
+                "items": [{"item_name": rng.choice(sample_items), "quantity": 1} for _ in range(rng.randint(1, 3))],
+            }),
+            content_type="application/json",
+        )
+        scenarios["add_inventory"] = lambda client, n: client.post(
+            reverse("add_inventory"), {"item": f"Ingredient {n % 100}", "quantity": 5, "item_type": "bench"}
+        )
+
+        def forecast_job(client=None, n=0):
+            # Run the job in-process, holding its lease as request_forecast would
+            jobs = get_db(workspace)[JOBS_COLLECTION]
+            jobs.update_one({"_id": RESTOCKING_JOB}, {"$set": {"status": "running"}}, upsert=True)
+            run_restocking_job(workspace)
+            job = jobs.find_one({"_id": RESTOCKING_JOB}, {"status": 1})
+            return JobOutcome(200 if job and job.get("status") == "done" else 500)
+
+        scenarios["restocking_job"] = forecast_job
+        scenarios["get_inventory_predictions"] = lambda client, n: client.get(reverse("get_inventory_predictions"))
+
+        selected = options["scenarios"].split(",") if options["scenarios"] else list(scenarios)
+        unknown = set(selected) - set(scenarios)
+        if unknown:
+            raise CommandError(f"Unknown scenarios: {', '.join(sorted(unknown))}")
+
+        results = {}
+        with override_settings(**overrides):
+            for name in selected:
+                self.stderr.write(f"Running {name}...")
+                if name == "restocking_job":
+                    results[name] = run_scenario(workspace, scenarios[name], options["forecast_runs"], warmup=1)
+                    continue
+                if name == "get_inventory_predictions":
+                    # Served from the stored job result, which has to exist to measure the read path
+                    forecast_job()
+                results[name] = run_scenario(
+                    workspace, scenarios[name], options["requests"], concurrency=options["concurrency"]
+                )
+        report["scenarios"] = results
+
+        if options["drop"]:
+            drop_workspace(get_client(), workspace)
+
+        output = json.dumps(report, indent=2)
+        if options["output"]:
+            with open(options["output"], "w") as f:
+                f.write(output + "\n")
+        self.stdout.write(output)
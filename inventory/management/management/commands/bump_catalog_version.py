@@ -0,0 +1,15 @@
+from django.core.management.base import BaseCommand
+
+from management.catalog import bump_catalog_version
+from management.mongo import get_db
+
+
+class Command(BaseCommand):
+    help = "Invalidates cached items and recipes after editing a workspace's catalog outside the app."
+
+    def add_arguments(self, parser):
+        parser.add_argument("workspace", help="Workspace database name")
+
+    def handle(self, *args, **options):
+        version = bump_catalog_version(get_db(options["workspace"]))
+        self.stdout.write(self.style.SUCCESS(f"Catalog version for {options['workspace']} is now {version}"))
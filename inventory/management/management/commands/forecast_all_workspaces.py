@@ -0,0 +1,77 @@
+import json
+import multiprocessing
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+from django.core.management.base import BaseCommand
+
+from management.jobs import init_django_worker
+from management.models import WorkplaceModel
+
+
+def forecast_shard(workspaces):
+    """Pool entry point: forecasts one shard of workspaces with a single stacked prediction."""
+    from management.mlload import forecast_workspaces
+    from management.mongo import get_client
+
+    return forecast_workspaces(get_client(), workspaces)
+
+
+def shard(workspaces, count):
+    """Splits workspaces into ``count`` round-robin shards, dropping empty ones."""
+    shards = [workspaces[index::count] for index in range(count)]
+    return [workspace_shard for workspace_shard in shards if workspace_shard]
+
+
+class Command(BaseCommand):
+    help = (
+        "Nightly batch: forecasts every registered workspace, sharding them across worker processes. "
+        "Each worker stacks the feature rows of its shard into large model.predict batches."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("workspaces", nargs="*", help="Workspace database names (default: all registered workplaces)")
+        parser.add_argument("--workers", type=int, default=os.cpu_count() or 1, help="Worker processes")
+        parser.add_argument(
+            "--shard-size", type=int, default=50,
+            help="Workspaces per stacked prediction batch (smaller shards spread better across workers)",
+        )
+
+    def handle(self, *args, **options):
+        workspaces = options["workspaces"] or WorkplaceModel().list_workplace_names()
+        if not workspaces:
+            self.stdout.write("No workspaces to forecast")
+            return
+
+        shard_count = max(options["workers"], -(-len(workspaces) // options["shard_size"]))
+        shards = shard(workspaces, shard_count)
+
+        started = time.perf_counter()
+        results, failures = [], []
+        with ProcessPoolExecutor(
+            max_workers=options["workers"],
+            mp_context=multiprocessing.get_context("spawn"),
+            initializer=init_django_worker,
+            initargs=(os.environ.get("DJANGO_SETTINGS_MODULE", "inventory.settings"),),
+        ) as executor:
+            futures = {executor.submit(forecast_shard, workspace_shard): workspace_shard for workspace_shard in shards}
+            for future in as_completed(futures):
+                try:
+                    results.extend(future.result())
+                except Exception as e:
+                    failures.append({"workspaces": futures[future], "error": str(e)})
+        elapsed = time.perf_counter() - started
+
+        for timing in sorted(results, key=lambda entry: entry["workspace"]):
+            self.stdout.write(json.dumps({
+                key: round(value, 4) if isinstance(value, float) else value for key, value in timing.items()
+            }))
+        for failure in failures:
+            self.stderr.write(f"Shard failed: {failure}")
+
+        forecast = [timing for timing in results if "error" not in timing]
+        self.stdout.write(self.style.SUCCESS(
+            f"Forecast {len(forecast)} of {len(workspaces)} workspace(s) in {elapsed:.2f}s "
+            f"({len(forecast) / elapsed:.2f} workspaces/sec) using {options['workers']} worker(s)"
+        ))
@@ -0,0 +1,45 @@
+import json
+
+from django.core.management.base import BaseCommand, CommandError
+
+from management.catalog_import import KINDS, WRITE_BATCH_SIZE, ingest
+from management.mongo import get_db
+from management.order_import import FORMATS, ImportFileError, detect_format, read_rows, text_stream
+
+
+class Command(BaseCommand):
+    help = (
+        "Applies inventory receipts, menu items or recipe (BOM) rows from a CSV or JSON Lines file "
+        "in batched unordered bulk writes, reporting rows that could not be applied."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("workspace", help="Workspace database name")
+        parser.add_argument("kind", choices=KINDS)
+        parser.add_argument("path", help="CSV or JSONL file")
+        parser.add_argument("--format", choices=FORMATS, help="Input format (default: from the file extension)")
+        parser.add_argument("--batch-size", type=int, default=WRITE_BATCH_SIZE)
+
+    def handle(self, *args, **options):
+        fmt = options["format"] or detect_format(options["path"])
+        try:
+            binary = open(options["path"], "rb")
+        except OSError as e:
+            raise CommandError(str(e))
+
+        with binary:
+            try:
+                report = ingest(
+                    get_db(options["workspace"]),
+                    options["kind"],
+                    read_rows(text_stream(binary), fmt),
+                    batch_size=options["batch_size"],
+                )
+            except ImportFileError as e:
+                # Rows are all validated before the first write, so nothing was applied
+                raise CommandError(f"{options['path']}: {e}; nothing was applied")
+        self.stdout.write(json.dumps(report, indent=2))
+        applied = report["rows_read"] - report["rows_rejected"]
+        self.stdout.write(self.style.SUCCESS(
+            f"Applied {applied} of {report['rows_read']} {options['kind']} rows in {report['operations']} upserts"
+        ))
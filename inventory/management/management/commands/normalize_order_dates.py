@@ -0,0 +1,64 @@
+from django.core.management.base import BaseCommand
+from pymongo import ASCENDING, UpdateOne
+
+from management.models import WorkplaceModel
+from management.order_dates import LEGACY_PATTERN, order_timestamp
+from management.mongo import get_db
+
+
+class Command(BaseCommand):
+    help = (
+        "Rewrites every order's date/created_at into an indexed BSON 'ts' datetime. "
+        "Only orders without 'ts' are touched, so an interrupted run can simply be restarted. "
+        "Orders whose date cannot be parsed get ts=null and are reported. "
+        "--reparse-legacy recomputes ts for every order with a legacy dd/mm/yy date, repairing values "
+        "written when those dates were read month-first; rebuild the sales rollups afterwards."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("workspaces", nargs="*", help="Workspace database names (default: all registered workplaces)")
+        parser.add_argument("--batch-size", type=int, default=1000)
+        parser.add_argument(
+            "--reparse-legacy", action="store_true",
+            help="Recompute ts for orders with a legacy date even if they already have one",
+        )
+
+    def handle(self, *args, **options):
+        workspaces = options["workspaces"] or WorkplaceModel().list_workplace_names()
+        batch_size = options["batch_size"]
+        if options["reparse_legacy"]:
+            selector = {"date": {"$regex": LEGACY_PATTERN}}
+        else:
+            selector = {"ts": {"$exists": False}}
+
+        for workspace in workspaces:
+            db = get_db(workspace)
+            db.orders.create_index([("ts", ASCENDING)])
+
+            migrated = unparseable = 0
+            last_id = None
+            while True:
+                query = dict(selector)
+                if last_id is not None:
+                    query["_id"] = {"$gt": last_id}
+                batch = list(
+                    db.orders.find(query, {"date": 1, "created_at": 1})
+                    .sort("_id", ASCENDING)
+                    .limit(batch_size)
+                )
+                if not batch:
+                    break
+
+                operations = []
+                for order in batch:
+                    ts = order_timestamp(order)
+                    if ts is None:
+                        unparseable += 1
+                    operations.append(UpdateOne({"_id": order["_id"], **selector}, {"$set": {"ts": ts}}))
+                db.orders.bulk_write(operations, ordered=False)
+
+                migrated += len(batch)
+                last_id = batch[-1]["_id"]
+
+            self.stdout.write(f"{workspace}: {migrated} orders migrated, {unparseable} with unparseable dates")
+        self.stdout.write(self.style.SUCCESS(f"Normalized order dates for {len(workspaces)} workspace(s)"))
@@ -0,0 +1,19 @@
+from django.core.management.base import BaseCommand
+
+from management.mlload import rebuild_feature_state
+from management.models import WorkplaceModel
+from management.mongo import get_db
+
+
+class Command(BaseCommand):
+    help = "Recomputes the per-item forecast feature state and watermark from the full order history."
+
+    def add_arguments(self, parser):
+        parser.add_argument("workspaces", nargs="*", help="Workspace database names (default: all registered workplaces)")
+
+    def handle(self, *args, **options):
+        workspaces = options["workspaces"] or WorkplaceModel().list_workplace_names()
+        for workspace in workspaces:
+            states = rebuild_feature_state(get_db(workspace))
+            self.stdout.write(f"{workspace}: {len(states)} items")
+        self.stdout.write(self.style.SUCCESS(f"Rebuilt forecast features for {len(workspaces)} workspace(s)"))
@@ -0,0 +1,40 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from management.models import WorkplaceModel
+from management.rollups import RollupRebuildError, apply_pending_rollups, rebuild_rollups
+from management.mongo import get_db
+
+
+class Command(BaseCommand):
+    help = (
+        "Backfills the sales_daily and sales_totals rollups from existing orders. "
+        "The rebuild is redone if sales arrive while it runs, but a sale landing just as the new "
+        "rollups replace the live ones is lost, so run it during a quiet period."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("workspaces", nargs="*", help="Workspace database names (default: all registered workplaces)")
+        parser.add_argument("--batch-size", type=int, default=5000)
+        parser.add_argument(
+            "--pending", action="store_true",
+            help="Only apply the rollups that failed when sales were recorded, instead of a full rebuild",
+        )
+
+    def handle(self, *args, **options):
+        workspaces = options["workspaces"] or WorkplaceModel().list_workplace_names()
+        if options["pending"]:
+            for workspace in workspaces:
+                repaired = apply_pending_rollups(get_db(workspace))
+                self.stdout.write(f"{workspace}: {repaired} order lines repaired")
+            self.stdout.write(self.style.SUCCESS(f"Applied pending rollups for {len(workspaces)} workspace(s)"))
+            return
+
+        for workspace in workspaces:
+            try:
+                counts = rebuild_rollups(get_db(workspace), batch_size=options["batch_size"])
+            except RollupRebuildError as e:
+                raise CommandError(f"{workspace}: {e}; retry during a quiet period")
+            self.stdout.write(
+                f"{workspace}: {counts['daily']} daily rollups, {counts['order_types']} order types"
+            )
+        self.stdout.write(self.style.SUCCESS(f"Rebuilt sales rollups for {len(workspaces)} workspace(s)"))
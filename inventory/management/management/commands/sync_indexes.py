@@ -0,0 +1,48 @@
+from django.core.management.base import BaseCommand, CommandError
+from pymongo.errors import PyMongoError
+
+from management.indexes import index_drift, sync_indexes
+from management.models import WorkplaceModel
+from management.mongo import get_db
+
+
+class Command(BaseCommand):
+    help = (
+        "Reconciles every workspace database with the index spec in management/indexes.py and reports drift. "
+        "Indexes whose definition conflicts with the spec are dropped and rebuilt; a workspace that fails "
+        "is reported and the run continues with the next one."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("workspaces", nargs="*", help="Workspace database names (default: all registered workplaces)")
+        parser.add_argument("--check", action="store_true", help="Only report drift, do not create indexes")
+
+    def handle(self, *args, **options):
+        workspaces = options["workspaces"] or WorkplaceModel().list_workplace_names()
+        drifted = 0
+        failed = []
+
+        for workspace in workspaces:
+            db = get_db(workspace)
+            try:
+                drift = index_drift(db)
+                if drift:
+                    drifted += 1
+                for collection, report in drift.items():
+                    for kind in ("missing", "mismatched", "extra"):
+                        if report[kind]:
+                            self.stdout.write(f"{workspace}.{collection}: {kind} {', '.join(report[kind])}")
+
+                if not options["check"]:
+                    for collection, names in sync_indexes(db).items():
+                        self.stdout.write(f"{workspace}.{collection}: replaced conflicting {', '.join(names)}")
+            except PyMongoError as e:
+                failed.append(workspace)
+                self.stderr.write(f"{workspace}: {e}")
+
+        if failed:
+            raise CommandError(f"Could not sync indexes for {len(failed)} workspace(s): {', '.join(failed)}")
+        action = "Checked" if options["check"] else "Synced"
+        self.stdout.write(self.style.SUCCESS(
+            f"{action} indexes for {len(workspaces)} workspace(s), {drifted} with drift"
+        ))
@@ -1,90 +1,395 @@
-import pandas as pd
-import numpy as np
-from joblib import load
+"""Daily demand forecasting service.
+
+The ridge model and label encoder are loaded once per process and reloaded
+automatically when the pickle files change on disk. ``run_forecast`` takes a
+workspace database, brings its persisted per-item feature state up to date
+with the orders placed since the last run, predicts next-day demand per item
+and stores the result in that workspace's ``prediction`` collection.
+
+Can still be run as a script: ``python mlload.py <workspace>``.
+"""
+import os
 import random
-from datetime import timedelta
-from pymongo import MongoClient
-from datetime import datetime
+import threading
+import time
+from datetime import datetime, timedelta
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+from pymongo import DeleteMany, InsertOne, ReplaceOne
+from pymongo.errors import BulkWriteError
+
+MODEL_DIR = Path(__file__).resolve().parent
+MODEL_PATH = MODEL_DIR / "ridge_model_daily.pkl"
+ENCODER_PATH = MODEL_DIR / "label_encoder_daily.pkl"
+
+FEATURES = ['day_of_week', 'item_encoded', 'lag1', 'rolling_mean_3', 'rolling_std_3']
+
+
+class ForecastModel:
+    """Holds the ridge model and label encoder, reloading them when their files change."""
+
+    def __init__(self, model_path=MODEL_PATH, encoder_path=ENCODER_PATH):
+        self.model_path = Path(model_path)
+        self.encoder_path = Path(encoder_path)
+        self._lock = threading.Lock()
+        self._stamp = None
+        self._model = None
+        self._encoder = None
+
+    def _file_stamp(self):
+        model_stat = os.stat(self.model_path)
+        encoder_stat = os.stat(self.encoder_path)
+        return (model_stat.st_mtime_ns, model_stat.st_size, encoder_stat.st_mtime_ns, encoder_stat.st_size)
+
+    def get(self):
+        """Returns ``(model, label_encoder)``, loading them if the pickles are new or changed."""
+        stamp = self._file_stamp()
+        with self._lock:
+            if stamp != self._stamp:
+                from joblib import load
+
+                self._model = load(self.model_path)
+                self._encoder = load(self.encoder_path)
+                self._stamp = stamp
+            return self._model, self._encoder
+
+
+forecast_model = ForecastModel()
+
+
+# -------------------- Order Loading -------------------- #
+
+LEGACY_DATE_FORMAT = '%d/%m/%y %H:%M'
+LOAD_BATCH_SIZE = 50000
+ORDER_COLUMNS = {"_id": 0, "ts": 1, "date": 1, "item_id": 1, "quantity": 1}
+
+
+def parse_order_dates(dates):
+    """Parses a Series of date strings in two vectorized passes; unparseable values become NaT."""
+    # Old date format (e.g., 24/02/17 13:10), stored in UTC
+    parsed = pd.to_datetime(dates, format=LEGACY_DATE_FORMAT, errors='coerce').dt.tz_localize('UTC')
+
+    # ISO 8601 (e.g., 2025-05-02T14:26:39.889293+00:00) for whatever is still missing
+    missing = parsed.isna() & dates.notna()
+    if missing.any():
+        parsed[missing] = pd.to_datetime(dates[missing], format='ISO8601', utc=True, errors='coerce')
+    return parsed
+
+
+def _column_batches(documents, batch_size):
+    """Yields the projected order fields in typed column chunks of ``batch_size`` rows."""
+    ts, dates, item_ids, quantities = [], [], [], []
+
+    def flush():
+        chunk = (
+            pd.to_datetime(pd.Series(ts, dtype=object), errors='coerce'),
+            pd.Series(dates, dtype=object),
+            pd.Series(item_ids, dtype=object),
+            pd.to_numeric(pd.Series(quantities, dtype=object), errors='coerce'),
+        )
+        ts.clear()
+        dates.clear()
+        item_ids.clear()
+        quantities.clear()
+        return chunk
+
+    for order in documents:
+        ts.append(order.get("ts"))
+        date = order.get("date")
+        dates.append(date if isinstance(date, str) else None)
+        item_ids.append(order.get("item_id"))
+        quantities.append(order.get("quantity"))
+        if len(ts) >= batch_size:
+            yield flush()
+    if ts:
+        yield flush()
+
+
+def frame_from_orders(documents, batch_size=LOAD_BATCH_SIZE):
+    """Builds a (timestamp, item_id, quantity) frame from an iterable of order documents.
+
+    Documents are consumed in batches so only ``batch_size`` dicts' worth of
+    Python objects is alive at a time. ``ts`` is used when present, otherwise
+    the ``date`` string is parsed. Rows without a usable date are dropped.
+    """
+    chunks = list(_column_batches(documents, batch_size))
+    if not chunks:
+        return pd.DataFrame({
+            'timestamp': pd.Series(dtype='datetime64[ns, UTC]'),
+            'item_id': pd.Series(dtype=object),
+            'quantity': pd.Series(dtype=float),
+        })
+
+    ts, dates, item_ids, quantities = (
+        pd.concat(column, ignore_index=True) for column in zip(*chunks)
+    )
+    del chunks
+
+    timestamp = ts.dt.tz_localize('UTC')
+    missing = timestamp.isna()
+    if missing.any():
+        timestamp[missing] = parse_order_dates(dates[missing])
+
+    orders = pd.DataFrame({'timestamp': timestamp, 'item_id': item_ids, 'quantity': quantities})
+
+    # Drop rows with invalid dates (NaT)
+    return orders.dropna(subset=['timestamp']).reset_index(drop=True)
 
-# Connect to MongoDB
-client = MongoClient("mongodb://localhost:27017/")  # Update with your actual MongoDB connection string if needed
-db = client["bhavi"]
 
-# Load model and encoder
-model = load(r"C:\Volume_d\sem6BCA\MajorP2\projest\Major2\inventory\management\ridge_model_daily.pkl")
-le = load(r"C:\Volume_d\sem6BCA\MajorP2\projest\Major2\inventory\management\label_encoder_daily.pkl")
+def load_orders(db, until=None, batch_size=LOAD_BATCH_SIZE):
+    """Returns a (timestamp, item_id, quantity) frame of every dated order line in ``db``.
 
-# Function to handle different date formats
-def parse_date(date):
+    ``until`` bounds the migrated orders by their indexed ``ts``; orders not
+    yet migrated by normalize_order_dates have no ``ts`` and are always
+    included, with their ``date`` string parsed.
+    """
+    ts_range = {"$gte": datetime(1970, 1, 1)}
+    if until is not None:
+        ts_range["$lte"] = until
+
+    cursor = db["orders"].find(
+        {"$or": [{"ts": ts_range}, {"ts": {"$exists": False}}]},
+        ORDER_COLUMNS,
+        batch_size=batch_size,
+    )
+    return frame_from_orders(cursor, batch_size)
+
+
+# -------------------- Feature Store -------------------- #
+# Per item, the store keeps the order-line counts of the last HISTORY_DAYS days
+# that had sales and the ``ts`` up to which its orders have been folded in,
+# plus a workspace watermark: a ``ts`` every item has been folded up to. Each
+# run only reads orders newer than the watermark. Item states are stored
+# before the watermark moves, and orders an item state already covers are
+# skipped, so a run that dies in between is simply redone by the next one.
+
+FEATURES_COLLECTION = "forecast_features"
+WATERMARK_ID = "forecast_watermark"
+HISTORY_DAYS = 4  # the latest day plus the three days its lag/rolling features look back on
+SAFETY_LAG = timedelta(seconds=5)  # leave room for sales whose ts is still being written
+
+
+def daily_counts(orders):
+    """Counts order lines per (item_id, date), sorted by item then date."""
+    orders = orders.assign(date=orders['timestamp'].dt.strftime('%Y-%m-%d'))
+    daily_df = orders.groupby(['item_id', 'date']).size().reset_index(name='quantity')
+    return daily_df.sort_values(by=['item_id', 'date'])
+
+
+def states_from_daily(daily_df):
+    """Builds feature-store documents holding each item's last HISTORY_DAYS days."""
+    recent = daily_df.groupby('item_id').tail(HISTORY_DAYS)
+    states = {}
+    for item_id, date, quantity in recent.itertuples(index=False):
+        item_id = _plain(item_id)
+        states.setdefault(item_id, {"_id": item_id, "days": []})["days"].append(
+            {"date": date, "quantity": int(quantity)}
+        )
+    return states
+
+
+def fold_orders(states, counts):
+    """Adds per-(item_id, date) counts of new order lines into the item states in place."""
+    for (item_id, date), quantity in sorted(counts.items(), key=lambda entry: entry[0][1]):
+        days = states.setdefault(item_id, {"_id": item_id, "days": []})["days"]
+        if days and days[-1]["date"] == date:
+            days[-1]["quantity"] += quantity
+        else:
+            days.append({"date": date, "quantity": quantity})
+        del days[:-HISTORY_DAYS]
+    return states
+
+
+def rebuild_feature_state(db, cutoff=None):
+    """Recomputes every item's feature state from the full order history."""
+    cutoff = cutoff or datetime.utcnow() - SAFETY_LAG
+    states = states_from_daily(daily_counts(load_orders(db, until=cutoff)))
+    for state in states.values():
+        state["ts"] = cutoff
+
+    db[FEATURES_COLLECTION].bulk_write(
+        [DeleteMany({})] + [InsertOne(state) for state in states.values()]
+    )
+    db["meta"].update_one({"_id": WATERMARK_ID}, {"$set": {"ts": cutoff}}, upsert=True)
+    return states
+
+
+def update_feature_state(db, cutoff=None):
+    """Folds orders newer than the watermark into the feature state and returns all item states.
+
+    Falls back to a full rebuild when the workspace has no watermark yet.
+    """
+    watermark = db["meta"].find_one({"_id": WATERMARK_ID})
+    if not watermark:
+        return rebuild_feature_state(db, cutoff)
+
+    cutoff = cutoff or datetime.utcnow() - SAFETY_LAG
+    states = {state["_id"]: state for state in db[FEATURES_COLLECTION].find()}
+    if cutoff <= watermark["ts"]:
+        return states
+
+    counts = {}
+    new_orders = db["orders"].find(
+        {"ts": {"$gt": watermark["ts"], "$lte": cutoff}}, {"_id": 0, "ts": 1, "item_id": 1}
+    )
+    for order in new_orders:
+        item_id = order.get("item_id")
+        folded_until = states.get(item_id, {}).get("ts")
+        if folded_until and order["ts"] <= folded_until:
+            continue  # stored by an earlier run that did not get to move the watermark
+        key = (item_id, order["ts"].strftime('%Y-%m-%d'))
+        counts[key] = counts.get(key, 0) + 1
+
+    if counts:
+        touched = {item_id for item_id, _ in counts}
+        fold_orders(states, counts)
+        for item_id in touched:
+            states[item_id]["ts"] = cutoff
+        store_item_states(db, [states[item_id] for item_id in touched], cutoff)
+
+    # Only once the states are stored; a concurrent run may already have moved it further
+    db["meta"].update_one({"_id": WATERMARK_ID}, {"$max": {"ts": cutoff}})
+    return states
+
+
+def store_item_states(db, states, cutoff):
+    """Writes item states folded up to ``cutoff``, never over a state folded further."""
     try:
-        # Try parsing the old date format (e.g., 24/02/17 13:10)
-        return pd.to_datetime(date, format='%d/%m/%y %H:%M', errors='coerce')
-    except ValueError:
-        try:
-            # Try parsing the new date format (e.g., 2025-05-02T14:26:39.889293+00:00)
-            return pd.to_datetime(date, errors='coerce')
-        except ValueError:
-            # If both fail, return NaT (Not a Time)
-            return pd.NaT
+        db[FEATURES_COLLECTION].bulk_write([
+            ReplaceOne({"_id": state["_id"], "ts": {"$not": {"$gte": cutoff}}}, state, upsert=True)
+            for state in states
+        ], ordered=False)
+    except BulkWriteError as e:
+        # A duplicate key means a concurrent run stored a newer state for that item
+        if any(error["code"] != 11000 for error in e.details["writeErrors"]):
+            raise
+
+
+def build_features(states):
+    """Builds the model input row of every item with enough history."""
+    rows = []
+    for state in states.values():
+        days = state["days"]
+        if len(days) < HISTORY_DAYS:
+            continue  # not enough history
+
+        quantities = [day["quantity"] for day in days]
+        window = quantities[-HISTORY_DAYS:-1]
+        latest = datetime.strptime(days[-1]["date"], '%Y-%m-%d')
+        rows.append({
+            "item_id": state["_id"],
+            # Set next day info
+            "day_of_week": (latest.weekday() + 1) % 7,
+            "lag1": quantities[-2],
+            "rolling_mean_3": float(np.mean(window)),
+            "rolling_std_3": float(np.std(window, ddof=1)),
+        })
+    return pd.DataFrame(rows, columns=['item_id', 'day_of_week', 'lag1', 'rolling_mean_3', 'rolling_std_3'])
 
-# Fetch orders and items from MongoDB
-orders_cursor = db["orders"].find()
-items_cursor = db["items"].find()
 
-orders = pd.DataFrame(list(orders_cursor))
-items = pd.DataFrame(list(items_cursor))
+def predict(latest_data, model_store=forecast_model):
+    """Predicts next-day quantities for the feature rows of items known to the encoder.
 
-# Parse the 'date' field according to the format
-orders['timestamp'] = orders['date'].apply(parse_date)
+    Returns the input rows that could be scored with an added
+    ``predicted_quantity`` column. Rows of any number of workspaces can be
+    stacked into one frame so the model is called once for all of them.
+    """
+    model, le = model_store.get()
 
-# Drop rows with invalid dates (NaT)
-orders = orders.dropna(subset=['timestamp'])
+    latest_data = latest_data[latest_data['item_id'].isin(le.classes_)].copy()
+    if latest_data.empty:
+        return latest_data.assign(predicted_quantity=pd.Series(dtype=int))
+    latest_data['item_encoded'] = le.transform(latest_data['item_id'])
 
-# Extract date and day_of_week from valid timestamps
-orders['date'] = orders['timestamp'].dt.date
-orders['day_of_week'] = orders['timestamp'].dt.dayofweek
+    # Predict
+    predictions = model.predict(latest_data[FEATURES])
 
-# Merge with items data
-orders = orders.merge(items, on='item_id', how='left')
+    # Add noise and create final predictions
+    latest_data['predicted_quantity'] = [
+        max(0, round(pred - random.randint(1, 8))) for pred in predictions
+    ]
+    return latest_data
 
-# Daily aggregation
-daily_df = orders.groupby(['date', 'day_of_week', 'item_id']).size().reset_index(name='quantity')
 
-# Sort and add time-series features
-daily_df = daily_df.sort_values(by=['item_id', 'date'])
-daily_df['lag1'] = daily_df.groupby('item_id')['quantity'].shift(1)
-daily_df['rolling_mean_3'] = daily_df.groupby('item_id')['quantity'].shift(1).rolling(window=3).mean()
-daily_df['rolling_std_3'] = daily_df.groupby('item_id')['quantity'].shift(1).rolling(window=3).std()
+def prediction_records(scored):
+    """Converts scored feature rows into ``prediction`` documents."""
+    return [
+        {"item_id": _plain(item_id), "predicted_quantity": int(quantity)}
+        for item_id, quantity in zip(scored['item_id'], scored['predicted_quantity'])
+    ]
 
-# Drop rows without enough history
-daily_df.dropna(inplace=True)
 
-# Find latest valid date per item
-latest_valid_dates = daily_df.groupby('item_id')['date'].max().reset_index()
-latest_data = daily_df.merge(latest_valid_dates, on=['item_id', 'date'], how='inner')
+def _plain(value):
+    """Converts numpy scalars to plain Python values so they can be stored in MongoDB."""
+    return value.item() if isinstance(value, np.generic) else value
+
+
+def store_predictions(db, predictions):
+    """Replaces the workspace's ``prediction`` collection with ``predictions`` in one bulk write."""
+    db["prediction"].bulk_write(
+        [DeleteMany({})] + [InsertOne(dict(pred)) for pred in predictions]
+    )
+
+
+def run_forecast(db, model_store=forecast_model):
+    """Predicts next-day demand for every item in ``db`` and stores the predictions."""
+    predictions = prediction_records(predict(build_features(update_feature_state(db)), model_store))
+    store_predictions(db, predictions)
+    return predictions
+
+
+def forecast_workspaces(client, workspaces, model_store=forecast_model):
+    """Forecasts several workspaces with a single ``model.predict`` call over their stacked features.
+
+    Returns one timing entry per workspace: seconds spent updating and
+    building its features, its share of the stacked prediction, and seconds
+    spent storing its predictions (or an ``error`` if its features failed).
+    """
+    timings = {}
+    frames = []
+    for workspace in workspaces:
+        started = time.perf_counter()
+        try:
+            features = build_features(update_feature_state(client[workspace]))
+        except Exception as e:
+            # One broken workspace must not sink the rest of its shard
+            timings[workspace] = {"workspace": workspace, "error": str(e)}
+            continue
+        timings[workspace] = {"workspace": workspace, "features_seconds": time.perf_counter() - started}
+        frames.append(features.assign(workspace=workspace))
 
-# Set next day info
-latest_data['day_of_week'] = (latest_data['day_of_week'] + 1) % 7
-latest_data['item_encoded'] = le.transform(latest_data['item_id'])
+    started = time.perf_counter()
+    stacked = pd.concat(frames, ignore_index=True) if frames else pd.DataFrame()
+    scored = predict(stacked, model_store) if not stacked.empty else stacked.assign(predicted_quantity=0)
+    predict_seconds = time.perf_counter() - started
+    by_workspace = dict(tuple(scored.groupby('workspace'))) if not scored.empty else {}
 
-# Model input
-X_input = latest_data[['day_of_week', 'item_encoded', 'lag1', 'rolling_mean_3', 'rolling_std_3']]
+    healthy = [workspace for workspace in workspaces if "error" not in timings[workspace]]
+    for workspace in healthy:
+        started = time.perf_counter()
+        rows = by_workspace.get(workspace)
+        predictions = prediction_records(rows) if rows is not None else []
+        store_predictions(client[workspace], predictions)
+        timings[workspace].update({
+            "items": len(predictions),
+            "predict_seconds": predict_seconds / len(healthy),
+            "store_seconds": time.perf_counter() - started,
+        })
+    return list(timings.values())
 
-# Predict
-predictions = model.predict(X_input)
-latest_data['predicted_quantity'] = predictions
 
-# Add noise and create final predictions
-final_preds = []
-for item_id, pred in zip(latest_data['item_id'], predictions):
-    noise = random.randint(1, 8)
-    adjusted = max(0, round(pred - noise))
-    final_preds.append({"item_id": item_id, "predicted_quantity": adjusted})
+if __name__ == "__main__":
+    import sys
 
-# Clear previous predictions in the 'prediction' collection
-db["prediction"].delete_many({})
+    import django
 
-# Store new predictions in MongoDB
-db["prediction"].insert_many(final_preds)
+    sys.path.insert(0, str(MODEL_DIR.parent))
+    os.environ.setdefault("DJANGO_SETTINGS_MODULE", "inventory.settings")
+    django.setup()
+    from management.mongo import get_db
 
-print("Predictions successfully stored in MongoDB 'prediction' collection.")
+    workspace = sys.argv[1] if len(sys.argv) > 1 else "bhavi"
+    run_forecast(get_db(workspace))
+    print(f"Predictions successfully stored in MongoDB '{workspace}.prediction' collection.")
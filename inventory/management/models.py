@@ -1,15 +1,12 @@
 from django.db import models
 
-from django.conf import settings
-
-CUSTOMERS_COLLECTION = settings.CUSTOMERS_COLLECTION
-WORKPLACES_COLLECTION = settings.WORKPLACES_COLLECTION
+from .mongo import get_main_db
 
 # Create your models here.
     
 class CustomerModel:
     def __init__(self):
-        self.collection = CUSTOMERS_COLLECTION
+        self.collection = get_main_db()["customers"]
 
     def create_customer(self, email, phone, hashed_password):
         self.collection.insert_one({
@@ -25,7 +22,7 @@ class CustomerModel:
 
 class WorkplaceModel:
     def __init__(self):
-        self.collection = WORKPLACES_COLLECTION
+        self.collection = get_main_db()["workplaces"]
 
     def create_workplace(self, name, email, address, workplace_type, inventory_type, password):
         workplace = {
@@ -41,5 +38,8 @@ class WorkplaceModel:
 
     def find_workplace(self, email):
         return self.collection.find_one({"email": email})
+
+    def list_workplace_names(self):
+        return [doc["name"] for doc in self.collection.find({}, {"_id": 0, "name": 1}) if doc.get("name")]
     
     
\ No newline at end of file
@@ -0,0 +1,200 @@
+"""Process-wide MongoDB connection provider.
+
+Every view, model, job and management command gets its client from
+``get_client`` / ``get_db``. The client is created on first use from the
+``MONGO_*`` settings, re-created after a fork, and instrumented with a pool
+listener whose gauges are available from ``pool_monitor.stats()`` and a
+command listener counting operations in ``command_counter.stats()``.
+
+Async views use ``get_async_db`` instead, which hands out an
+``AsyncMongoClient`` with the same options. An async client is bound to the
+event loop it was created on, so one is kept per running loop.
+"""
+import asyncio
+import os
+import threading
+import weakref
+
+from django.conf import settings
+from pymongo import AsyncMongoClient, MongoClient, monitoring
+
+from .instrumentation import request_command_listener
+
+_client = None
+_client_pid = None
+_client_lock = threading.Lock()
+_async_clients = weakref.WeakKeyDictionary()
+
+
+class PoolMonitor(monitoring.ConnectionPoolListener):
+    """Tracks connection pool usage: open and in-use connections and checkout wait times."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        with self._lock:
+            self.open_connections = 0
+            self.in_use = 0
+            self.max_in_use = 0
+            self.checkouts = 0
+            self.checkout_failures = 0
+            self.wait_seconds_total = 0.0
+            self.wait_seconds_max = 0.0
+
+    def _record_wait(self, duration):
+        if duration is None:
+            return
+        self.wait_seconds_total += duration
+        self.wait_seconds_max = max(self.wait_seconds_max, duration)
+
+    def connection_created(self, event):
+        with self._lock:
+            self.open_connections += 1
+
+    def connection_closed(self, event):
+        with self._lock:
+            self.open_connections -= 1
+
+    def connection_checked_out(self, event):
+        with self._lock:
+            self.checkouts += 1
+            self.in_use += 1
+            self.max_in_use = max(self.max_in_use, self.in_use)
+            self._record_wait(getattr(event, "duration", None))
+
+    def connection_check_out_failed(self, event):
+        with self._lock:
+            self.checkout_failures += 1
+            self._record_wait(getattr(event, "duration", None))
+
+    def connection_checked_in(self, event):
+        with self._lock:
+            self.in_use -= 1
+
+    def connection_check_out_started(self, event):
+        pass
+
+    def connection_ready(self, event):
+        pass
+
+    def pool_created(self, event):
+        pass
+
+    def pool_ready(self, event):
+        pass
+
+    def pool_cleared(self, event):
+        pass
+
+    def pool_closed(self, event):
+        pass
+
+    def stats(self):
+        """Returns the current pool gauges and checkout wait counters."""
+        with self._lock:
+            return {
+                "open_connections": self.open_connections,
+                "in_use": self.in_use,
+                "max_in_use": self.max_in_use,
+                "max_pool_size": getattr(settings, "MONGO_MAX_POOL_SIZE", 100),
+                "checkouts": self.checkouts,
+                "checkout_failures": self.checkout_failures,
+                "checkout_wait_seconds_total": self.wait_seconds_total,
+                "checkout_wait_seconds_max": self.wait_seconds_max,
+                "checkout_wait_seconds_avg": self.wait_seconds_total / self.checkouts if self.checkouts else 0.0,
+            }
+
+
+pool_monitor = PoolMonitor()
+
+
+class CommandCounter(monitoring.CommandListener):
+    """Counts the commands (find, aggregate, update, ...) sent to MongoDB by this process."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        with self._lock:
+            self.total = 0
+            self.by_command = {}
+
+    def started(self, event):
+        with self._lock:
+            self.total += 1
+            self.by_command[event.command_name] = self.by_command.get(event.command_name, 0) + 1
+
+    def succeeded(self, event):
+        pass
+
+    def failed(self, event):
+        pass
+
+    def stats(self):
+        """Returns the total and per-command-name counts."""
+        with self._lock:
+            return {"total": self.total, "by_command": dict(self.by_command)}
+
+
+command_counter = CommandCounter()
+
+
+def client_options():
+    """Builds the MongoClient keyword arguments from the MONGO_* settings."""
+    options = {
+        "maxPoolSize": getattr(settings, "MONGO_MAX_POOL_SIZE", 100),
+        "minPoolSize": getattr(settings, "MONGO_MIN_POOL_SIZE", 0),
+        "serverSelectionTimeoutMS": getattr(settings, "MONGO_SERVER_SELECTION_TIMEOUT_MS", 30000),
+        "event_listeners": [pool_monitor, command_counter, request_command_listener],
+    }
+    wait_queue_timeout = getattr(settings, "MONGO_WAIT_QUEUE_TIMEOUT_MS", None)
+    if wait_queue_timeout:
+        options["waitQueueTimeoutMS"] = wait_queue_timeout
+    compressors = getattr(settings, "MONGO_COMPRESSORS", "")
+    if compressors:
+        options["compressors"] = compressors
+    return options
+
+
+def get_client():
+    """Returns this process's shared MongoClient, creating it on first use."""
+    global _client, _client_pid
+    pid = os.getpid()
+    if _client is not None and _client_pid == pid:
+        return _client
+
+    with _client_lock:
+        if _client is None or _client_pid != pid:
+            # A client inherited through fork must not be reused by the child
+            pool_monitor.reset()
+            _client = MongoClient(getattr(settings, "MONGO_URI", "mongodb://localhost:27017/"), **client_options())
+            _client_pid = pid
+        return _client
+
+
+def get_db(name):
+    """Returns a database handle on the shared client."""
+    return get_client()[name]
+
+
+def get_main_db():
+    """Returns the database holding customers, workplaces and contact messages."""
+    return get_db(getattr(settings, "MONGO_MAIN_DB", "invmng"))
+
+
+def get_async_client():
+    """Returns the AsyncMongoClient for the running event loop, creating it on first use."""
+    loop = asyncio.get_running_loop()
+    client = _async_clients.get(loop)
+    if client is None:
+        client = AsyncMongoClient(getattr(settings, "MONGO_URI", "mongodb://localhost:27017/"), **client_options())
+        _async_clients[loop] = client
+    return client
+
+
+def get_async_db(name):
+    """Returns a database handle on the running loop's async client."""
+    return get_async_client()[name]
@@ -0,0 +1,47 @@
+"""Normalization of the date formats found on order lines.
+
+Orders have been stored with an ISO 8601 ``date`` string, the legacy
+``%d/%m/%y %H:%M`` string, or a ``created_at`` datetime. The
+normalize_order_dates command rewrites them all to a BSON ``ts`` datetime
+(naive UTC), which is what add_sale writes natively.
+
+Legacy strings are day-first and are tried before ISO 8601, as the
+forecast loader does; a lenient parser would read "05/02/17" month-first.
+"""
+from datetime import datetime, timezone
+
+LEGACY_FORMAT = "%d/%m/%y %H:%M"
+LEGACY_PATTERN = r"^\s*\d{1,2}/\d{1,2}/\d{2} \d{1,2}:\d{2}\s*$"  # stored LEGACY_FORMAT strings
+
+
+def to_utc(value):
+    """Converts a datetime to the naive UTC form BSON stores."""
+    if value.tzinfo is not None:
+        value = value.astimezone(timezone.utc).replace(tzinfo=None)
+    return value
+
+
+def order_timestamp(order):
+    """Returns an order line's timestamp as a naive UTC datetime, or None if it has none."""
+    if isinstance(order.get("ts"), datetime):
+        return order["ts"]
+    if "date" in order:
+        date = order["date"]
+        if isinstance(date, datetime):
+            return to_utc(date)
+        if isinstance(date, str):
+            date = date.strip()
+            try:
+                # Old format like "24/02/17 13:10", stored in UTC
+                return datetime.strptime(date, LEGACY_FORMAT)
+            except ValueError:
+                pass
+            try:
+                # ISO 8601 string like: "2025-05-02T18:47:28.470091+00:00"
+                return to_utc(datetime.fromisoformat(date))
+            except ValueError:
+                return None
+        return None
+    if isinstance(order.get("created_at"), datetime):
+        return to_utc(order["created_at"])
+    return None
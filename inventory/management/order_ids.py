@@ -0,0 +1,76 @@
+"""Block-allocated order IDs.
+
+Each worker process reserves a block of sequence numbers per workspace with
+a single ``$inc`` on ``counters/order_id`` and hands them out from memory,
+so most sales never touch the counter document. A block is never shared
+between processes (a forked child drops the blocks it inherited), so IDs
+are never duplicated; numbers left in a block when a worker exits are
+simply skipped, and IDs from different workers interleave rather than
+following sale order.
+"""
+import os
+import threading
+
+from django.conf import settings
+from pymongo import ReturnDocument
+
+COUNTER_ID = "order_id"
+
+
+def format_order_id(seq):
+    return f"ORD{seq:03d}"  # e.g., ORD001, ORD002
+
+
+class OrderIdAllocator:
+    """Per-process pool of reserved order sequence numbers, one block per workspace."""
+
+    def __init__(self, block_size=50):
+        self.block_size = block_size
+        self._lock = threading.Lock()
+        self._workspace_locks = {}
+        self._blocks = {}
+        self._pid = os.getpid()
+        self.reservations = 0
+        self.allocations = 0
+
+    def _workspace_lock(self, workspace):
+        with self._lock:
+            if self._pid != os.getpid():
+                # Blocks inherited through fork belong to the parent
+                self._blocks.clear()
+                self._workspace_locks.clear()
+                self._pid = os.getpid()
+            return self._workspace_locks.setdefault(workspace, threading.Lock())
+
+    def _reserve(self, db):
+        """Claims the next ``block_size`` sequence numbers and returns ``[first, last]``."""
+        counter = db.counters.find_one_and_update(
+            {"_id": COUNTER_ID},
+            {"$inc": {"seq": self.block_size}},
+            upsert=True,
+            return_document=ReturnDocument.AFTER,
+        )
+        self.reservations += 1
+        return [counter["seq"] - self.block_size + 1, counter["seq"]]
+
+    def next_seq(self, db):
+        """Returns an unused order sequence number for the workspace of ``db``."""
+        with self._workspace_lock(db.name):
+            block = self._blocks.get(db.name)
+            if block is None or block[0] > block[1]:
+                block = self._blocks[db.name] = self._reserve(db)
+            seq = block[0]
+            block[0] += 1
+            self.allocations += 1
+            return seq
+
+    def release(self, workspace):
+        """Forgets this process's block for a workspace; its remaining numbers are skipped."""
+        with self._workspace_lock(workspace):
+            self._blocks.pop(workspace, None)
+
+    def next_order_id(self, db):
+        return format_order_id(self.next_seq(db))
+
+
+order_ids = OrderIdAllocator(getattr(settings, "ORDER_ID_BLOCK_SIZE", 50))
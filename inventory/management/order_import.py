@@ -0,0 +1,255 @@
+"""Bulk import of historical order lines from CSV or JSON Lines.
+
+Rows are validated one at a time and written in batches with unordered
+``insert_many``; rows that cannot be imported are counted and reported
+rather than aborting the run. Each written batch is added to the sales
+rollups with the same ``$inc`` writes add_sale uses, so sales recorded
+during an import are never overwritten; a failed rollup write is recorded
+on the batch's lines for ``apply_pending_rollups``. Stock is updated once
+at the end. Lines newer than the forecast feature watermark are folded in
+by the next forecast run; the feature store is only rebuilt when an
+imported line is older than the watermark.
+
+Each row is one order line with ``date`` (ISO 8601 or the legacy
+``%d/%m/%y %H:%M``), ``quantity``, ``item_id`` and/or ``item_name``, and
+optionally ``order_id``, ``cust_name``, ``in_or_out``, ``item_price`` and
+``sku``. Name, SKU and price missing from a row are stamped from the
+workspace catalog, as add_sale does. Lines without an ``order_id`` are
+stored without one rather than given a number that could collide with an
+ID appearing later in the file. The order ID counter is moved past the
+highest imported ``ORD###`` number; imported numbers the counter had
+already reached may repeat IDs of recorded sales, and their lines are
+counted in the report.
+
+A file that stops decoding as UTF-8 or parsing as CSV ends the import
+there: the lines read before it are kept and rolled up, and the report
+carries an ``error`` naming the row.
+"""
+import csv
+import io
+import json
+import re
+import time
+import uuid
+from datetime import timezone
+
+from pymongo import UpdateOne
+from pymongo.errors import BulkWriteError
+
+from .catalog import catalog_cache
+from .order_dates import order_timestamp
+from .order_ids import COUNTER_ID
+from .rollups import RollupError, apply_rollups, mark_pending_rollups
+from .versions import DATA, bump_version
+
+IMPORT_BATCH_SIZE = 5000
+MAX_REPORTED_ERRORS = 100
+FORMATS = ("csv", "jsonl")
+ORDER_SEQ = re.compile(r"^ORD(\d+)$")
+
+
+class ImportRowError(ValueError):
+    """A row that cannot be imported; the message is reported with its row number."""
+
+
+class ImportFileError(ValueError):
+    """The input cannot be read any further, e.g. it is not UTF-8 or not valid CSV."""
+
+
+def detect_format(filename):
+    """Guesses the input format from a file name, defaulting to CSV."""
+    return "jsonl" if filename and filename.lower().endswith((".jsonl", ".ndjson", ".json")) else "csv"
+
+
+def read_rows(stream, fmt):
+    """Yields raw rows as dicts from a text stream, without reading it into memory.
+
+    Raises ``ImportFileError`` when the stream cannot be decoded or parsed further.
+    """
+    if fmt not in FORMATS:
+        raise ValueError(f"Unsupported format: {fmt}")
+    try:
+        if fmt == "csv":
+            yield from csv.DictReader(stream)
+        else:
+            for line in stream:
+                if line.strip():
+                    try:
+                        yield json.loads(line)
+                    except ValueError:
+                        yield None
+    except UnicodeDecodeError:
+        raise ImportFileError("File is not UTF-8 text")
+    except csv.Error as e:
+        raise ImportFileError(f"Malformed CSV: {e}")
+
+
+def _number(value, field, cast):
+    if value in (None, ""):
+        return None
+    try:
+        return cast(value)
+    except (TypeError, ValueError):
+        raise ImportRowError(f"{field} is not a number: {value!r}")
+
+
+def build_import_record(row, catalog):
+    """Validates one raw row and returns the order document to insert."""
+    if not isinstance(row, dict):
+        raise ImportRowError("Row is not a JSON object")
+
+    ts = order_timestamp({"date": row.get("date")})
+    if ts is None:
+        raise ImportRowError(f"Unparseable date: {row.get('date')!r}")
+
+    # Parsed as float so that 2.5 is rejected rather than truncated to 2
+    quantity = _number(row.get("quantity"), "quantity", float)
+    if quantity is None or quantity <= 0 or not quantity.is_integer():
+        raise ImportRowError(f"quantity must be a positive integer: {row.get('quantity')!r}")
+
+    item = None
+    if row.get("item_id"):
+        item = catalog.items_by_id.get(row["item_id"])
+    if item is None and row.get("item_name"):
+        item = catalog.items_by_name.get(row["item_name"])
+    if item is None and not row.get("item_id"):
+        raise ImportRowError(f"Item not found: {row.get('item_name')!r}")
+    item = item or {}
+
+    price = _number(row.get("item_price"), "item_price", float)
+    return {
+        "row_id": row.get("row_id") or str(uuid.uuid4()),
+        "order_id": row.get("order_id") or None,
+        "date": ts.replace(tzinfo=timezone.utc).isoformat(),
+        "ts": ts,
+        "item_id": row.get("item_id") or item.get("item_id"),
+        "item_name": row.get("item_name") or item.get("item_name"),
+        "sku": row.get("sku") or item.get("sku"),
+        "item_price": price if price is not None else item.get("item_price"),
+        "quantity": int(quantity),
+        "cust_name": row.get("cust_name") or None,
+        "in_or_out": row.get("in_or_out") or None,
+    }
+
+
+def import_orders(db, stream, fmt="csv", batch_size=IMPORT_BATCH_SIZE, apply_inventory=False,
+                  rebuild_features=True):
+    """Imports order lines from ``stream`` into ``db`` and returns a summary with rows/sec.
+
+    If the stream becomes unreadable, the summary has an ``error`` and only
+    the lines before it are imported.
+
+    With ``apply_inventory`` the recipe usage of all imported lines is
+    deducted from stock in one aggregated bulk write at the end. Without
+    ``rebuild_features`` the feature store is left alone even when imported
+    lines predate its watermark.
+    """
+    started = time.perf_counter()
+    catalog = catalog_cache.get(db)
+    report = {"rows_read": 0, "rows_inserted": 0, "rows_rejected": 0, "rows_rollup_pending": 0,
+              "rows_reusing_order_ids": 0, "errors": []}
+    usage = {}
+    max_seq = 0
+    counter = db.counters.find_one({"_id": COUNTER_ID}) or {}
+    issued_seq = counter.get("seq", 0)
+    earliest = None
+    batch = []
+    batch_rows = []
+
+    def reject(row_number, message):
+        report["rows_rejected"] += 1
+        if len(report["errors"]) < MAX_REPORTED_ERRORS:
+            report["errors"].append({"row": row_number, "error": message})
+
+    def flush():
+        nonlocal earliest
+        if not batch:
+            return
+        failed = set()
+        try:
+            db.orders.insert_many(batch, ordered=False)
+        except BulkWriteError as e:
+            for error in e.details.get("writeErrors", []):
+                failed.add(error["index"])
+                reject(batch_rows[error["index"]], error.get("errmsg", "Write failed"))
+        inserted = [record for index, record in enumerate(batch) if index not in failed]
+        report["rows_inserted"] += len(inserted)
+        if inserted:
+            batch_earliest = min(record["ts"] for record in inserted)
+            earliest = batch_earliest if earliest is None else min(earliest, batch_earliest)
+            try:
+                apply_rollups(db, inserted)
+            except RollupError as e:
+                mark_pending_rollups(db, inserted, e.pending)
+                report["rows_rollup_pending"] += len(inserted)
+        batch.clear()
+        batch_rows.clear()
+
+    try:
+        for row_number, row in enumerate(read_rows(stream, fmt), 1):
+            report["rows_read"] += 1
+            try:
+                record = build_import_record(row, catalog)
+            except ImportRowError as e:
+                reject(row_number, str(e))
+                continue
+
+            match = ORDER_SEQ.match(str(record["order_id"] or ""))
+            if match:
+                seq = int(match.group(1))
+                max_seq = max(max_seq, seq)
+                if seq <= issued_seq:
+                    report["rows_reusing_order_ids"] += 1
+
+            if apply_inventory:
+                item = catalog.items_by_id.get(record["item_id"]) or {}
+                for recipe_item in catalog.recipes_by_sku.get(record["sku"] or item.get("sku"), []):
+                    ing_id = recipe_item.get("ing_id")
+                    usage[ing_id] = usage.get(ing_id, 0) + recipe_item.get("quantity", 0) * record["quantity"]
+
+            batch.append(record)
+            batch_rows.append(row_number)
+            if len(batch) >= batch_size:
+                flush()
+    except ImportFileError as e:
+        report["error"] = f"Import stopped near row {report['rows_read'] + 1}: {e}"
+    flush()
+
+    if max_seq:
+        # Moves the counter past the imported ORD### numbers, so no block reserved from now
+        # on contains them. Blocks workers already hold lie at or below the counter as read
+        # at the start, so only imported numbers in that range can repeat a sale's ID; they
+        # are counted in the report rather than prevented.
+        db.counters.update_one({"_id": COUNTER_ID}, {"$max": {"seq": max_seq}}, upsert=True)
+
+    if usage:
+        result = db.inventory.bulk_write([
+            UpdateOne({"ing_id": ing_id}, {"$inc": {"quantity": -amount}})
+            for ing_id, amount in usage.items()
+        ], ordered=False)
+        report["inventory_updated"] = result.modified_count
+
+    insert_seconds = time.perf_counter() - started
+    bump_version(db, DATA)
+    report["features_rebuilt"] = False
+    if rebuild_features and earliest is not None:
+        # Imported here so that importing this module does not load pandas
+        from .mlload import WATERMARK_ID, rebuild_feature_state
+
+        watermark = db.meta.find_one({"_id": WATERMARK_ID})
+        if watermark and earliest <= watermark["ts"]:
+            rebuild_feature_state(db)
+            report["features_rebuilt"] = True
+
+    total_seconds = time.perf_counter() - started
+    report.update({
+        "insert_seconds": round(insert_seconds, 3),
+        "total_seconds": round(total_seconds, 3),
+        "rows_per_second": round(report["rows_read"] / insert_seconds) if insert_seconds else None,
+    })
+    return report
+
+
+def text_stream(binary):
+    """Wraps an uploaded or opened binary file for line-by-line text reading."""
+    return io.TextIOWrapper(binary, encoding="utf-8-sig", newline="")
@@ -0,0 +1,198 @@
+"""Response cache for the workspace read endpoints.
+
+Cached responses live in the ``responses`` cache of Django's cache framework
+under a key made of the endpoint, the workspace, its data version counter
+and the query string. Writers bump the data version, so a stale entry is
+never served: it simply stops being looked up and ages out through the
+cache's TTL and ``MAX_ENTRIES`` culling.
+
+The same key doubles as a strong ETag. A request whose ``If-None-Match``
+matches it is answered with ``304 Not Modified`` after the version read
+alone, without touching the cache or running the view's queries.
+"""
+import hashlib
+import threading
+from datetime import datetime
+from functools import wraps
+from inspect import iscoroutinefunction
+
+from django.conf import settings
+from django.core.cache import caches
+from django.http import HttpResponse, HttpResponseNotModified
+from django.utils.cache import patch_cache_control
+from django.utils.http import parse_etags, urlencode
+
+from .mongo import get_async_db, get_db
+from .versions import DATA, aget_version, get_version
+
+CACHE_ALIAS = "responses"
+
+
+class ResponseCacheStats:
+    """Per-endpoint hit/miss counters and the response bytes served from the cache."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._endpoints = {}
+
+    def _counters(self, endpoint):
+        return self._endpoints.setdefault(
+            endpoint, {"hits": 0, "misses": 0, "not_modified": 0, "bytes_saved": 0, "too_large": 0}
+        )
+
+    def record(self, endpoint, hit, size=0, too_large=False, not_modified=False):
+        with self._lock:
+            counters = self._counters(endpoint)
+            if not_modified:
+                counters["not_modified"] += 1
+            elif hit:
+                counters["hits"] += 1
+                counters["bytes_saved"] += size
+            else:
+                counters["misses"] += 1
+            if too_large:
+                counters["too_large"] += 1
+
+    def stats(self):
+        """Returns the counters and hit ratio of every endpoint seen by this worker."""
+        with self._lock:
+            # 304s count as hits: the response was answered without running the view
+            report = {}
+            for endpoint, counters in self._endpoints.items():
+                lookups = counters["hits"] + counters["misses"] + counters["not_modified"]
+                served = counters["hits"] + counters["not_modified"]
+                report[endpoint] = {**counters, "hit_ratio": served / lookups if lookups else 0.0}
+            return report
+
+
+response_cache_stats = ResponseCacheStats()
+
+
+def response_digest(endpoint, workspace, version, query_string, daily=False):
+    """Identifies one endpoint response for one version of a workspace's data."""
+    parts = [endpoint, workspace, str(version), query_string]
+    if daily:
+        # Date-relative figures (e.g. "this week") change at midnight even without writes
+        parts.append(datetime.utcnow().date().isoformat())
+    return hashlib.sha1("\x1f".join(parts).encode()).hexdigest()
+
+
+def cache_key(endpoint, digest):
+    return f"response:{endpoint}:{digest}"
+
+
+def _etag_matches(request, etag):
+    if_none_match = request.headers.get("If-None-Match")
+    if not if_none_match:
+        return False
+    etags = parse_etags(if_none_match)
+    return "*" in etags or etag in etags
+
+
+def _not_modified(etag):
+    response = HttpResponseNotModified()
+    response["ETag"] = etag
+    patch_cache_control(response, private=True, no_cache=True)
+    return response
+
+
+def _tag(response, etag):
+    """Adds the ETag and revalidation headers to a successful response."""
+    if response.status_code == 200:
+        response["ETag"] = etag
+        patch_cache_control(response, private=True, no_cache=True)
+    return response
+
+
+def _query_string(request):
+    # Every value of a repeated parameter, URL-encoded so that values containing & or = stay distinct
+    return urlencode(sorted(request.GET.lists()), doseq=True)
+
+
+def _entry(response):
+    """Returns what is stored for a response, or None if it must not be cached."""
+    if response.status_code != 200 or getattr(response, "streaming", False):
+        return None
+    return response.content, response["Content-Type"]
+
+
+def _from_entry(entry):
+    content, content_type = entry
+    return HttpResponse(content, content_type=content_type)
+
+
+def _fits(entry):
+    return len(entry[0]) <= getattr(settings, "RESPONSE_CACHE_MAX_BYTES", 1024 * 1024)
+
+
+def cached_response(endpoint, daily=False):
+    """Decorates a sync or async workspace read view with the response cache.
+
+    Requests without a workspace in the session go straight to the view so it
+    can answer with its usual error. ``daily`` adds the current date to the
+    key for views whose output depends on it.
+    """
+
+    def decorator(view):
+        if iscoroutinefunction(view):
+            @wraps(view)
+            async def async_wrapper(request, *args, **kwargs):
+                workspace = await request.session.aget("workspace")
+                if not workspace:
+                    return await view(request, *args, **kwargs)
+
+                version = await aget_version(get_async_db(workspace), DATA)
+                digest = response_digest(endpoint, workspace, version, _query_string(request), daily)
+                etag = f'"{digest}"'
+                if _etag_matches(request, etag):
+                    response_cache_stats.record(endpoint, hit=True, not_modified=True)
+                    return _not_modified(etag)
+
+                cache = caches[CACHE_ALIAS]
+                key = cache_key(endpoint, digest)
+                entry = await cache.aget(key)
+                if entry is not None:
+                    response_cache_stats.record(endpoint, hit=True, size=len(entry[0]))
+                    return _tag(_from_entry(entry), etag)
+
+                response = await view(request, *args, **kwargs)
+                entry = _entry(response)
+                too_large = entry is not None and not _fits(entry)
+                if entry is not None and not too_large:
+                    await cache.aset(key, entry)
+                response_cache_stats.record(endpoint, hit=False, too_large=too_large)
+                return _tag(response, etag)
+
+            return async_wrapper
+
+        @wraps(view)
+        def wrapper(request, *args, **kwargs):
+            workspace = request.session.get("workspace")
+            if not workspace:
+                return view(request, *args, **kwargs)
+
+            version = get_version(get_db(workspace), DATA)
+            digest = response_digest(endpoint, workspace, version, _query_string(request), daily)
+            etag = f'"{digest}"'
+            if _etag_matches(request, etag):
+                response_cache_stats.record(endpoint, hit=True, not_modified=True)
+                return _not_modified(etag)
+
+            cache = caches[CACHE_ALIAS]
+            key = cache_key(endpoint, digest)
+            entry = cache.get(key)
+            if entry is not None:
+                response_cache_stats.record(endpoint, hit=True, size=len(entry[0]))
+                return _tag(_from_entry(entry), etag)
+
+            response = view(request, *args, **kwargs)
+            entry = _entry(response)
+            too_large = entry is not None and not _fits(entry)
+            if entry is not None and not too_large:
+                cache.set(key, entry)
+            response_cache_stats.record(endpoint, hit=False, too_large=too_large)
+            return _tag(response, etag)
+
+        return wrapper
+
+    return decorator
@@ -0,0 +1,15 @@
+"""JSON responses whose encoding time is reported by the request instrumentation."""
+import time
+
+from django import http
+
+from .instrumentation import record_json_serialization
+
+
+class JsonResponse(http.JsonResponse):
+    """``django.http.JsonResponse`` that records how long serializing ``data`` took."""
+
+    def __init__(self, *args, **kwargs):
+        started = time.perf_counter()
+        super().__init__(*args, **kwargs)
+        record_json_serialization(time.perf_counter() - started)
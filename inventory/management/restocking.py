@@ -0,0 +1,84 @@
+"""Set-based restocking recommendations.
+
+Predicted item demand is expanded through the recipes into per-ingredient
+usage in one vectorized item x ingredient product, summed across every
+menu item that uses an ingredient, and compared with current stock.
+"""
+import pandas as pd
+
+from .catalog import catalog_cache
+
+RECIPE_COLUMNS = ['item_id', 'ing_id', 'qty_per_item']
+
+
+def _plain_records(frame):
+    """Converts a frame to a list of dicts holding plain Python scalars."""
+    return [
+        {column: value.item() if hasattr(value, "item") else value for column, value in row.items()}
+        for row in frame.to_dict("records")
+    ]
+
+
+def restocking_report(db, predictions=None):
+    """Returns ``(item_sales_predictions, restocking_recommendations)`` for a workspace.
+
+    Reads predictions (unless given), the catalog and the stock of the
+    ingredients involved in at most one query each; recommendations are
+    sorted by how much of the predicted usage is missing, worst first.
+    """
+    if predictions is None:
+        predictions = list(db["prediction"].find({}, {"_id": 0, "item_id": 1, "predicted_quantity": 1}))
+    catalog = catalog_cache.get(db)
+
+    item_sales_predictions = []
+    recipe_rows = []
+    for pred in predictions:
+        item = catalog.items_by_id.get(pred["item_id"])
+        if not item:
+            continue
+
+        item_sales_predictions.append({
+            "item_id": pred["item_id"],
+            "item_name": item.get("item_name", "Unknown"),
+            "item_size": item.get("item_size", "Unknown"),
+            "predicted_quantity": pred["predicted_quantity"],
+        })
+        for entry in catalog.recipes_by_sku.get(item.get("sku"), []):
+            recipe_rows.append((pred["item_id"], entry["ing_id"], entry["quantity"]))
+
+    if not recipe_rows:
+        return item_sales_predictions, []
+
+    # Predicted usage per ingredient, summed over every item that uses it
+    predicted = pd.DataFrame(item_sales_predictions, columns=['item_id', 'predicted_quantity'])
+    recipe = pd.DataFrame(recipe_rows, columns=RECIPE_COLUMNS)
+    usage = recipe.merge(predicted.drop_duplicates('item_id'), on='item_id')
+    usage['predicted_usage'] = usage['qty_per_item'] * usage['predicted_quantity']
+    usage = usage.groupby('ing_id', sort=False)['predicted_usage'].sum().reset_index()
+
+    # Current stock of those ingredients
+    stock = pd.DataFrame(
+        list(db["inventory"].find(
+            {"ing_id": {"$in": usage['ing_id'].tolist()}},
+            {"_id": 0, "ing_id": 1, "name": 1, "inv_id": 1, "quantity": 1, "ing_meas": 1},
+        )),
+        columns=['ing_id', 'name', 'inv_id', 'quantity', 'ing_meas'],
+    ).drop_duplicates('ing_id')
+
+    # Ingredients without an inventory record are not tracked and are skipped
+    report = usage.merge(stock, on='ing_id', how='inner')
+    report['current_stock'] = report['quantity'].fillna(0)
+    report['shortage'] = (report['predicted_usage'] - report['current_stock']).clip(lower=0)
+    report = report[report['shortage'] > 0]
+    if report.empty:
+        return item_sales_predictions, []
+
+    report = report.assign(
+        severity=report['shortage'] / report['predicted_usage'],
+        ing_name=report['name'].fillna("Unknown Ingredient"),
+        inv_id=report['inv_id'].fillna("N/A"),
+        unit=report['ing_meas'].fillna(""),
+    ).sort_values(['severity', 'shortage'], ascending=False)
+
+    columns = ['ing_id', 'ing_name', 'inv_id', 'current_stock', 'predicted_usage', 'shortage', 'unit']
+    return item_sales_predictions, _plain_records(report[columns])
@@ -0,0 +1,306 @@
+"""Incrementally maintained sales rollups.
+
+``sales_daily`` holds one document per (date, item_id, in_or_out) with the
+quantity sold, the revenue and the number of order lines; ``sales_totals``
+holds the all-time figures per order type and ``sales_by_item`` the
+all-time quantity and revenue per menu item name. All three are updated
+with ``$inc`` whenever order lines are written, so the dashboard never has
+to scan ``orders``. Revenue comes from the ``item_price`` stamped on each
+order line when it was sold.
+
+Order lines without a usable date cannot be placed on a day, so they are
+left out of ``sales_daily`` and of the quantity and revenue in
+``sales_totals``, as the dashboard total always ignored them; they still
+count in the per-type ``lines`` (the order type distribution) and in
+``sales_by_item``.
+
+When a rollup write fails after a sale was stored, the rollups it missed
+are recorded on its order lines under ``pending_rollups``;
+``apply_pending_rollups`` applies them later.
+"""
+from datetime import datetime, timedelta
+
+from pymongo import ASCENDING, DESCENDING, IndexModel, UpdateOne
+
+from .order_dates import order_timestamp
+from .versions import DATA, bump_version, get_version
+
+DAILY = "sales_daily"
+TOTALS = "sales_totals"
+BY_ITEM = "sales_by_item"
+ORDER_TYPES = ["dine-in", "takeout"]
+DAILY_KEY = [("date", ASCENDING), ("item_id", ASCENDING), ("in_or_out", ASCENDING)]
+BY_ITEM_REVENUE_KEY = [("revenue", DESCENDING)]
+ROLLUPS = (DAILY, TOTALS, BY_ITEM)
+PENDING_FIELD = "pending_rollups"
+
+
+class RollupError(Exception):
+    """Raised when a rollup write fails; ``pending`` names the rollups that were not applied."""
+
+    def __init__(self, pending):
+        super().__init__(f"Rollups not applied: {', '.join(pending)}")
+        self.pending = list(pending)
+
+
+class RollupRebuildError(Exception):
+    """Raised when ``rebuild_rollups`` keeps seeing new sales and gives up."""
+
+
+def order_date(order):
+    """Returns the calendar date (UTC) of an order line, or None if it has no usable date."""
+    ts = order_timestamp(order)
+    return ts.date() if ts else None
+
+
+def line_revenue(order):
+    """Returns quantity x stamped price, or 0 for lines sold before prices were stamped."""
+    price = order.get("item_price")
+    if isinstance(price, bool) or not isinstance(price, (int, float)):
+        return 0
+    return price * order.get("quantity", 0)
+
+
+def summarize(orders):
+    """Folds order lines into per-day, per-type and per-item counters."""
+    daily = {}
+    totals = {}
+    by_item = {}
+    for order in orders:
+        date = order_date(order)
+        quantity = order.get("quantity", 0)
+        revenue = line_revenue(order)
+        in_or_out = order.get("in_or_out")
+
+        total = totals.setdefault(in_or_out, {"quantity": 0, "revenue": 0, "lines": 0})
+        total["lines"] += 1
+        if date:
+            key = (date.isoformat(), order.get("item_id"), in_or_out)
+            day = daily.setdefault(key, {"quantity": 0, "revenue": 0, "lines": 0})
+            day["quantity"] += quantity
+            day["revenue"] += revenue
+            day["lines"] += 1
+
+            total["quantity"] += quantity
+            total["revenue"] += revenue
+
+        if order.get("item_name") is not None:
+            item = by_item.setdefault(order["item_name"], {"quantity": 0, "revenue": 0})
+            item["quantity"] += quantity
+            item["revenue"] += revenue
+    return daily, totals, by_item
+
+
+def apply_rollups(db, orders, session=None, rollups=ROLLUPS):
+    """Adds freshly written order lines to the rollup collections.
+
+    The rollups are written one after the other; if one fails, RollupError
+    names it and the ones after it.
+    """
+    daily, totals, by_item = summarize(orders)
+    writes = {
+        DAILY: [
+            UpdateOne(
+                {"date": date, "item_id": item_id, "in_or_out": in_or_out},
+                {"$inc": counters},
+                upsert=True,
+            )
+            for (date, item_id, in_or_out), counters in daily.items()
+        ],
+        TOTALS: [
+            UpdateOne({"_id": in_or_out}, {"$inc": counters}, upsert=True)
+            for in_or_out, counters in totals.items()
+        ],
+        BY_ITEM: [
+            UpdateOne({"_id": item_name}, {"$inc": counters}, upsert=True)
+            for item_name, counters in by_item.items()
+        ],
+    }
+    for position, name in enumerate(rollups):
+        if not writes[name]:
+            continue
+        try:
+            db[name].bulk_write(writes[name], session=session)
+        except Exception as e:
+            raise RollupError(rollups[position:]) from e
+
+
+def mark_pending_rollups(db, orders, pending):
+    """Records on stored order lines the rollups that still have to be applied to them."""
+    db.orders.update_many(
+        {"row_id": {"$in": [order["row_id"] for order in orders]}},
+        {"$set": {PENDING_FIELD: list(pending)}},
+    )
+
+
+def apply_pending_rollups(db):
+    """Applies the rollups recorded as missing on order lines and clears the marks.
+
+    Returns the number of order lines repaired.
+    """
+    groups = {}
+    for order in db.orders.find({PENDING_FIELD: {"$exists": True}}):
+        groups.setdefault(tuple(order[PENDING_FIELD]), []).append(order)
+
+    repaired = 0
+    for pending, orders in groups.items():
+        apply_rollups(db, orders, rollups=[name for name in ROLLUPS if name in pending])
+        db.orders.update_many(
+            {"_id": {"$in": [order["_id"] for order in orders]}},
+            {"$unset": {PENDING_FIELD: ""}},
+        )
+        repaired += len(orders)
+    if repaired:
+        bump_version(db, DATA)
+    return repaired
+
+
+def _build_scratch_rollups(db, batch_size):
+    """Recomputes the rollups from ``orders`` into ``*_rebuild`` collections and returns their documents."""
+    cursor = db.orders.find(
+        {},
+        {"_id": 0, "ts": 1, "date": 1, "created_at": 1, "item_id": 1, "item_name": 1, "item_price": 1,
+         "in_or_out": 1, "quantity": 1},
+        batch_size=batch_size,
+    )
+    daily, totals, by_item = summarize(cursor)
+
+    daily_tmp = db[f"{DAILY}_rebuild"]
+    totals_tmp = db[f"{TOTALS}_rebuild"]
+    by_item_tmp = db[f"{BY_ITEM}_rebuild"]
+    daily_tmp.drop()
+    totals_tmp.drop()
+    by_item_tmp.drop()
+    daily_tmp.create_indexes([IndexModel(DAILY_KEY, unique=True)])
+    by_item_tmp.create_indexes([IndexModel(BY_ITEM_REVENUE_KEY)])
+
+    docs = [
+        {"date": date, "item_id": item_id, "in_or_out": in_or_out, **counters}
+        for (date, item_id, in_or_out), counters in daily.items()
+    ]
+    for start in range(0, len(docs), batch_size):
+        daily_tmp.insert_many(docs[start:start + batch_size], ordered=False)
+    total_docs = [{"_id": in_or_out, **counters} for in_or_out, counters in totals.items()]
+    if total_docs:
+        totals_tmp.insert_many(total_docs)
+    item_docs = [{"_id": item_name, **counters} for item_name, counters in by_item.items()]
+    for start in range(0, len(item_docs), batch_size):
+        by_item_tmp.insert_many(item_docs[start:start + batch_size], ordered=False)
+    return {DAILY: docs, TOTALS: total_docs, BY_ITEM: item_docs}
+
+
+def rebuild_rollups(db, batch_size=5000, attempts=3):
+    """Recomputes the rollup collections from the full ``orders`` history.
+
+    The new rollups are built in scratch collections and renamed over the
+    live ones, so readers never see a half-built result. Increments written
+    to the live rollups while the rebuild runs would be overwritten, and
+    their pending marks cleared, so the data version is compared before and
+    after the build: if a sale bumped it, the build is redone, up to
+    ``attempts`` times before RollupRebuildError is raised. A sale landing
+    between that check and the rename is still lost, so run full rebuilds
+    during a quiet period and prefer ``apply_pending_rollups`` otherwise.
+    """
+    for _ in range(attempts):
+        version = get_version(db, DATA)
+        built = _build_scratch_rollups(db, batch_size)
+        if get_version(db, DATA) == version:
+            break
+    else:
+        for name in ROLLUPS:
+            db[f"{name}_rebuild"].drop()
+        raise RollupRebuildError(f"Orders kept changing during {attempts} rebuild attempts")
+
+    for name in ROLLUPS:
+        if built[name]:
+            db[f"{name}_rebuild"].rename(name, dropTarget=True)
+        else:
+            db[f"{name}_rebuild"].drop()
+            db[name].drop()
+    # The rebuild counted every order line, including those with pending rollups
+    db.orders.update_many({PENDING_FIELD: {"$exists": True}}, {"$unset": {PENDING_FIELD: ""}})
+    bump_version(db, DATA)
+    return {"daily": len(built[DAILY]), "order_types": len(built[TOTALS]), "items": len(built[BY_ITEM])}
+
+
+def daily_sales_pipeline(start):
+    """Aggregation over ``sales_daily`` returning the quantity sold per day since ``start``."""
+    return [
+        {"$match": {"date": {"$gte": start.isoformat()}}},
+        {"$group": {"_id": "$date", "quantity": {"$sum": "$quantity"}}},
+    ]
+
+
+def stats_window(today):
+    """Returns the last seven days (including today) and the first date the stats need."""
+    week_days = [today - timedelta(days=i) for i in range(6, -1, -1)]  # last 7 days including today
+    return week_days, min(week_days[0], today.replace(month=1, day=1))
+
+
+TOTALS_QUANTITY_PROJECTION = {"quantity": 1}
+DISTRIBUTION_QUERY = {"_id": {"$in": ORDER_TYPES}}
+
+
+def summarize_sales_stats(daily_rows, totals, today):
+    """Computes the weekly, monthly, yearly and total figures from rollup query results."""
+    week_days, _ = stats_window(today)
+    sales_this_week = {day.strftime("%a"): 0 for day in week_days}
+    sales_month = 0
+    sales_year = 0
+
+    for row in daily_rows:
+        date = datetime.strptime(row["_id"], "%Y-%m-%d").date()
+        quantity = row["quantity"]
+
+        # Weekly
+        if week_days[0] <= date <= today:
+            sales_this_week[date.strftime("%a")] += quantity
+
+        # Monthly
+        if date.month == today.month and date.year == today.year:
+            sales_month += quantity
+
+        # Yearly
+        if date.year == today.year:
+            sales_year += quantity
+
+    return {
+        "weekly_sales": sales_this_week,
+        "sales_month": sales_month,
+        "sales_year": sales_year,
+        # Overall
+        "sales_total": sum(doc.get("quantity", 0) for doc in totals),
+    }
+
+
+def sales_stats(db, today):
+    """Computes the weekly, monthly, yearly and total sales shown on the dashboard."""
+    _, start = stats_window(today)
+    daily_rows = db[DAILY].aggregate(daily_sales_pipeline(start))
+    totals = db[TOTALS].find({}, TOTALS_QUANTITY_PROJECTION).sort("_id", ASCENDING)
+    return summarize_sales_stats(daily_rows, totals, today)
+
+
+def summarize_distribution(totals):
+    """Maps each order type to its number of order lines."""
+    return {doc["_id"]: doc.get("lines", 0) for doc in totals}
+
+
+BY_ITEM_REVENUE_PROJECTION = {"revenue": 1}
+
+
+def summarize_sales_by_item(docs):
+    """Shapes per-item rollups as the sales chart expects: item name and total sales, highest first."""
+    return [{"_id": doc["_id"], "total_sales": doc.get("revenue", 0)} for doc in docs]
+
+
+def sales_by_item(db):
+    """Returns the total sales amount per menu item, read in revenue order from its index."""
+    return summarize_sales_by_item(
+        db[BY_ITEM].find({}, BY_ITEM_REVENUE_PROJECTION).sort(BY_ITEM_REVENUE_KEY)
+    )
+
+
+def sales_distribution(db):
+    """Counts order lines per order type (Dine-In, Takeout)."""
+    return summarize_distribution(db[TOTALS].find(DISTRIBUTION_QUERY, {"lines": 1}))
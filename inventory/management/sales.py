@@ -0,0 +1,202 @@
+"""Sale processing engine used by the add_sale view.
+
+A ticket is resolved with a constant number of round trips: items and recipes
+come from the workspace catalog cache (one version read), all ingredient
+deductions go out as one guarded ``bulk_write``, the order lines as one
+``insert_many`` and the sales rollups as one ``$inc`` batch per rollup.
+"""
+import logging
+import uuid
+
+from django.conf import settings
+from django.utils.timezone import now
+from pymongo import UpdateOne
+
+from .catalog import catalog_cache
+from .order_dates import to_utc
+from .rollups import RollupError, apply_rollups, mark_pending_rollups
+from .versions import DATA, bump_version
+
+logger = logging.getLogger(__name__)
+
+
+class SaleError(Exception):
+    """Raised when a sale cannot be recorded; carries the HTTP status to return."""
+
+    def __init__(self, message, status=400):
+        super().__init__(message)
+        self.message = message
+        self.status = status
+
+
+def parse_sale_lines(items):
+    """Validates the ticket lines and returns them as (item_name, quantity) pairs."""
+    lines = []
+    for entry in items:
+        item_name = entry.get("item_name")
+        quantity = int(entry.get("quantity", 0))
+
+        if not item_name or quantity <= 0:
+            raise SaleError(f"Invalid item or quantity: {item_name}", 400)
+
+        lines.append((item_name, quantity))
+    return lines
+
+
+def resolve_lines(db, lines):
+    """Looks up every item and recipe on the ticket in the workspace catalog."""
+    catalog = catalog_cache.get(db)
+
+    resolved = []
+    for item_name, quantity in lines:
+        item = catalog.items_by_name.get(item_name)
+        if not item:
+            raise SaleError(f"Item not found: {item_name}", 404)
+
+        sku = item.get("sku")
+        if not sku:
+            raise SaleError(f"SKU not found for item: {item_name}", 500)
+
+        recipe_items = catalog.recipes_by_sku.get(sku)
+        if not recipe_items:
+            raise SaleError(f"No recipe found for item: {item_name}", 404)
+        resolved.append((item, quantity, recipe_items))
+    return resolved
+
+
+def ingredient_demand(resolved):
+    """Sums the quantity needed of every ingredient across the whole ticket."""
+    demand = {}
+    for _, quantity, recipe_items in resolved:
+        for recipe_item in recipe_items:
+            ing_id = recipe_item.get("ing_id")
+            demand[ing_id] = demand.get(ing_id, 0) + recipe_item.get("quantity", 0) * quantity
+    return demand
+
+
+def build_order_records(resolved, order_id, cust_name, in_or_out):
+    """Builds one order document per ticket line, stamped with the item's name, SKU and price at sale time."""
+    sold_at = now()
+    return [
+        {
+            "row_id": str(uuid.uuid4()),
+            "order_id": order_id,
+            "date": sold_at.isoformat(),
+            "ts": to_utc(sold_at),
+            "item_id": item.get("item_id"),
+            "item_name": item["item_name"],
+            "sku": item.get("sku"),
+            "item_price": item.get("item_price"),
+            "quantity": quantity,
+            "cust_name": cust_name,
+            "in_or_out": in_or_out,
+        }
+        for item, quantity, _ in resolved
+    ]
+
+
+def stock_guard(ing_id, needed):
+    """Filter matching an ingredient only while its stock covers ``needed``."""
+    return {"ing_id": ing_id, "quantity": {"$gte": needed}}
+
+
+def _short_ingredient(db, demand, session=None):
+    """Returns the first ingredient whose stock cannot cover the demand."""
+    stock = {
+        inv["ing_id"]: inv.get("quantity", 0)
+        for inv in db.inventory.find(
+            {"ing_id": {"$in": list(demand)}}, {"_id": 0, "ing_id": 1, "quantity": 1}, session=session
+        )
+    }
+    for ing_id, needed in demand.items():
+        if ing_id not in stock or stock[ing_id] < needed:
+            return ing_id
+    return next(iter(demand))
+
+
+def _apply_in_transaction(db, demand, records):
+    """Deducts stock and inserts the order lines inside one multi-document transaction."""
+
+    def callback(session):
+        result = db.inventory.bulk_write(
+            [
+                UpdateOne(stock_guard(ing_id, needed), {"$inc": {"quantity": -needed}})
+                for ing_id, needed in demand.items()
+            ],
+            session=session,
+        )
+        if result.matched_count < len(demand):
+            ing_id = _short_ingredient(db, demand, session=session)
+            raise SaleError(f"Not enough stock for ingredient: {ing_id}", 400)
+        db.orders.insert_many(records, session=session)
+        apply_rollups(db, records, session=session)
+
+    with db.client.start_session() as session:
+        session.with_transaction(callback)
+
+
+def _apply_with_compensation(db, demand, records):
+    """Deducts stock with guarded updates and reverts them if any guard or the insert fails.
+
+    Each deduction tags the inventory document with a per-sale token so a
+    partial failure can undo exactly the updates that were applied. Once the
+    order lines are stored the sale is kept: rollups that fail to apply are
+    marked on the lines for ``apply_pending_rollups``.
+    """
+    token = str(uuid.uuid4())
+    result = db.inventory.bulk_write([
+        UpdateOne(
+            stock_guard(ing_id, needed),
+            {"$inc": {"quantity": -needed}, "$addToSet": {"pending_sales": token}},
+        )
+        for ing_id, needed in demand.items()
+    ])
+
+    def revert():
+        db.inventory.bulk_write([
+            UpdateOne(
+                {"ing_id": ing_id, "pending_sales": token},
+                {"$inc": {"quantity": needed}, "$pull": {"pending_sales": token}},
+            )
+            for ing_id, needed in demand.items()
+        ])
+
+    if result.matched_count < len(demand):
+        revert()
+        ing_id = _short_ingredient(db, demand)
+        raise SaleError(f"Not enough stock for ingredient: {ing_id}", 400)
+
+    try:
+        db.orders.insert_many(records)
+    except Exception:
+        revert()
+        raise
+
+    db.inventory.update_many(
+        {"ing_id": {"$in": list(demand)}, "pending_sales": token},
+        {"$pull": {"pending_sales": token}},
+    )
+    try:
+        apply_rollups(db, records)
+    except RollupError as e:
+        # The sale stands; the order lines remember which rollups they still owe
+        logger.exception("Rollups failed for order %s", records[0]["order_id"])
+        mark_pending_rollups(db, records, e.pending)
+
+
+def record_sale(db, order_id, cust_name, in_or_out, items):
+    """Validates a ticket, deducts its ingredients and stores its order lines.
+
+    Raises SaleError when the ticket is invalid or stock is insufficient; in
+    that case no inventory is deducted and no order line is written.
+    """
+    resolved = resolve_lines(db, parse_sale_lines(items))
+    demand = ingredient_demand(resolved)
+    records = build_order_records(resolved, order_id, cust_name, in_or_out)
+
+    if getattr(settings, "SALE_USE_TRANSACTIONS", False):
+        _apply_in_transaction(db, demand, records)
+    else:
+        _apply_with_compensation(db, demand, records)
+    bump_version(db, DATA)
+    return records
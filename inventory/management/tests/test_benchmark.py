@@ -0,0 +1,35 @@
+"""Tests for the scratch workspaces seeded by the benchmark suite."""
+from django.contrib.auth.hashers import check_password
+
+from management import mongo
+from management.benchmark import create_bench_login, drop_workspace, seed_workspace
+
+from .utils import MongoTestCase
+
+SCALE = {"items": 3, "ingredients": 5, "recipe_lines": 2, "orders": 20}
+
+
+class BenchWorkspaceTests(MongoTestCase):
+
+    def setUp(self):
+        super().setUp()
+        self.client = mongo.get_client()
+        self.workplaces = mongo.get_main_db()["workplaces"]
+
+    def test_seeding_creates_no_login(self):
+        seed_workspace(self.client, "bench_test", SCALE)
+
+        self.assertEqual(self.client["bench_test"].orders.count_documents({}), 20)
+        self.assertEqual(self.workplaces.count_documents({}), 0)
+
+    def test_login_is_random_by_default_and_dropped_with_the_workspace(self):
+        seed_workspace(self.client, "bench_test", SCALE)
+        self.workplaces.insert_one({"name": "other", "email": "owner@example.com"})
+        email, password = create_bench_login(self.client, "bench_test")
+
+        self.assertNotEqual(password, "bench")
+        self.assertTrue(check_password(password, self.workplaces.find_one({"email": email})["password"]))
+
+        drop_workspace(self.client, "bench_test")
+        self.assertNotIn("bench_test", self.client.list_database_names())
+        self.assertEqual([w["email"] for w in self.workplaces.find()], ["owner@example.com"])
@@ -0,0 +1,57 @@
+"""Tests for the version-validated workspace catalog cache."""
+from management.catalog import CatalogCache, bump_catalog_version, catalog_cache
+from management.versions import CATALOG, bump_version
+
+from .utils import MongoTestCase
+
+
+class CatalogCacheTests(MongoTestCase):
+
+    def setUp(self):
+        super().setUp()
+        self.seed_catalog()
+        self.cache = CatalogCache()
+
+    def test_snapshot_is_reused_while_the_version_is_unchanged(self):
+        first = self.cache.get(self.db)
+        second = self.cache.get(self.db)
+
+        self.assertIs(first, second)
+        self.assertEqual(self.cache.stats()["hits"], 1)
+        self.assertEqual(self.cache.stats()["misses"], 1)
+        self.assertEqual(first.items_by_name["Latte"]["sku"], "LAT")
+        self.assertEqual([line["ing_id"] for line in first.recipes_by_sku["LAT"]], ["ING1", "ING2"])
+
+    def test_version_bump_from_another_worker_refetches(self):
+        self.cache.get(self.db)
+        self.db["items"].insert_one({"item_id": "IT3", "item_name": "Scone", "sku": "SCO", "item_price": 3.0})
+        # Another process bumped the counter; this cache was never told directly
+        bump_version(self.db, CATALOG)
+
+        catalog = self.cache.get(self.db)
+        self.assertIn("Scone", catalog.items_by_name)
+        self.assertEqual(self.cache.stats()["misses"], 2)
+
+    def test_unbumped_writes_are_not_seen(self):
+        self.cache.get(self.db)
+        self.db["items"].insert_one({"item_id": "IT3", "item_name": "Scone", "sku": "SCO"})
+        self.assertNotIn("Scone", self.cache.get(self.db).items_by_name)
+
+    def test_bump_catalog_version_invalidates_the_process_cache(self):
+        before = catalog_cache.get(self.db)
+        self.db["items"].update_one({"item_id": "IT1"}, {"$set": {"item_price": 4.5}})
+        bump_catalog_version(self.db)
+
+        after = catalog_cache.get(self.db)
+        self.assertIsNot(before, after)
+        self.assertEqual(after.items_by_id["IT1"]["item_price"], 4.5)
+
+    def test_least_recently_used_workspace_is_evicted(self):
+        cache = CatalogCache(max_workspaces=1)
+        other = self.db.client["other_workspace"]
+        cache.get(self.db)
+        cache.get(other)
+
+        self.assertEqual(cache.stats()["workspaces"], 1)
+        cache.get(self.db)
+        self.assertEqual(cache.stats()["misses"], 3)
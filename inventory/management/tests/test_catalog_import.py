@@ -0,0 +1,148 @@
+"""Tests for bulk ingestion of stock receipts, menu items and recipe rows."""
+import os
+import tempfile
+from io import StringIO
+
+from django.conf import settings
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import CommandError, call_command
+from django.test.utils import override_settings
+from django.urls import reverse
+
+from management.benchmark import logged_in_client
+from management.catalog_import import ingest
+from management.versions import CATALOG, DATA, get_version
+
+from .utils import WORKSPACE, MongoTestCase
+
+
+class IngestTests(MongoTestCase):
+
+    def setUp(self):
+        super().setUp()
+        self.seed_catalog()
+
+    def test_receipts_are_coalesced_into_one_increment(self):
+        report = ingest(self.db, "inventory", [
+            {"ing_id": "ING1", "quantity": "250"},
+            {"ing_id": "ING1", "quantity": 50, "ing_meas": "ml"},
+            {"name": "Sugar", "quantity": "1.5", "ing_id": ""},
+        ])
+
+        self.assertEqual((report["rows_read"], report["rows_rejected"], report["operations"]), (3, 0, 2))
+        self.assertEqual((report["upserted"], report["modified"]), (1, 1))
+        self.assertEqual(self.stock("ING1"), 1300)
+        self.assertEqual(self.db.inventory.find_one({"name": "Sugar"})["quantity"], 1.5)
+        self.assertEqual(get_version(self.db, DATA), 1)
+        self.assertEqual(get_version(self.db, CATALOG), 0)
+
+    def test_invalid_rows_are_reported_with_their_numbers(self):
+        report = ingest(self.db, "inventory", [
+            {"quantity": 5},
+            {"ing_id": "ING3", "quantity": "lots"},
+            "ING3,5",
+            {"ing_id": "ING3", "quantity": "0"},
+            {"ing_id": "ING3", "quantity": -40},
+            {"ing_id": "ING3", "quantity": "nan"},
+            {"ing_id": "ING3", "quantity": 5},
+        ])
+
+        self.assertEqual(report["rows_rejected"], 6)
+        self.assertEqual(report["errors"], [
+            {"row": 1, "error": "Missing ing_id or name"},
+            {"row": 2, "error": "quantity is not a number: 'lots'"},
+            {"row": 3, "error": "Row is not an object"},
+            {"row": 4, "error": "quantity received must be positive: '0'"},
+            {"row": 5, "error": "quantity received must be positive: -40"},
+            {"row": 6, "error": "quantity is not a number: 'nan'"},
+        ])
+        self.assertEqual(self.stock("ING3"), 255)
+
+    def test_items_and_recipes_keep_the_last_row_and_bump_the_catalog(self):
+        report = ingest(self.db, "items", [
+            {"item_id": "IT1", "item_name": "Latte", "sku": "LAT", "item_price": "4.25"},
+            {"item_id": "IT1", "item_name": "Latte", "sku": "LAT", "item_price": "4.5", "item_size": "L"},
+            {"item_id": "IT3", "item_name": "Scone", "sku": "SCO"},
+        ])
+        self.assertEqual(report["errors"], [{"row": 3, "error": "Missing item_price"}])
+        latte = self.db["items"].find_one({"item_id": "IT1"})
+        self.assertEqual((latte["item_price"], latte["item_size"]), (4.5, "L"))
+        self.assertEqual(get_version(self.db, CATALOG), 1)
+
+        report = ingest(self.db, "recipe", [
+            {"sku": "LAT", "ing_id": "ING1", "quantity": "220"},
+            {"sku": "SCO", "ing_id": "ING3", "quantity": "80", "recipe_id": "R9"},
+            {"sku": "SCO", "quantity": "80"},
+        ])
+        self.assertEqual(report["errors"], [{"row": 3, "error": "Missing ing_id"}])
+        self.assertEqual(self.db.recipe.find_one({"sku": "LAT", "ing_id": "ING1"})["quantity"], 220)
+        self.assertEqual(self.db.recipe.find_one({"sku": "SCO"})["recipe_id"], "R9")
+        self.assertEqual(get_version(self.db, CATALOG), 2)
+
+    def test_nothing_valid_writes_nothing(self):
+        report = ingest(self.db, "recipe", [{"sku": "LAT"}])
+        self.assertEqual(report["operations"], 0)
+        self.assertEqual(get_version(self.db, CATALOG), 0)
+
+        with self.assertRaises(ValueError):
+            ingest(self.db, "orders", [])
+
+
+@override_settings(
+    SESSION_ENGINE="django.contrib.sessions.backends.signed_cookies",
+    ALLOWED_HOSTS=[*settings.ALLOWED_HOSTS, "testserver"],
+)
+class BulkCatalogViewTests(MongoTestCase):
+
+    def setUp(self):
+        super().setUp()
+        self.seed_catalog()
+        self.client = logged_in_client(WORKSPACE)
+
+    def test_json_body_and_csv_upload(self):
+        response = self.client.post(
+            reverse("bulk_catalog", args=["inventory"]),
+            {"rows": [{"ing_id": "ING2", "quantity": 10}]}, content_type="application/json",
+        )
+        self.assertEqual(response.json()["operations"], 1)
+
+        upload = SimpleUploadedFile("receipts.csv", b"ing_id,quantity\nING2,5\n")
+        response = self.client.post(reverse("bulk_catalog", args=["inventory"]), {"file": upload})
+        self.assertEqual(response.json()["rows_read"], 1)
+        self.assertEqual(self.stock("ING2"), 115)
+
+    def test_unreadable_upload_is_a_client_error(self):
+        upload = SimpleUploadedFile("receipts.csv", b"ing_id,quantity\nING2,5\n\xff\xfe,1\n")
+        response = self.client.post(reverse("bulk_catalog", args=["inventory"]), {"file": upload})
+
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(response.json(), {"error": "File is not UTF-8 text"})
+        self.assertEqual(self.stock("ING2"), 100)
+
+    def test_unknown_kind(self):
+        response = self.client.post(reverse("bulk_catalog", args=["orders"]), {}, content_type="application/json")
+        self.assertEqual(response.status_code, 404)
+
+
+class IngestCatalogCommandTests(MongoTestCase):
+
+    def setUp(self):
+        super().setUp()
+        self.seed_catalog()
+
+    def ingest_file(self, content):
+        with tempfile.NamedTemporaryFile("wb", suffix=".csv", delete=False) as f:
+            f.write(content)
+        self.addCleanup(os.remove, f.name)
+        out = StringIO()
+        call_command("ingest_catalog", WORKSPACE, "inventory", f.name, stdout=out)
+        return out.getvalue()
+
+    def test_applies_the_file(self):
+        self.assertIn("Applied 1 of 1 inventory rows", self.ingest_file(b"ing_id,quantity\nING2,5\n"))
+        self.assertEqual(self.stock("ING2"), 105)
+
+    def test_unreadable_file_is_a_command_error(self):
+        with self.assertRaisesMessage(CommandError, "File is not UTF-8 text; nothing was applied"):
+            self.ingest_file(b"ing_id,quantity\nING2,5\n\xff\xfe,1\n")
+        self.assertEqual(self.stock("ING2"), 100)
@@ -0,0 +1,60 @@
+"""Tests for the /dashboard_data/ bundle and its query pool."""
+import contextvars
+import threading
+from datetime import datetime
+
+from django.test import SimpleTestCase
+
+from management.dashboard import QueryPool, dashboard_data
+from management.sales import record_sale
+
+from .utils import MongoTestCase
+
+request_id = contextvars.ContextVar("request_id", default=None)
+
+
+class QueryPoolTests(SimpleTestCase):
+
+    def test_runs_in_the_caller_thread_when_the_pool_is_busy(self):
+        pool = QueryPool(1)
+        release = threading.Event()
+        request_id.set("req-1")
+
+        busy = pool.submit(lambda: (release.wait(5), threading.current_thread().name, request_id.get()))
+        inline = pool.submit(lambda: (threading.current_thread().name, request_id.get()))
+
+        self.assertEqual(inline.result(timeout=1), (threading.current_thread().name, "req-1"))
+        release.set()
+        _, thread_name, seen_id = busy.result(timeout=5)
+        self.assertTrue(thread_name.startswith("dashboard"))
+        self.assertEqual(seen_id, "req-1")
+
+    def test_pool_thread_is_reused_once_idle(self):
+        pool = QueryPool(1)
+        pool.submit(lambda: None).result(timeout=5)
+        self.assertTrue(pool.submit(threading.current_thread).result(timeout=5).name.startswith("dashboard"))
+
+    def test_inline_errors_surface_from_result(self):
+        pool = QueryPool(1)
+        release = threading.Event()
+        pool.submit(lambda: release.wait(5))
+        try:
+            failing = pool.submit(lambda: 1 / 0)
+            with self.assertRaises(ZeroDivisionError):
+                failing.result()
+        finally:
+            release.set()
+
+
+class DashboardDataTests(MongoTestCase):
+
+    def test_bundle_holds_every_widget(self):
+        self.seed_catalog()
+        record_sale(self.db, "ORD001", "Ann", "takeout", [{"item_name": "Bagel", "quantity": 2}])
+
+        bundle = dashboard_data(self.db, datetime.utcnow().date())
+        self.assertEqual(bundle["inventory_stats"], {"total_items": 3, "out_of_stock": 0, "low_stock": 0})
+        self.assertEqual(len(bundle["items"]["items"]), 2)
+        self.assertEqual(bundle["sales_stats"]["sales_total"], 2)
+        self.assertEqual(bundle["sales_distribution"], {"sales_types": {"takeout": 1}})
+        self.assertEqual(dict(zip(bundle["inventory_data"]["labels"], bundle["inventory_data"]["inventory"]))["ING3"], 50)
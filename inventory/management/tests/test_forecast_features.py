@@ -0,0 +1,76 @@
+"""Tests for the incremental forecast feature store."""
+from datetime import datetime, timedelta
+from unittest import mock
+
+from mongomock.collection import Collection
+
+from management.mlload import (
+    FEATURES_COLLECTION, WATERMARK_ID, rebuild_feature_state, store_item_states, update_feature_state,
+)
+
+from .utils import MongoTestCase
+
+START = datetime(2025, 3, 1, 12, 0)
+
+
+class FeatureStateTests(MongoTestCase):
+
+    def setUp(self):
+        super().setUp()
+        self.db.orders.insert_many([
+            {"ts": START + timedelta(days=day), "item_id": "IT1", "quantity": 1} for day in range(3)
+        ])
+        rebuild_feature_state(self.db, cutoff=START + timedelta(days=3))
+        # Three lines on a new day, after the watermark
+        self.db.orders.insert_many([
+            {"ts": START + timedelta(days=3, hours=hours), "item_id": "IT1", "quantity": 1} for hours in (1, 2, 3)
+        ])
+        self.cutoff = START + timedelta(days=4)
+
+    def days(self):
+        state = self.db[FEATURES_COLLECTION].find_one({"_id": "IT1"})
+        return [(day["date"], day["quantity"]) for day in state["days"]]
+
+    def watermark(self):
+        return self.db.meta.find_one({"_id": WATERMARK_ID})["ts"]
+
+    def test_folds_new_orders_and_moves_the_watermark(self):
+        update_feature_state(self.db, cutoff=self.cutoff)
+
+        self.assertEqual(self.days(), [
+            ("2025-03-01", 1), ("2025-03-02", 1), ("2025-03-03", 1), ("2025-03-04", 3),
+        ])
+        self.assertEqual(self.watermark(), self.cutoff)
+
+    def test_failed_state_write_leaves_the_watermark(self):
+        with mock.patch.object(Collection, "bulk_write", side_effect=RuntimeError("write failed")):
+            with self.assertRaises(RuntimeError):
+                update_feature_state(self.db, cutoff=self.cutoff)
+        self.assertEqual(self.watermark(), START + timedelta(days=3))
+
+        update_feature_state(self.db, cutoff=self.cutoff)
+        self.assertEqual(self.days()[-1], ("2025-03-04", 3))
+
+    def test_run_dying_before_the_watermark_is_not_counted_twice(self):
+        update_one = Collection.update_one
+
+        def fail_watermark(collection, filter, *args, **kwargs):
+            if filter.get("_id") == WATERMARK_ID:
+                raise RuntimeError("connection lost")
+            return update_one(collection, filter, *args, **kwargs)
+
+        with mock.patch.object(Collection, "update_one", autospec=True, side_effect=fail_watermark):
+            with self.assertRaises(RuntimeError):
+                update_feature_state(self.db, cutoff=self.cutoff)
+        self.assertEqual(self.watermark(), START + timedelta(days=3))
+
+        update_feature_state(self.db, cutoff=self.cutoff + timedelta(hours=1))
+        self.assertEqual(self.days()[-1], ("2025-03-04", 3))
+        self.assertEqual(self.watermark(), self.cutoff + timedelta(hours=1))
+
+    def test_older_state_never_replaces_a_newer_one(self):
+        update_feature_state(self.db, cutoff=self.cutoff)
+        stale = {"_id": "IT1", "days": [], "ts": START + timedelta(days=3)}
+
+        store_item_states(self.db, [stale], START + timedelta(days=3))
+        self.assertEqual(self.days()[-1], ("2025-03-04", 3))
@@ -0,0 +1,58 @@
+"""Import-time regression tests for worker boot.
+
+No heavy dependency may be imported by django.setup() plus URL
+resolution, and the summed import time must stay within a budget. Boot
+takes about 400 ms here and took about 1150 ms while views.py imported
+matplotlib, so the default budget leaves room for slower machines while
+still catching that kind of regression; ``IMPORT_TIME_BUDGET_MS``
+overrides it.
+"""
+import os
+import subprocess
+import sys
+
+from django.conf import settings
+from django.test import SimpleTestCase
+
+# Worker boot: django.setup() plus URL resolution, summed over every module imported
+IMPORT_TIME_BUDGET_MS = int(os.environ.get("IMPORT_TIME_BUDGET_MS", "1000"))
+BOOT_SNIPPET = "import django; django.setup(); from django.urls import resolve; resolve('/dashboard/')"
+# Only loaded by the forecast job, the restocking report and the commands that need them
+LAZY_MODULES = {"matplotlib", "pandas", "numpy", "joblib", "sklearn"}
+
+
+def import_times(code):
+    """Runs ``code`` under ``-X importtime``; returns ``{module: self_microseconds}``."""
+    env = {**os.environ, "DJANGO_SETTINGS_MODULE": settings.SETTINGS_MODULE, "MONGO_ENSURE_INDEXES_ON_STARTUP": "0"}
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", code],
+        cwd=settings.BASE_DIR, env=env, capture_output=True, text=True, check=True,
+    )
+    times = {}
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        self_us, _, module = line[len("import time:"):].split("|")
+        times[module.strip()] = int(self_us)
+    return times
+
+
+class ImportTimeTests(SimpleTestCase):
+    """Worker boot stays cheap: no heavy dependencies and within the time budget."""
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.times = import_times(BOOT_SNIPPET)
+
+    def test_heavy_modules_are_lazy(self):
+        loaded = {module.split(".")[0] for module in self.times}
+        self.assertFalse(loaded & LAZY_MODULES, f"imported at boot: {sorted(loaded & LAZY_MODULES)}")
+
+    def test_import_time_budget(self):
+        total_ms = sum(self.times.values()) / 1000
+        slowest = sorted(self.times.items(), key=lambda item: item[1], reverse=True)[:10]
+        self.assertLessEqual(
+            total_ms, IMPORT_TIME_BUDGET_MS,
+            f"boot imports took {total_ms:.0f} ms; slowest: {slowest}",
+        )
@@ -0,0 +1,49 @@
+"""Tests for the workspace index spec and the sync_indexes command."""
+from io import StringIO
+from unittest import mock
+
+from django.core.management import CommandError, call_command
+from pymongo import ASCENDING, DESCENDING
+from pymongo.errors import OperationFailure
+
+from management.indexes import INDEX_SPEC, ensure_indexes, index_drift, sync_indexes
+
+from .utils import WORKSPACE, MongoTestCase
+
+
+class SyncIndexesTests(MongoTestCase):
+
+    def test_fresh_database_has_no_drift_after_ensure(self):
+        self.assertEqual(set(index_drift(self.db)), set(INDEX_SPEC))
+        ensure_indexes(self.db)
+        self.assertEqual(index_drift(self.db), {})
+
+    def test_conflicting_definitions_are_replaced(self):
+        ensure_indexes(self.db)
+        # Same name, different key; and a spec key under a foreign name
+        self.db.inventory.drop_index("ing_id_1")
+        self.db.inventory.create_index([("ing_id", DESCENDING)], name="ing_id_1")
+        self.db.recipe.drop_index("sku_1")
+        self.db.recipe.create_index([("sku", ASCENDING)], name="by_sku")
+        self.db.recipe.create_index([("ing_id", ASCENDING)], name="ops_ing_id")
+
+        self.assertEqual(index_drift(self.db)["inventory"]["mismatched"], ["ing_id_1"])
+        self.assertEqual(sync_indexes(self.db), {"inventory": ["ing_id_1"], "recipe": ["by_sku"]})
+        self.assertEqual(index_drift(self.db), {"recipe": {"missing": [], "mismatched": [], "extra": ["ops_ing_id"]}})
+
+    def test_command_reports_drift_and_continues_past_failures(self):
+        self.db.inventory.create_index([("ing_id", DESCENDING)], name="ing_id_1")
+        out, err = StringIO(), StringIO()
+
+        def sync(db):
+            if db.name == "broken":
+                raise OperationFailure("Index build failed", code=85)
+            return sync_indexes(db)
+
+        with mock.patch("management.management.commands.sync_indexes.sync_indexes", side_effect=sync), \
+                self.assertRaisesMessage(CommandError, "1 workspace(s): broken"):
+            call_command("sync_indexes", "broken", WORKSPACE, stdout=out, stderr=err)
+
+        self.assertIn("broken: Index build failed", err.getvalue())
+        self.assertIn(f"{WORKSPACE}.inventory: mismatched ing_id_1", out.getvalue())
+        self.assertEqual(index_drift(self.db), {})
@@ -0,0 +1,72 @@
+"""Tests for the restocking forecast jobs and the view serving them."""
+from datetime import datetime, timedelta
+from unittest import mock
+
+from django.conf import settings
+from django.test.utils import override_settings
+from django.urls import reverse
+
+from management.benchmark import logged_in_client
+from management.jobs import JOBS_COLLECTION, RESTOCKING_JOB, job_payload, request_forecast, run_restocking_job
+
+from .utils import WORKSPACE, MongoTestCase
+
+RESULT = {"item_sales_predictions": [{"item_id": "IT1", "predicted_quantity": 3}], "restocking_recommendations": []}
+
+
+@override_settings(
+    SESSION_ENGINE="django.contrib.sessions.backends.signed_cookies",
+    ALLOWED_HOSTS=[*settings.ALLOWED_HOSTS, "testserver"],
+)
+class ForecastJobTests(MongoTestCase):
+
+    def setUp(self):
+        super().setUp()
+        self.generated_at = (datetime.utcnow() - timedelta(minutes=1)).replace(microsecond=0)
+        self.db[JOBS_COLLECTION].insert_one({
+            "_id": RESTOCKING_JOB, "status": "done", "generated_at": self.generated_at,
+            "result": RESULT, "error": None,
+        })
+        executor = mock.patch("management.jobs.get_executor")
+        self.get_executor = executor.start()
+        self.addCleanup(executor.stop)
+
+    def job(self):
+        return self.db[JOBS_COLLECTION].find_one({"_id": RESTOCKING_JOB})
+
+    def test_failed_refresh_keeps_serving_the_last_result(self):
+        with mock.patch("management.mlload.run_forecast", side_effect=RuntimeError("model missing")), \
+                self.assertLogs("management.jobs", "ERROR"):
+            run_restocking_job(WORKSPACE)
+
+        job = self.job()
+        self.assertEqual(job["status"], "failed")
+        self.assertEqual(job["result"], RESULT)
+
+        response = logged_in_client(WORKSPACE).get(reverse("get_inventory_predictions"))
+        self.assertEqual(response.status_code, 200)
+        payload = response.json()
+        self.assertEqual(payload["status"], "done")
+        self.assertEqual(payload["last_error"], "model missing")
+        self.assertNotIn("error", payload)
+        self.assertEqual(payload["generated_at"], self.generated_at.isoformat())
+        self.assertEqual(payload["item_sales_predictions"], RESULT["item_sales_predictions"])
+        self.get_executor.assert_not_called()
+
+    def test_failure_without_a_result_is_an_error(self):
+        payload = job_payload({"_id": RESTOCKING_JOB, "status": "failed", "error": "model missing"})
+        self.assertEqual(payload["status"], "failed")
+        self.assertEqual(payload["error"], "model missing")
+
+    def test_stale_result_starts_one_run(self):
+        self.db[JOBS_COLLECTION].update_one(
+            {"_id": RESTOCKING_JOB}, {"$set": {"generated_at": datetime.utcnow() - timedelta(days=1)}}
+        )
+        claimed = request_forecast(self.db)
+        self.assertEqual(claimed["status"], "running")
+        self.get_executor.return_value.submit.assert_called_once_with(run_restocking_job, WORKSPACE)
+
+        # A second request while the lease is held does not start another run
+        request_forecast(self.db)
+        self.assertEqual(self.get_executor.return_value.submit.call_count, 1)
+        self.assertEqual(job_payload(self.job())["status"], "running")
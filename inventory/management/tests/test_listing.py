@@ -0,0 +1,86 @@
+"""Tests for keyset-paginated and streamed listings."""
+import json
+
+from django.test import RequestFactory
+
+from management.dashboard import INVENTORY_ITEMS_PROJECTION
+from management.listing import Listing, ListingError, decode_cursor
+from management.mongo import get_db
+from management.views import get_workspaces
+
+from .utils import MongoTestCase
+
+
+def listing(query=""):
+    return Listing.from_request(RequestFactory().get(f"/list/?{query}"))
+
+
+def streamed(response):
+    return [json.loads(line) for line in b"".join(response.streaming_content).decode().splitlines()]
+
+
+class ListingTests(MongoTestCase):
+
+    def setUp(self):
+        super().setUp()
+        self.seed_catalog()
+
+    def test_pages_follow_the_next_cursor(self):
+        first, next_cursor = listing("limit=2").page(self.db.inventory, INVENTORY_ITEMS_PROJECTION)
+        self.assertEqual([doc["name"] for doc in first], ["Milk", "Coffee beans"])
+        self.assertEqual(first[0], {"name": "Milk", "quantity": 1000})
+
+        rest, last_cursor = listing(f"after={next_cursor}&limit=2").page(self.db.inventory, INVENTORY_ITEMS_PROJECTION)
+        self.assertEqual([doc["name"] for doc in rest], ["Flour"])
+        self.assertIsNone(last_cursor)
+
+    def test_without_parameters_the_whole_listing_is_returned(self):
+        whole = listing()
+        docs, next_cursor = whole.page(self.db.inventory, INVENTORY_ITEMS_PROJECTION)
+        self.assertEqual(len(docs), 3)
+        self.assertEqual(whole.payload({"items": docs}, next_cursor), {"items": docs})
+
+    def test_stream_ends_with_the_next_cursor(self):
+        lines = streamed(listing("stream=1&limit=2").stream_response(self.db.inventory, INVENTORY_ITEMS_PROJECTION))
+        self.assertEqual([line.get("name") for line in lines[:2]], ["Milk", "Coffee beans"])
+        self.assertEqual(
+            decode_cursor(lines[2]["next"]),
+            self.db.inventory.find_one({"name": "Coffee beans"})["_id"],
+        )
+
+    def test_invalid_parameters(self):
+        for query in ("limit=0", "limit=abc", "limit=100000", "after=not-a-cursor"):
+            with self.subTest(query=query), self.assertRaises(ListingError):
+                listing(query)
+
+
+class WorkspaceListingTests(MongoTestCase):
+
+    def setUp(self):
+        super().setUp()
+        get_db("workplaces")["workplace_details"].insert_many([
+            {"workplace_name": name, "owner": "Ann"} for name in ("north", "south", "east")
+        ])
+
+    def get(self, query=""):
+        return get_workspaces(RequestFactory().get(f"/get_workspaces/?{query}"))
+
+    def test_workspaces_keep_their_fields(self):
+        workspaces = json.loads(self.get().content)["workspaces"]
+        self.assertEqual(workspaces, [
+            {"workplace_name": name, "owner": "Ann"} for name in ("north", "south", "east")
+        ])
+
+        page = json.loads(self.get("limit=2").content)
+        self.assertEqual([w["workplace_name"] for w in page["workspaces"]], ["north", "south"])
+        self.assertIsNotNone(page["next"])
+
+    def test_streamed_workspaces_keep_their_fields(self):
+        lines = streamed(self.get("stream=1"))
+        self.assertEqual(lines[0], {"workplace_name": "north", "owner": "Ann"})
+        self.assertEqual(len(lines), 3)
+
+    def test_bad_cursor_is_a_client_error(self):
+        response = self.get("after=not-a-cursor")
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(json.loads(response.content), {"error": "Invalid cursor"})
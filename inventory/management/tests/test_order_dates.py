@@ -0,0 +1,70 @@
+"""Tests for order date parsing and the normalize_order_dates command."""
+from datetime import datetime
+from io import StringIO
+
+import pandas as pd
+from django.core.management import call_command
+from django.test import SimpleTestCase
+
+from management.mlload import parse_order_dates
+from management.order_dates import order_timestamp
+from management.rollups import order_date
+
+from .utils import WORKSPACE, MongoTestCase
+
+
+class OrderTimestampTests(SimpleTestCase):
+
+    def test_legacy_dates_are_day_first(self):
+        self.assertEqual(order_timestamp({"date": "05/02/17 13:10"}), datetime(2017, 2, 5, 13, 10))
+        self.assertEqual(order_timestamp({"date": "24/02/17 13:10"}), datetime(2017, 2, 24, 13, 10))
+        self.assertEqual(order_date({"date": " 05/02/17 13:10 "}).isoformat(), "2017-02-05")
+
+    def test_iso_dates_become_naive_utc(self):
+        self.assertEqual(
+            order_timestamp({"date": "2025-05-02T18:47:28.470091+02:00"}),
+            datetime(2025, 5, 2, 16, 47, 28, 470091),
+        )
+        self.assertEqual(order_timestamp({"date": "2025-05-02T18:47:28Z"}), datetime(2025, 5, 2, 18, 47, 28))
+        self.assertEqual(order_timestamp({"date": "2025-05-02"}), datetime(2025, 5, 2))
+
+    def test_agrees_with_the_forecast_loader(self):
+        dates = ["05/02/17 13:10", "2025-05-02T18:47:28.470091+00:00", "12/11/18 09:05"]
+        loaded = parse_order_dates(pd.Series(dates, dtype=object))
+        for value, parsed in zip(dates, loaded):
+            self.assertEqual(order_timestamp({"date": value}), parsed.tz_convert(None).to_pydatetime())
+
+    def test_other_sources_and_unparseable_values(self):
+        ts = datetime(2024, 1, 1, 8, 0)
+        self.assertEqual(order_timestamp({"ts": ts, "date": "05/02/17 13:10"}), ts)
+        self.assertEqual(order_timestamp({"date": ts}), ts)
+        self.assertEqual(order_timestamp({"created_at": ts}), ts)
+        self.assertIsNone(order_timestamp({"date": "Feb 5th"}))
+        self.assertIsNone(order_timestamp({"date": 20170205}))
+        self.assertIsNone(order_timestamp({}))
+
+
+class NormalizeOrderDatesTests(MongoTestCase):
+
+    def test_migrates_orders_without_ts(self):
+        self.db.orders.insert_many([
+            {"date": "05/02/17 13:10"},
+            {"date": "2025-05-02T18:47:28+00:00"},
+            {"date": "garbage"},
+        ])
+        out = StringIO()
+        call_command("normalize_order_dates", WORKSPACE, stdout=out)
+
+        ts = [order.get("ts") for order in self.db.orders.find().sort("_id")]
+        self.assertEqual(ts, [datetime(2017, 2, 5, 13, 10), datetime(2025, 5, 2, 18, 47, 28), None])
+        self.assertIn("3 orders migrated, 1 with unparseable dates", out.getvalue())
+
+    def test_reparse_legacy_repairs_month_first_values(self):
+        self.db.orders.insert_many([
+            {"date": "05/02/17 13:10", "ts": datetime(2017, 5, 2, 13, 10)},
+            {"date": "2025-05-02T18:47:28+00:00", "ts": datetime(2025, 5, 2, 18, 47, 28)},
+        ])
+        call_command("normalize_order_dates", WORKSPACE, reparse_legacy=True, stdout=StringIO())
+
+        ts = [order["ts"] for order in self.db.orders.find().sort("_id")]
+        self.assertEqual(ts, [datetime(2017, 2, 5, 13, 10), datetime(2025, 5, 2, 18, 47, 28)])
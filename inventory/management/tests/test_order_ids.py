@@ -0,0 +1,65 @@
+"""Tests for block-allocated order IDs."""
+import os
+import threading
+from unittest import mock
+
+from management.order_ids import COUNTER_ID, OrderIdAllocator, format_order_id
+
+from .utils import MongoTestCase
+
+
+class OrderIdAllocatorTests(MongoTestCase):
+
+    def setUp(self):
+        super().setUp()
+        self.allocator = OrderIdAllocator(block_size=3)
+
+    def counter(self):
+        return self.db.counters.find_one({"_id": COUNTER_ID})["seq"]
+
+    def test_ids_come_from_one_reserved_block(self):
+        ids = [self.allocator.next_order_id(self.db) for _ in range(3)]
+
+        self.assertEqual(ids, ["ORD001", "ORD002", "ORD003"])
+        self.assertEqual(self.counter(), 3)
+        self.assertEqual((self.allocator.reservations, self.allocator.allocations), (1, 3))
+
+    def test_exhausted_block_reserves_the_next_one(self):
+        seqs = [self.allocator.next_seq(self.db) for _ in range(7)]
+
+        self.assertEqual(seqs, list(range(1, 8)))
+        self.assertEqual(self.counter(), 9)
+        self.assertEqual(self.allocator.reservations, 3)
+
+    def test_processes_never_share_a_block(self):
+        other = OrderIdAllocator(block_size=3)
+        first = [self.allocator.next_seq(self.db), other.next_seq(self.db), self.allocator.next_seq(self.db)]
+        self.assertEqual(first, [1, 4, 2])
+
+    def test_release_skips_the_rest_of_the_block(self):
+        self.allocator.next_seq(self.db)
+        self.allocator.release(self.db.name)
+        self.assertEqual(self.allocator.next_seq(self.db), 4)
+
+    def test_forked_child_drops_inherited_blocks(self):
+        self.allocator.next_seq(self.db)
+        with mock.patch("management.order_ids.os.getpid", return_value=os.getpid() + 1):
+            self.assertEqual(self.allocator.next_seq(self.db), 4)
+
+    def test_concurrent_sales_get_distinct_ids(self):
+        seqs = []
+
+        def sell():
+            for _ in range(20):
+                seqs.append(self.allocator.next_seq(self.db))
+
+        threads = [threading.Thread(target=sell) for _ in range(4)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        self.assertEqual(sorted(seqs), list(range(1, 81)))
+
+    def test_format_pads_to_three_digits(self):
+        self.assertEqual(format_order_id(7), "ORD007")
+        self.assertEqual(format_order_id(1234), "ORD1234")
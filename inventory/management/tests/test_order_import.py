@@ -0,0 +1,200 @@
+"""Tests for the bulk order import and the view serving it."""
+import csv
+import io
+from datetime import datetime
+from unittest import mock
+
+from django.conf import settings
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.test import SimpleTestCase
+from django.test.utils import override_settings
+from django.urls import reverse
+from mongomock.collection import Collection
+from pymongo.errors import AutoReconnect
+
+from management.benchmark import logged_in_client
+from management.catalog import load_catalog
+from management.order_ids import COUNTER_ID, OrderIdAllocator
+from management.mlload import FEATURES_COLLECTION, rebuild_feature_state
+from management.order_import import (
+    ImportFileError, ImportRowError, build_import_record, import_orders, read_rows, text_stream,
+)
+from management.rollups import PENDING_FIELD, TOTALS, apply_pending_rollups, rebuild_rollups, sales_by_item
+from management.sales import record_sale
+
+from .utils import WORKSPACE, MongoTestCase, rollup_state
+
+CSV = (
+    "order_id,date,item_name,quantity,in_or_out\n"
+    "ORD120,05/02/17 13:10,Latte,2,takeout\n"
+    "ORD121,2025-05-02T18:47:28+00:00,Bagel,1,dine-in\n"
+    "ORD122,not a date,Bagel,1,dine-in\n"
+)
+
+
+def stream(data):
+    return text_stream(io.BytesIO(data.encode() if isinstance(data, str) else data))
+
+
+class ReadRowsTests(SimpleTestCase):
+
+    def test_csv_and_jsonl_rows(self):
+        self.assertEqual(list(read_rows(stream("a,b\n1,2\n"), "csv")), [{"a": "1", "b": "2"}])
+        self.assertEqual(list(read_rows(stream('{"a": 1}\n\nnot json\n'), "jsonl")), [{"a": 1}, None])
+
+    def test_unreadable_input(self):
+        with self.assertRaisesMessage(ImportFileError, "File is not UTF-8 text"):
+            list(read_rows(stream(b"a,b\n\xff\xfe,2\n"), "csv"))
+        with self.assertRaisesMessage(ImportFileError, "Malformed CSV"):
+            list(read_rows(stream("a\n" + "x" * (csv.field_size_limit() + 1) + "\n"), "csv"))
+        with self.assertRaises(ValueError):
+            list(read_rows(stream(""), "xml"))
+
+
+class BuildImportRecordTests(MongoTestCase):
+
+    def setUp(self):
+        super().setUp()
+        self.seed_catalog()
+        self.catalog = load_catalog(self.db, version=None)
+
+    def build(self, **row):
+        return build_import_record({"date": "05/02/17 13:10", "item_name": "Latte", "quantity": "2", **row}, self.catalog)
+
+    def test_missing_details_come_from_the_catalog(self):
+        record = self.build(order_id="ORD007")
+        self.assertEqual(record["ts"], datetime(2017, 2, 5, 13, 10))
+        self.assertEqual(record["date"], "2017-02-05T13:10:00+00:00")
+        self.assertEqual(
+            (record["order_id"], record["item_id"], record["sku"], record["item_price"], record["quantity"]),
+            ("ORD007", "IT1", "LAT", 4.0, 2),
+        )
+        self.assertEqual(self.build(item_price="3.5")["item_price"], 3.5)
+
+    def test_quantities_must_be_positive_integers(self):
+        self.assertEqual(self.build(quantity=3.0)["quantity"], 3)
+        for quantity in (2.5, "2.5", 0, "-1", "", None):
+            with self.subTest(quantity=quantity), self.assertRaisesMessage(ImportRowError, "positive integer"):
+                self.build(quantity=quantity)
+        with self.assertRaisesMessage(ImportRowError, "quantity is not a number"):
+            self.build(quantity="two")
+
+    def test_invalid_rows(self):
+        with self.assertRaisesMessage(ImportRowError, "Unparseable date"):
+            self.build(date="yesterday")
+        with self.assertRaisesMessage(ImportRowError, "Item not found"):
+            self.build(item_name="Scone")
+        with self.assertRaisesMessage(ImportRowError, "not a JSON object"):
+            build_import_record(None, self.catalog)
+
+
+class ImportOrdersTests(MongoTestCase):
+
+    def setUp(self):
+        super().setUp()
+        self.seed_catalog()
+
+    def test_imports_valid_rows_and_reports_the_rest(self):
+        report = import_orders(self.db, stream(CSV), apply_inventory=True)
+
+        self.assertEqual((report["rows_read"], report["rows_inserted"], report["rows_rejected"]), (3, 2, 1))
+        self.assertEqual(report["errors"], [{"row": 3, "error": "Unparseable date: 'not a date'"}])
+        self.assertNotIn("error", report)
+        self.assertEqual(self.db.counters.find_one({"_id": COUNTER_ID})["seq"], 121)
+        self.assertEqual(self.stock("ING1"), 600)
+        self.assertEqual(sales_by_item(self.db), [
+            {"_id": "Latte", "total_sales": 8.0},
+            {"_id": "Bagel", "total_sales": 2.5},
+        ])
+
+    def test_counter_moves_past_imported_order_ids(self):
+        worker = OrderIdAllocator(block_size=3)
+        self.assertEqual(worker.next_seq(self.db), 1)
+        rows = "order_id,date,item_name,quantity\nORD002,05/02/17 13:10,Latte,1\nORD010,05/02/17 13:10,Latte,1\n"
+        report = import_orders(self.db, stream(rows), rebuild_features=False)
+
+        # ORD002 lies in the block the worker already holds
+        self.assertEqual(report["rows_reusing_order_ids"], 1)
+        self.assertEqual(worker.next_seq(self.db), 2)
+        self.assertEqual(OrderIdAllocator(block_size=3).next_seq(self.db), 11)
+
+    def test_unreadable_file_keeps_the_rows_before_it(self):
+        oversized = "ORD130,05/02/17 13:10,Bagel," + "1" * (csv.field_size_limit() + 1) + ",takeout\n"
+        report = import_orders(self.db, stream(CSV + oversized), rebuild_features=False)
+
+        self.assertIn("Import stopped near row 4: Malformed CSV", report["error"])
+        self.assertEqual(report["rows_inserted"], 2)
+        self.assertEqual(self.db.orders.count_documents({}), 2)
+
+    def test_batches_add_to_the_live_rollups(self):
+        record_sale(self.db, "ORD001", "Ann", "takeout", [{"item_name": "Latte", "quantity": 1}])
+        import_orders(self.db, stream(CSV), batch_size=1)
+        incremental = rollup_state(self.db)
+
+        rebuild_rollups(self.db)
+        self.assertEqual(rollup_state(self.db), incremental)
+        self.assertEqual(sales_by_item(self.db), [
+            {"_id": "Latte", "total_sales": 12.0},
+            {"_id": "Bagel", "total_sales": 2.5},
+        ])
+
+    def test_failed_rollup_write_is_left_pending(self):
+        bulk_write = Collection.bulk_write
+
+        def fail_totals(collection, requests, *args, **kwargs):
+            if collection.name == TOTALS:
+                raise AutoReconnect("connection reset")
+            return bulk_write(collection, requests, *args, **kwargs)
+
+        with mock.patch.object(Collection, "bulk_write", autospec=True, side_effect=fail_totals):
+            report = import_orders(self.db, stream(CSV))
+
+        self.assertEqual(report["rows_rollup_pending"], 2)
+        self.assertEqual(self.db.orders.count_documents({PENDING_FIELD: {"$exists": True}}), 2)
+        self.assertEqual(apply_pending_rollups(self.db), 2)
+        repaired = rollup_state(self.db)
+        rebuild_rollups(self.db)
+        self.assertEqual(rollup_state(self.db), repaired)
+
+    def test_features_are_rebuilt_only_for_lines_before_the_watermark(self):
+        rebuild_feature_state(self.db, cutoff=datetime(2020, 1, 1))
+        recent = "date,item_name,quantity\n2025-05-02T18:47:28+00:00,Bagel,1\n"
+        self.assertFalse(import_orders(self.db, stream(recent))["features_rebuilt"])
+        self.assertEqual(self.db[FEATURES_COLLECTION].count_documents({}), 0)
+
+        backdated = "date,item_name,quantity\n05/02/17 13:10,Latte,2\n"
+        self.assertTrue(import_orders(self.db, stream(backdated))["features_rebuilt"])
+        self.assertEqual(self.db[FEATURES_COLLECTION].count_documents({}), 2)
+
+
+@override_settings(
+    SESSION_ENGINE="django.contrib.sessions.backends.signed_cookies",
+    ALLOWED_HOSTS=[*settings.ALLOWED_HOSTS, "testserver"],
+)
+class ImportOrdersViewTests(MongoTestCase):
+
+    def setUp(self):
+        super().setUp()
+        self.seed_catalog()
+
+    def upload(self, content, name="orders.csv"):
+        return logged_in_client(WORKSPACE).post(
+            reverse("import_orders"), {"file": SimpleUploadedFile(name, content)}
+        )
+
+    def test_upload_is_imported(self):
+        response = self.upload(CSV.encode())
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()["rows_inserted"], 2)
+
+    def test_undecodable_upload_is_a_client_error(self):
+        response = self.upload(b"order_id,date,item_name,quantity\n\xff\xfe,05/02/17 13:10,Latte,1\n")
+        self.assertEqual(response.status_code, 400)
+        self.assertIn("File is not UTF-8 text", response.json()["error"])
+
+    @override_settings(ORDER_IMPORT_MAX_UPLOAD_BYTES=10)
+    def test_large_uploads_go_to_the_management_command(self):
+        response = self.upload(CSV.encode())
+        self.assertEqual(response.status_code, 413)
+        self.assertIn(f"manage.py import_orders {WORKSPACE}", response.json()["error"])
+        self.assertEqual(self.db.orders.count_documents({}), 0)
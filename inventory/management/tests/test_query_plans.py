@@ -0,0 +1,248 @@
+"""Query-plan regression tests for the per-request MongoDB queries.
+
+The views are driven through the test client against a scratch workspace
+on a local mongod, with a client that records every command they send.
+Each recorded read or write is then explained with ``executionStats``:
+a collection scan, or a query examining many more documents than it
+keeps, fails the test. The suite is skipped when no mongod answers on
+``MONGO_TEST_URI`` (default: ``settings.MONGO_URI``).
+
+Catalog loads (full reads of items and recipes on a catalog version
+change) are warmed up before recording; they are not per-request work.
+"""
+import json
+import os
+import random
+import unittest
+from datetime import date, datetime, timedelta
+
+from django.conf import settings
+from django.test import SimpleTestCase
+from django.test.utils import override_settings
+from django.urls import reverse
+from pymongo import MongoClient, monitoring
+from pymongo.errors import PyMongoError
+
+from management import mongo
+from management.benchmark import logged_in_client, synthetic_catalog, synthetic_orders
+from management.catalog import bump_catalog_version, catalog_cache
+from management.indexes import ensure_indexes
+from management.jobs import JOBS_COLLECTION, RESTOCKING_JOB, claimable
+from management.restocking import restocking_report
+from management.rollups import rebuild_rollups
+
+TEST_URI = os.environ.get("MONGO_TEST_URI") or getattr(settings, "MONGO_URI", "mongodb://localhost:27017/")
+SCALE = {"items": 60, "ingredients": 120, "recipe_lines": 4, "orders": 5000}
+
+# A query may examine at most this many documents per document it keeps
+MAX_EXAMINED_RATIO = 3
+PLANNED_COMMANDS = {"find", "aggregate", "update", "delete", "findAndModify", "count", "distinct"}
+NOT_EXPLAINABLE = {"lsid", "txnNumber", "autocommit", "startTransaction", "readConcern", "writeConcern",
+                   "maxTimeMS", "ordered", "bypassDocumentValidation", "comment"}
+ACCESS_STAGES = {"COLLSCAN", "FETCH", "IDHACK"}
+
+
+def mongo_available():
+    """True when a mongod answers on TEST_URI within a second."""
+    client = MongoClient(TEST_URI, serverSelectionTimeoutMS=1000)
+    try:
+        client.admin.command("ping")
+        return True
+    except PyMongoError:
+        return False
+    finally:
+        client.close()
+
+
+class CommandRecorder(monitoring.CommandListener):
+    """Keeps a copy of every command sent to one database."""
+
+    def __init__(self, database):
+        self.database = database
+        self.commands = []
+
+    def started(self, event):
+        if event.database_name == self.database and event.command_name in PLANNED_COMMANDS:
+            self.commands.append(dict(event.command))
+
+    def succeeded(self, event):
+        pass
+
+    def failed(self, event):
+        pass
+
+
+def explainable(command):
+    """Splits a recorded command into explainable single-statement commands."""
+    command = {k: v for k, v in command.items() if not k.startswith("$") and k not in NOT_EXPLAINABLE}
+    for batch in ("updates", "deletes"):
+        if batch in command:
+            return [{**command, batch: [statement]} for statement in command[batch]]
+    return [command]
+
+
+def _walk(node):
+    """Yields every plan stage under ``node``, ignoring the plans that were not chosen."""
+    if isinstance(node, dict):
+        if "stage" in node:
+            yield node
+        for key, value in node.items():
+            if key not in ("rejectedPlans", "allPlansExecution"):
+                yield from _walk(value)
+    elif isinstance(node, list):
+        for value in node:
+            yield from _walk(value)
+
+
+@override_settings(
+    SESSION_ENGINE="django.contrib.sessions.backends.signed_cookies",
+    ALLOWED_HOSTS=[*settings.ALLOWED_HOSTS, "testserver"],
+    CACHES={**settings.CACHES, "responses": {"BACKEND": "django.core.cache.backends.dummy.DummyCache"}},
+)
+class QueryPlanTests(SimpleTestCase):
+    """Every query issued by the hot views must use an index and stay selective."""
+
+    @classmethod
+    def setUpClass(cls):
+        if not mongo_available():
+            raise unittest.SkipTest(f"no mongod at {TEST_URI}")
+        super().setUpClass()
+        cls.workspace = f"explain_tests_{os.getpid()}"
+        cls.recorder = CommandRecorder(cls.workspace)
+        cls.client = MongoClient(TEST_URI, event_listeners=[cls.recorder])
+        cls.saved_client = mongo._client, mongo._client_pid
+        mongo._client, mongo._client_pid = cls.client, os.getpid()
+
+        rng = random.Random(0)
+        cls.client.drop_database(cls.workspace)
+        db = cls.client[cls.workspace]
+        ensure_indexes(db)
+        items, recipe, inventory = synthetic_catalog(SCALE, rng)
+        db["items"].insert_many(items)
+        db.recipe.insert_many(recipe)
+        db.inventory.insert_many(inventory)
+        db.orders.insert_many(list(synthetic_orders(items, SCALE["orders"], rng, datetime.utcnow())))
+        rebuild_rollups(db)
+        bump_catalog_version(db)
+        db.prediction.insert_many([
+            {"item_id": item["item_id"], "date": date.today().isoformat(), "predicted_quantity": 10**9}
+            for item in items
+        ])
+        catalog_cache.get(db)
+        cls.db = db
+        cls.item_names = [item["item_name"] for item in items]
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.client.drop_database(cls.workspace)
+        mongo._client, mongo._client_pid = cls.saved_client
+        cls.client.close()
+        super().tearDownClass()
+
+    def setUp(self):
+        self.http = logged_in_client(self.workspace)
+        self.recorder.commands.clear()
+
+    def assertPlansSelective(self, label):
+        """Explains every command recorded since setUp."""
+        commands = [c for recorded in self.recorder.commands for c in explainable(recorded)]
+        self.recorder.commands.clear()
+        self.assertTrue(commands, f"{label} sent no queries")
+        for command in commands:
+            with self.subTest(label, command=command):
+                self.assertSelective(command)
+
+    def assertSelective(self, command):
+        explain = self.db.command("explain", command, verbosity="executionStats")
+        stages = [node["stage"] for node in _walk(explain)]
+        self.assertNotIn("COLLSCAN", stages, f"collection scan for {command}")
+
+        if "aggregate" in command:
+            # The pipeline's $match/$sort is what reads the collection; measure it as a find
+            stats = self._query_stage_stats(command)
+        else:
+            stats = explain["executionStats"]
+        kept = sum(
+            node.get("nReturned", 0) for node in _walk(stats.get("executionStages", {}))
+            if node["stage"] in ACCESS_STAGES or node["stage"].startswith("EXPRESS")
+        ) or stats.get("nReturned", 0)
+        examined = stats.get("totalDocsExamined", 0)
+        self.assertLessEqual(
+            examined, MAX_EXAMINED_RATIO * max(kept, 1),
+            f"{examined} documents examined to keep {kept} for {command}",
+        )
+
+    def _query_stage_stats(self, command):
+        find = {"find": command["aggregate"], "filter": {}}
+        for stage in command["pipeline"]:
+            if "$match" in stage:
+                find["filter"] = stage["$match"]
+            elif "$sort" in stage:
+                find["sort"] = stage["$sort"]
+            else:
+                break
+        explain = self.db.command("explain", find, verbosity="executionStats")
+        self.assertNotIn("COLLSCAN", [node["stage"] for node in _walk(explain)], f"collection scan for {find}")
+        return explain["executionStats"]
+
+    def test_add_sale(self):
+        response = self.http.post(
+            reverse("add_sale"),
+            data=json.dumps({"cust_name": "explain", "in_or_out": "takeout", "items": [
+                {"item_name": name, "quantity": 2} for name in self.item_names[:3]
+            ]}),
+            content_type="application/json",
+        )
+        self.assertEqual(response.status_code, 200, response.content)
+        self.assertPlansSelective("add_sale")
+
+    def test_add_sale_out_of_stock(self):
+        line = self.db.recipe.find_one({})
+        item = self.db["items"].find_one({"sku": line["sku"]})
+        self.db.inventory.update_one({"ing_id": line["ing_id"]}, {"$set": {"quantity": 0}})
+        self.addCleanup(self.db.inventory.update_one, {"ing_id": line["ing_id"]}, {"$set": {"quantity": 10**12}})
+        self.recorder.commands.clear()
+
+        response = self.http.post(
+            reverse("add_sale"),
+            data=json.dumps({"cust_name": "explain", "in_or_out": "dine-in",
+                             "items": [{"item_name": item["item_name"], "quantity": 1}]}),
+            content_type="application/json",
+        )
+        self.assertNotEqual(response.status_code, 200)
+        self.assertPlansSelective("add_sale (insufficient stock)")
+
+    def test_add_inventory(self):
+        response = self.http.post(reverse("add_inventory"), {"item": "Ingredient 7", "quantity": 5, "item_type": "g"})
+        self.assertEqual(response.status_code, 200, response.content)
+        self.assertPlansSelective("add_inventory")
+
+    def test_sales_reads(self):
+        for name in ("get_sales_stats", "get_sales_data", "get_sales_distribution"):
+            response = self.http.get(reverse(name))
+            self.assertEqual(response.status_code, 200, response.content)
+            self.assertPlansSelective(name)
+
+    def test_restocking_view(self):
+        predictions = list(self.db.prediction.find({}, {"_id": 0}))
+        report = restocking_report(self.db, predictions)
+        self.db[JOBS_COLLECTION].replace_one({"_id": RESTOCKING_JOB}, {
+            "status": "done", "generated_at": datetime.utcnow(), "error": None,
+            "result": {"item_sales_predictions": report[0], "restocking_recommendations": report[1]},
+        }, upsert=True)
+        self.recorder.commands.clear()
+
+        response = self.http.get(reverse("get_inventory_predictions"))
+        self.assertEqual(response.status_code, 200, response.content)
+        self.assertPlansSelective("get_inventory_predictions")
+
+        # The lease claim a stale result leads to, and the report the job computes
+        self.assertSelective({
+            "findAndModify": JOBS_COLLECTION,
+            "query": claimable(datetime.utcnow()),
+            "update": {"$set": {"status": "running", "lease_until": datetime.utcnow() + timedelta(minutes=10)}},
+            "upsert": True,
+        })
+        self.recorder.commands.clear()
+        restocking_report(self.db, predictions)
+        self.assertPlansSelective("restocking_report")
@@ -0,0 +1,111 @@
+"""Tests for the versioned response cache of the workspace read endpoints."""
+import json
+
+from django.test import RequestFactory
+from django.test.utils import override_settings
+
+from management.response_cache import cached_response
+from management.responses import JsonResponse
+from management.versions import DATA, bump_version
+
+from .utils import WORKSPACE, MongoTestCase
+
+
+class CachedViewTestCase(MongoTestCase):
+
+    def setUp(self):
+        super().setUp()
+        self.calls = 0
+
+        @cached_response("test_endpoint")
+        def view(request):
+            self.calls += 1
+            if request.GET.get("fail"):
+                return JsonResponse({"error": "bad request"}, status=400)
+            return JsonResponse({"calls": self.calls, "limit": request.GET.get("limit")})
+
+        self.view = view
+
+    def get(self, path="/test/", workspace=WORKSPACE, **headers):
+        request = RequestFactory().get(path, headers=headers)
+        request.session = {"workspace": workspace} if workspace else {}
+        return self.view(request)
+
+
+class ResponseCacheTests(CachedViewTestCase):
+
+    def test_repeated_reads_are_served_from_the_cache(self):
+        first = self.get()
+        second = self.get()
+
+        self.assertEqual(self.calls, 1)
+        self.assertEqual(first.content, second.content)
+        self.assertEqual(second["Content-Type"], "application/json")
+
+    def test_data_version_bump_invalidates(self):
+        self.get()
+        bump_version(self.db, DATA)
+
+        self.assertEqual(json.loads(self.get().content)["calls"], 2)
+        self.assertEqual(self.calls, 2)
+
+    def test_query_string_is_part_of_the_key(self):
+        self.get("/test/?limit=10")
+        self.get("/test/?limit=20")
+        self.assertEqual(json.loads(self.get("/test/?limit=10").content)["limit"], "10")
+        self.assertEqual(self.calls, 2)
+
+    def test_repeated_parameters_are_part_of_the_key(self):
+        self.get("/test/?limit=1&limit=2")
+        self.get("/test/?limit=2")
+        self.get("/test/?limit=2&limit=1")
+        self.get("/test/?limit=1%262")
+        self.assertEqual(self.calls, 4)
+
+        self.get("/test/?limit=1&limit=2")
+        self.assertEqual(self.calls, 4)
+
+    def test_errors_and_oversized_responses_are_not_stored(self):
+        self.get("/test/?fail=1")
+        self.get("/test/?fail=1")
+        self.assertEqual(self.calls, 2)
+
+        with override_settings(RESPONSE_CACHE_MAX_BYTES=10):
+            self.get()
+            self.get()
+        self.assertEqual(self.calls, 4)
+
+    def test_requests_without_a_workspace_reach_the_view(self):
+        self.get(workspace=None)
+        self.get(workspace=None)
+        self.assertEqual(self.calls, 2)
+
+
+class ConditionalGetTests(CachedViewTestCase):
+
+    def test_matching_etag_answers_304_without_the_view(self):
+        etag = self.get()["ETag"]
+        response = self.get(If_None_Match=etag)
+
+        self.assertEqual(response.status_code, 304)
+        self.assertEqual(response["ETag"], etag)
+        self.assertIn("no-cache", response["Cache-Control"])
+        self.assertEqual(self.calls, 1)
+
+    def test_etag_changes_with_the_data_version(self):
+        etag = self.get()["ETag"]
+        bump_version(self.db, DATA)
+
+        response = self.get(If_None_Match=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertNotEqual(response["ETag"], etag)
+        self.assertEqual(self.calls, 2)
+
+    def test_etag_lists_and_wildcards(self):
+        etag = self.get()["ETag"]
+        self.assertEqual(self.get(If_None_Match=f'"stale", {etag}').status_code, 304)
+        self.assertEqual(self.get(If_None_Match="*").status_code, 304)
+        self.assertEqual(self.get(If_None_Match='"stale"').status_code, 200)
+
+    def test_error_responses_carry_no_etag(self):
+        self.assertFalse(self.get("/test/?fail=1").has_header("ETag"))
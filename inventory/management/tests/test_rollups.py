@@ -0,0 +1,174 @@
+"""Tests for the incrementally maintained sales rollups."""
+from datetime import date, datetime
+from io import StringIO
+from unittest import mock
+
+from django.core.management import call_command
+from mongomock.collection import Collection
+from pymongo.errors import AutoReconnect
+
+from management import rollups
+from management.catalog import catalog_cache
+from management.rollups import (
+    BY_ITEM, DAILY, PENDING_FIELD, TOTALS, RollupRebuildError, apply_pending_rollups, rebuild_rollups,
+    sales_by_item, sales_distribution, sales_stats,
+)
+from management.sales import record_sale
+from management.versions import DATA, bump_version
+
+from .utils import WORKSPACE, MongoTestCase, rollup_state
+
+
+class RollupMaintenanceTests(MongoTestCase):
+
+    def setUp(self):
+        super().setUp()
+        self.seed_catalog()
+
+    def sell(self, order_id, in_or_out, **quantities):
+        return record_sale(self.db, order_id, "Ann", in_or_out, [
+            {"item_name": name, "quantity": quantity} for name, quantity in quantities.items()
+        ])
+
+    def test_sales_update_every_rollup(self):
+        self.sell("ORD001", "takeout", Latte=2, Bagel=1)
+        self.sell("ORD002", "dine-in", Latte=1)
+
+        today = datetime.utcnow().date()
+        self.assertEqual(sales_stats(self.db, today)["sales_total"], 4)
+        self.assertEqual(sales_stats(self.db, today)["sales_year"], 4)
+        self.assertEqual(sales_distribution(self.db), {"takeout": 2, "dine-in": 1})
+        self.assertEqual(sales_by_item(self.db), [
+            {"_id": "Latte", "total_sales": 12.0},
+            {"_id": "Bagel", "total_sales": 2.5},
+        ])
+
+    def test_rebuild_matches_the_incremental_rollups(self):
+        self.sell("ORD001", "takeout", Latte=2, Bagel=1)
+        self.sell("ORD002", "dine-in", Bagel=1)
+        incremental = rollup_state(self.db)
+
+        counts = rebuild_rollups(self.db)
+        self.assertEqual(rollup_state(self.db), incremental)
+        self.assertEqual(counts, {"daily": 3, "order_types": 2, "items": 2})
+
+    def test_undated_lines_count_in_distribution_and_items_only(self):
+        self.db.orders.insert_many([
+            {"row_id": "a", "date": "05/02/17 13:10", "item_id": "IT2", "item_name": "Bagel",
+             "item_price": 2.5, "quantity": 2, "in_or_out": "takeout"},
+            {"row_id": "b", "date": "not a date", "item_id": "IT2", "item_name": "Bagel",
+             "item_price": 2.5, "quantity": 3, "in_or_out": "takeout"},
+        ])
+        rebuild_rollups(self.db)
+
+        self.assertEqual(sales_stats(self.db, date(2017, 2, 6))["sales_total"], 2)
+        self.assertEqual(sales_distribution(self.db), {"takeout": 2})
+        self.assertEqual(sales_by_item(self.db), [{"_id": "Bagel", "total_sales": 12.5}])
+
+    def test_failed_rollup_is_recorded_and_reapplied(self):
+        self.sell("ORD001", "takeout", Latte=1)
+        bulk_write = Collection.bulk_write
+
+        def fail_totals(collection, requests, *args, **kwargs):
+            if collection.name == TOTALS:
+                raise AutoReconnect("connection reset")
+            return bulk_write(collection, requests, *args, **kwargs)
+
+        with mock.patch.object(Collection, "bulk_write", autospec=True, side_effect=fail_totals), \
+                self.assertLogs("management.sales", "ERROR"):
+            records = self.sell("ORD002", "dine-in", Bagel=2)
+
+        # The sale is kept and owes the rollups from the failed one on
+        self.assertEqual(self.stock("ING3"), 50)
+        pending = self.db.orders.find_one({"row_id": records[0]["row_id"]})[PENDING_FIELD]
+        self.assertEqual(pending, [TOTALS, BY_ITEM])
+        self.assertEqual(sales_distribution(self.db), {"takeout": 1})
+
+        self.assertEqual(apply_pending_rollups(self.db), 1)
+        self.assertEqual(self.db.orders.count_documents({PENDING_FIELD: {"$exists": True}}), 0)
+        repaired = rollup_state(self.db)
+        rebuild_rollups(self.db)
+        self.assertEqual(repaired, rollup_state(self.db))
+
+    def test_sale_during_the_rebuild_is_not_overwritten(self):
+        self.sell("ORD001", "takeout", Latte=1)
+        build = rollups._build_scratch_rollups
+        sales = iter([("ORD002", 2)])
+
+        def build_then_sell(db, batch_size):
+            built = build(db, batch_size)
+            for order_id, quantity in sales:
+                self.sell(order_id, "dine-in", Bagel=quantity)
+            return built
+
+        with mock.patch.object(rollups, "_build_scratch_rollups", side_effect=build_then_sell) as builds:
+            rebuild_rollups(self.db)
+
+        self.assertEqual(builds.call_count, 2)
+        self.assertEqual(sales_distribution(self.db), {"takeout": 1, "dine-in": 1})
+
+    def test_rebuild_gives_up_while_sales_keep_arriving(self):
+        self.sell("ORD001", "takeout", Latte=1)
+        before = rollup_state(self.db)
+        build = rollups._build_scratch_rollups
+
+        def build_then_bump(db, batch_size):
+            built = build(db, batch_size)
+            bump_version(db, DATA)
+            return built
+
+        with mock.patch.object(rollups, "_build_scratch_rollups", side_effect=build_then_bump), \
+                self.assertRaises(RollupRebuildError):
+            rebuild_rollups(self.db, attempts=2)
+        self.assertEqual(rollup_state(self.db), before)
+        self.assertNotIn(f"{DAILY}_rebuild", self.db.list_collection_names())
+
+    def test_rebuild_clears_pending_marks(self):
+        records = self.sell("ORD001", "takeout", Latte=1)
+        self.db.orders.update_one({"row_id": records[0]["row_id"]}, {"$set": {PENDING_FIELD: [BY_ITEM]}})
+
+        rebuild_rollups(self.db)
+        self.assertEqual(self.db.orders.count_documents({PENDING_FIELD: {"$exists": True}}), 0)
+        self.assertEqual(apply_pending_rollups(self.db), 0)
+
+
+class BackfillOrderDetailsTests(MongoTestCase):
+
+    def setUp(self):
+        super().setUp()
+        self.seed_catalog()
+        self.db["items"].insert_one({"item_id": "IT3", "item_name": "Scone", "sku": "SCO"})
+        self.db.orders.insert_many([
+            {"row_id": "a", "date": "05/02/17 13:10", "item_id": "IT1", "quantity": 1, "in_or_out": "takeout"},
+            {"row_id": "b", "date": "05/02/17 13:10", "item_id": "IT2", "item_name": "Bagel",
+             "item_price": None, "quantity": 2, "in_or_out": "takeout"},
+            {"row_id": "c", "date": "05/02/17 13:10", "item_id": "IT3", "quantity": 1, "in_or_out": "takeout"},
+        ])
+
+    def backfill(self):
+        out = StringIO()
+        call_command("backfill_order_details", WORKSPACE, stdout=out)
+        return {order["row_id"]: order for order in self.db.orders.find()}, out.getvalue()
+
+    def test_stamps_priced_items_and_repairs_null_prices(self):
+        orders, out = self.backfill()
+
+        self.assertEqual((orders["a"]["item_name"], orders["a"]["item_price"], orders["a"]["sku"]), ("Latte", 4.0, "LAT"))
+        self.assertEqual(orders["b"]["item_price"], 2.5)
+        self.assertEqual(sales_by_item(self.db), [
+            {"_id": "Bagel", "total_sales": 5.0},
+            {"_id": "Latte", "total_sales": 4.0},
+            {"_id": "Scone", "total_sales": 0},
+        ])
+        self.assertIn("1 orders still without a price", out)
+
+    def test_unpriced_items_are_retried_once_priced(self):
+        orders, _ = self.backfill()
+        self.assertEqual(orders["c"]["item_name"], "Scone")
+        self.assertNotIn("item_price", orders["c"])
+
+        self.db["items"].update_one({"item_id": "IT3"}, {"$set": {"item_price": 3.0}})
+        catalog_cache.invalidate()
+        orders, out = self.backfill()
+        self.assertEqual(orders["c"]["item_price"], 3.0)
+        self.assertIn("0 orders still without a price", out)
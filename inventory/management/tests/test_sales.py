@@ -0,0 +1,79 @@
+"""Tests for the sale engine behind add_sale."""
+from unittest import mock
+
+from django.test import SimpleTestCase
+from mongomock.collection import Collection
+
+from management.sales import SaleError, parse_sale_lines, record_sale
+
+from .utils import MongoTestCase
+
+
+class RecordSaleTests(MongoTestCase):
+
+    def setUp(self):
+        super().setUp()
+        self.seed_catalog()
+
+    def test_deducts_stock_and_writes_order_lines(self):
+        records = record_sale(self.db, "ORD001", "Ann", "takeout", [
+            {"item_name": "Latte", "quantity": 2},
+            {"item_name": "Bagel", "quantity": 1},
+        ])
+
+        self.assertEqual(self.stock("ING1"), 600)
+        self.assertEqual(self.stock("ING2"), 64)
+        self.assertEqual(self.stock("ING3"), 150)
+        self.assertEqual(len(records), 2)
+        lines = {line["item_name"]: line for line in self.db.orders.find({"order_id": "ORD001"})}
+        self.assertEqual(lines["Latte"]["quantity"], 2)
+        self.assertEqual(lines["Latte"]["item_price"], 4.0)
+        self.assertEqual(lines["Bagel"]["sku"], "BAG")
+        self.assertEqual(self.db.inventory.count_documents({"pending_sales": {"$exists": True, "$ne": []}}), 0)
+
+    def test_ingredient_demand_is_summed_across_lines(self):
+        # 3 + 2 lattes need 1000 ml of milk: exactly the stock
+        record_sale(self.db, "ORD001", "Ann", "dine-in", [
+            {"item_name": "Latte", "quantity": 3},
+            {"item_name": "Latte", "quantity": 2},
+        ])
+        self.assertEqual(self.stock("ING1"), 0)
+
+    def test_insufficient_stock_changes_nothing(self):
+        with self.assertRaises(SaleError) as raised:
+            record_sale(self.db, "ORD001", "Ann", "takeout", [
+                {"item_name": "Bagel", "quantity": 1},
+                {"item_name": "Latte", "quantity": 6},
+            ])
+
+        self.assertEqual(raised.exception.status, 400)
+        self.assertIn("ING1", raised.exception.message)
+        self.assertEqual([self.stock(ing) for ing in ("ING1", "ING2", "ING3")], [1000, 100, 250])
+        self.assertEqual(self.db.orders.count_documents({}), 0)
+        self.assertEqual(self.db.inventory.count_documents({"pending_sales": {"$exists": True, "$ne": []}}), 0)
+
+    def test_failed_insert_reverts_the_deductions(self):
+        with mock.patch.object(Collection, "insert_many", side_effect=RuntimeError("write failed")):
+            with self.assertRaises(RuntimeError):
+                record_sale(self.db, "ORD001", "Ann", "takeout", [{"item_name": "Latte", "quantity": 1}])
+
+        self.assertEqual(self.stock("ING1"), 1000)
+        self.assertEqual(self.stock("ING2"), 100)
+        self.assertEqual(self.db.inventory.count_documents({"pending_sales": {"$exists": True, "$ne": []}}), 0)
+
+    def test_unknown_item(self):
+        with self.assertRaises(SaleError) as raised:
+            record_sale(self.db, "ORD001", "Ann", "takeout", [{"item_name": "Scone", "quantity": 1}])
+        self.assertEqual(raised.exception.status, 404)
+        self.assertEqual(self.stock("ING3"), 250)
+
+
+class ParseSaleLinesTests(SimpleTestCase):
+
+    def test_rejects_missing_names_and_non_positive_quantities(self):
+        for line in ({"item_name": "", "quantity": 1}, {"item_name": "Latte", "quantity": 0}):
+            with self.assertRaises(SaleError):
+                parse_sale_lines([line])
+
+    def test_returns_name_quantity_pairs(self):
+        self.assertEqual(parse_sale_lines([{"item_name": "Latte", "quantity": "2"}]), [("Latte", 2)])
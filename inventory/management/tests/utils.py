@@ -0,0 +1,85 @@
+"""Shared fixtures for the behaviour tests.
+
+``MongoTestCase`` points the shared client of ``management.mongo`` at a
+fresh in-memory mongomock server for every test, so views, engines and
+commands run unchanged against an empty workspace. mongomock is a test-only
+dependency, installed with ``pip install -r requirements-dev.txt``.
+"""
+import os
+
+import mongomock
+from django.core.cache import caches
+from django.test import SimpleTestCase
+from mongomock.collection import BulkOperationBuilder
+
+from management import mongo
+from management.catalog import catalog_cache
+from management.order_ids import order_ids
+from management.rollups import BY_ITEM, DAILY, TOTALS
+
+WORKSPACE = "test_workspace"
+
+ITEMS = [
+    {"item_id": "IT1", "item_name": "Latte", "sku": "LAT", "item_cat": "Coffee", "item_size": "M", "item_price": 4.0},
+    {"item_id": "IT2", "item_name": "Bagel", "sku": "BAG", "item_cat": "Bakery", "item_size": "S", "item_price": 2.5},
+]
+RECIPE = [
+    {"sku": "LAT", "ing_id": "ING1", "quantity": 200},
+    {"sku": "LAT", "ing_id": "ING2", "quantity": 18},
+    {"sku": "BAG", "ing_id": "ING3", "quantity": 100},
+]
+INVENTORY = [
+    {"ing_id": "ING1", "name": "Milk", "inv_id": "INV1", "ing_meas": "ml", "quantity": 1000},
+    {"ing_id": "ING2", "name": "Coffee beans", "inv_id": "INV2", "ing_meas": "g", "quantity": 100},
+    {"ing_id": "ING3", "name": "Flour", "inv_id": "INV3", "ing_meas": "g", "quantity": 250},
+]
+
+
+def _ignore_sort(method):
+    # pymongo passes a ``sort`` option to bulk updates that mongomock does not know
+    def wrapper(self, *args, sort=None, **kwargs):
+        return method(self, *args, **kwargs)
+    return wrapper
+
+
+if not getattr(BulkOperationBuilder.add_update, "ignores_sort", False):
+    BulkOperationBuilder.add_update = _ignore_sort(BulkOperationBuilder.add_update)
+    BulkOperationBuilder.add_replace = _ignore_sort(BulkOperationBuilder.add_replace)
+    BulkOperationBuilder.add_update.ignores_sort = True
+
+
+def rollup_state(db):
+    """Returns the three rollups as plain comparable structures."""
+    return (
+        sorted((d["date"], d["item_id"], d["in_or_out"], d["quantity"], d["revenue"], d["lines"])
+               for d in db[DAILY].find({}, {"_id": 0})),
+        sorted((d["_id"], d["quantity"], d["revenue"], d["lines"]) for d in db[TOTALS].find()),
+        sorted((d["_id"], d["quantity"], d["revenue"]) for d in db[BY_ITEM].find()),
+    )
+
+
+class MongoTestCase(SimpleTestCase):
+    """Runs each test against an empty mongomock server on the shared client."""
+
+    def setUp(self):
+        super().setUp()
+        saved = mongo._client, mongo._client_pid
+        mongo._client, mongo._client_pid = mongomock.MongoClient(), os.getpid()
+        self.addCleanup(self._restore_client, saved)
+        catalog_cache.invalidate()
+        order_ids.release(WORKSPACE)
+        caches["responses"].clear()
+        self.db = mongo.get_db(WORKSPACE)
+
+    @staticmethod
+    def _restore_client(saved):
+        mongo._client, mongo._client_pid = saved
+
+    def seed_catalog(self):
+        """Inserts a two-item catalog with recipes and stock."""
+        self.db["items"].insert_many([dict(item) for item in ITEMS])
+        self.db.recipe.insert_many([dict(line) for line in RECIPE])
+        self.db.inventory.insert_many([dict(ing) for ing in INVENTORY])
+
+    def stock(self, ing_id):
+        return self.db.inventory.find_one({"ing_id": ing_id})["quantity"]
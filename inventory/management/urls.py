@@ -1,7 +1,14 @@
+from django.conf import settings
 from django.urls import path
 from django.views.generic import TemplateView
 from . import views
 
+# Dashboard read endpoints: async implementations under ASGI, sync otherwise
+if getattr(settings, "ASYNC_DASHBOARD_VIEWS", False):
+    from . import async_views as read_views
+else:
+    read_views = views
+
 
 urlpatterns = [
     path('', views.home, name='home'),
@@ -9,16 +16,24 @@ urlpatterns = [
     path("workplace/login/", views.workplace_login, name="workplace_login"),
     path("get_workspaces/", views.get_workspaces, name="get_workspaces"),
     path("dashboard/", views.dashboard, name="dashboard"),
+    path("dashboard_data/", read_views.get_dashboard_data, name="dashboard_data"),
     path("add_inventory/", views.add_inventory, name="add_inventory"),
+    path("bulk_catalog/<str:kind>/", views.bulk_catalog, name="bulk_catalog"),
     path("add_sale/", views.add_sale, name="add_sale"),
-    path("get_sales_stats/", views.get_sales_stats, name="get_sales_stats"),
-    path("get_inventory_stats/", views.get_inventory_stats, name="get_inventory_stats"),
-    path("get_inventory_items/", views.get_inventory_items, name="get_inventory_items"),
-    path("get_items/", views.get_items, name="get_items"),
-    path("get_inventory_data/", views.get_inventory_data, name="get_inventory_data"),
-    path("get_sales_distribution/", views.get_sales_distribution, name="get_sales_distribution"),
-    path("get_sales_data/", views.get_sales_data, name="get_sales_data"),
+    path("import_orders/", views.import_orders, name="import_orders"),
+    path("get_sales_stats/", read_views.get_sales_stats, name="get_sales_stats"),
+    path("get_inventory_stats/", read_views.get_inventory_stats, name="get_inventory_stats"),
+    path("get_inventory_items/", read_views.get_inventory_items, name="get_inventory_items"),
+    path("get_items/", read_views.get_items, name="get_items"),
+    path("get_inventory_data/", read_views.get_inventory_data, name="get_inventory_data"),
+    path("get_sales_distribution/", read_views.get_sales_distribution, name="get_sales_distribution"),
+    path("get_sales_data/", read_views.get_sales_data, name="get_sales_data"),
     path('get_inventory_predictions/', views.get_inventory_restocking_recommendations, name='get_inventory_predictions'),
+    path('get_inventory_predictions/status/', views.get_inventory_predictions_status, name='get_inventory_predictions_status'),
+    path('catalog_cache_stats/', views.get_catalog_cache_stats, name='catalog_cache_stats'),
+    path('response_cache_stats/', views.get_response_cache_stats, name='response_cache_stats'),
+    path('metrics', views.metrics, name='metrics'),
+    path('mongo_pool_stats/', views.get_mongo_pool_stats, name='mongo_pool_stats'),
     path('prediction/', views.prediction_page, name='prediction_page'),
     path('about/', views.about_us_view, name='about'),
     path('contact/', views.contact_us_view, name='contact_us'),
@@ -0,0 +1,31 @@
+"""Per-workspace version counters stored in each workspace's ``meta`` collection.
+
+Writers bump a counter after changing the data it covers; readers compare it
+with the version they cached to decide whether to re-fetch.
+"""
+
+CATALOG = "catalog_version"
+DATA = "data_version"  # anything the dashboard shows: stock, sales, rollups, catalog
+
+
+def get_version(db, name):
+    """Returns the current value of a workspace version counter (0 if never bumped)."""
+    doc = db.meta.find_one({"_id": name}, {"version": 1})
+    return doc["version"] if doc else 0
+
+
+async def aget_version(db, name):
+    """Async counterpart of get_version for an AsyncMongoClient database."""
+    doc = await db.meta.find_one({"_id": name}, {"version": 1})
+    return doc["version"] if doc else 0
+
+
+def bump_version(db, name):
+    """Increments a workspace version counter and returns the new value."""
+    doc = db.meta.find_one_and_update(
+        {"_id": name},
+        {"$inc": {"version": 1}},
+        upsert=True,
+        return_document=True,
+    )
+    return doc["version"]
@@ -1,24 +1,33 @@
 from django.shortcuts import render, redirect
-from django.http import JsonResponse
+from django.http import HttpResponse
 from django.views.decorators.csrf import csrf_exempt
 from django.contrib.auth.hashers import make_password, check_password
 from django.conf import settings
 from django.contrib import messages
-from datetime import datetime, timedelta
-from django.utils.timezone import now
-import subprocess
-import uuid
-from bson import ObjectId
-import os
+from datetime import datetime
 import json
-import matplotlib.pyplot as plt
-from pymongo import MongoClient
 from .models import CustomerModel, WorkplaceModel
-from dateutil.parser import parse as parse_iso_date
-
-# MongoDB connection
-client = MongoClient("mongodb://localhost:27017/")
-main_db = client["workplaces"]  # Main DB storing all workspace details
+from .catalog import catalog_cache
+from .catalog_import import KINDS as CATALOG_KINDS, ingest as ingest_catalog
+from .dashboard import (
+    INVENTORY_DATA_PROJECTION, INVENTORY_ITEMS_PROJECTION, ITEMS_PROJECTION,
+    dashboard_data, inventory_chart, inventory_stats,
+)
+from .indexes import ensure_indexes
+from .instrumentation import request_metrics
+from .mongo import get_db, get_main_db, pool_monitor
+from .order_ids import order_ids
+from .order_import import (
+    FORMATS as IMPORT_FORMATS, ImportFileError, detect_format, import_orders as import_orders_from_stream,
+    read_rows, text_stream,
+)
+from .jobs import job_payload, job_status, request_forecast
+from .listing import Listing, ListingError
+from .response_cache import cached_response, response_cache_stats
+from .responses import JsonResponse
+from .rollups import sales_by_item, sales_distribution, sales_stats
+from .sales import SaleError, record_sale
+from .versions import DATA, bump_version
 
 # Home page view
 def home(request):
@@ -49,9 +58,11 @@ def workplace_register(request):
         workplace_model.create_workplace(name, email, address, workplace_type, inventory_type, password)
 
         # Create a new MongoDB database for this workplace
-        client[name].create_collection("sales")
-        client[name].create_collection("inventory")
-        client[name].create_collection("items")
+        workspace_db = get_db(name)
+        workspace_db.create_collection("sales")
+        workspace_db.create_collection("inventory")
+        workspace_db.create_collection("items")
+        ensure_indexes(workspace_db)
 
         return redirect("workplace_login")  # Redirect to workplace login page
     
@@ -85,24 +96,51 @@ def dashboard(request):
     
     return render(request, "dashboard.html", {"workspace": workspace})
 
+@cached_response("dashboard_data", daily=True)
+def get_dashboard_data(request):
+    """Fetches every dashboard widget in one response, running the queries concurrently."""
+    workspace = request.session.get("workspace")
+    if not workspace:
+        return JsonResponse({"error": "Not logged in"}, status=401)
+
+    return JsonResponse(dashboard_data(get_db(workspace), datetime.utcnow().date()))
+
 # -------------------- Inventory Management -------------------- #
+@cached_response("get_inventory_items")
 def get_inventory_items(request):
     """Fetches all inventory items for the logged-in workspace."""
     workspace = request.session.get("workspace")
     if not workspace:
         return JsonResponse({"error": "Not logged in"}, status=401)
 
-    inventory_items = list(client[workspace]["inventory"].find({}, {"_id": 0, "name": 1, "quantity": 1}))
-    return JsonResponse({"items": inventory_items})
+    try:
+        listing = Listing.from_request(request)
+    except ListingError as e:
+        return JsonResponse({"error": e.message}, status=e.status)
+
+    inventory = get_db(workspace)["inventory"]
+    if listing.stream:
+        return listing.stream_response(inventory, INVENTORY_ITEMS_PROJECTION)
+    inventory_items, next_cursor = listing.page(inventory, INVENTORY_ITEMS_PROJECTION)
+    return JsonResponse(listing.payload({"items": inventory_items}, next_cursor))
 
+@cached_response("get_items")
 def get_items(request):
     """Fetches all items with SKU, item name, category, size, price, and item ID for the logged-in workspace."""
     workspace = request.session.get("workspace")
     if not workspace:
         return JsonResponse({"error": "Not logged in"}, status=401)
 
-    items = list(client[workspace]["items"].find({}, {"_id": 0, "sku": 1, "item_name": 1, "item_cat": 1, "item_size": 1, "item_price": 1, "item_id": 1}))
-    return JsonResponse({"items": items})
+    try:
+        listing = Listing.from_request(request)
+    except ListingError as e:
+        return JsonResponse({"error": e.message}, status=e.status)
+
+    collection = get_db(workspace)["items"]
+    if listing.stream:
+        return listing.stream_response(collection, ITEMS_PROJECTION)
+    items, next_cursor = listing.page(collection, ITEMS_PROJECTION)
+    return JsonResponse(listing.payload({"items": items}, next_cursor))
 
 @csrf_exempt
 def add_inventory(request):
@@ -116,27 +154,57 @@ def add_inventory(request):
         item_type = request.POST.get("item_type")
         quantity = int(request.POST.get("quantity", 0))
 
-        db = client[workspace]
+        db = get_db(workspace)
         db.inventory.update_one(
             {"name": item},
             {"$inc": {"quantity": quantity}, "$setOnInsert": {"item_type": item_type}},
             upsert=True
         )
+        bump_version(db, DATA)
         
         return JsonResponse({"message": "Inventory updated successfully"})
     
     return JsonResponse({"error": "Invalid request"}, status=400)
 
+@csrf_exempt
+def bulk_catalog(request, kind):
+    """Applies inventory receipts, menu items or recipe rows in bulk from a CSV/JSONL upload or a JSON body."""
+    if request.method != "POST":
+        return JsonResponse({"error": "Invalid request method"}, status=400)
+
+    workspace = request.session.get("workspace")
+    if not workspace:
+        return JsonResponse({"error": "Not logged in"}, status=401)
+
+    if kind not in CATALOG_KINDS:
+        return JsonResponse({"error": f"Unknown kind: {kind}"}, status=404)
+
+    upload = request.FILES.get("file")
+    if upload is not None:
+        fmt = request.POST.get("format") or detect_format(upload.name)
+        if fmt not in IMPORT_FORMATS:
+            return JsonResponse({"error": f"Unsupported format: {fmt}"}, status=400)
+        rows = read_rows(text_stream(upload), fmt)
+    else:
+        try:
+            data = json.loads(request.body)
+        except json.JSONDecodeError:
+            return JsonResponse({"error": "Invalid JSON format"}, status=400)
+        rows = data.get("rows") if isinstance(data, dict) else data
+        if not isinstance(rows, list):
+            return JsonResponse({"error": "Expected a list of rows"}, status=400)
+
+    try:
+        report = ingest_catalog(get_db(workspace), kind, rows)
+    except ImportFileError as e:
+        # Rows are all validated before the first write, so nothing was applied
+        return JsonResponse({"error": str(e)}, status=400)
+    return JsonResponse(report)
+
 # -------------------- Sales Management -------------------- #
 def get_next_order_id(db):
-    counter = db.counters.find_one_and_update(
-        {"_id": "order_id"},
-        {"$inc": {"seq": 1}},
-        upsert=True,
-        return_document=True
-    )
-    next_seq = counter["seq"]
-    return f"ORD{next_seq:03d}"  # e.g., ORD001, ORD002
+    """Returns the next order ID from this worker's reserved block."""
+    return order_ids.next_order_id(db)
 
 @csrf_exempt
 def add_sale(request):
@@ -148,7 +216,7 @@ def add_sale(request):
     if not workspace:
         return JsonResponse({"error": "Not logged in"}, status=401)
 
-    db = client[workspace]
+    db = get_db(workspace)
 
     try:
         data = json.loads(request.body)
@@ -160,76 +228,65 @@ def add_sale(request):
             return JsonResponse({"error": "Missing required fields"}, status=400)
 
         order_id = get_next_order_id(db)
-
-        for entry in items:
-            item_name = entry.get("item_name")
-            quantity = int(entry.get("quantity", 0))
-
-            if not item_name or quantity <= 0:
-                return JsonResponse({"error": f"Invalid item or quantity: {item_name}"}, status=400)
-
-            # Step 1: Get item details
-            item = db.items.find_one({"item_name": item_name})
-            if not item:
-                return JsonResponse({"error": f"Item not found: {item_name}"}, status=404)
-
-            item_id = item.get("item_id")
-            sku = item.get("sku")
-            if not sku:
-                return JsonResponse({"error": f"SKU not found for item: {item_name}"}, status=500)
-
-            # Step 2: Get recipe for item - This will return all ingredients for the SKU
-            recipe_items = list(db.recipe.find({"sku": sku}))
-            if not recipe_items:
-                return JsonResponse({"error": f"No recipe found for item: {item_name}"}, status=404)
-
-            # Step 3: Check inventory for each ingredient
-            for recipe_item in recipe_items:
-                ing_id = recipe_item.get("ing_id")
-                req_qty_per_item = recipe_item.get("quantity", 0)
-                total_required_qty = req_qty_per_item * quantity
-
-                inventory_item = db.inventory.find_one({"ing_id": ing_id})
-                if not inventory_item or inventory_item.get("quantity", 0) < total_required_qty:
-                    return JsonResponse({"error": f"Not enough stock for ingredient: {ing_id}"}, status=400)
-
-            # Step 4: Deduct inventory for each ingredient
-            for recipe_item in recipe_items:
-                ing_id = recipe_item["ing_id"]
-                total_required_qty = recipe_item["quantity"] * quantity
-                db.inventory.update_one(
-                    {"ing_id": ing_id},
-                    {"$inc": {"quantity": -total_required_qty}}
-                )
-
-            # Step 5: Insert order record into the orders collection
-            order_record = {
-                "row_id": str(uuid.uuid4()),
-                "order_id": order_id,
-                "date": now().isoformat(),
-                "item_id": item_id,
-                "item_name": item_name,
-                "quantity": quantity,
-                "cust_name": cust_name,
-                "in_or_out": in_or_out
-            }
-            db.orders.insert_one(order_record)
+        record_sale(db, order_id, cust_name, in_or_out, items)
 
         return JsonResponse({"message": "Sale recorded successfully", "order_id": order_id})
 
+    except SaleError as e:
+        return JsonResponse({"error": e.message}, status=e.status)
     except json.JSONDecodeError:
         return JsonResponse({"error": "Invalid JSON format"}, status=400)
     except Exception as e:
         return JsonResponse({"error": f"Unexpected error: {str(e)}"}, status=500)
 
+@csrf_exempt
+def import_orders(request):
+    """Imports historical order lines from an uploaded CSV or JSONL file and reports rows/sec."""
+    if request.method != "POST":
+        return JsonResponse({"error": "Invalid request method"}, status=400)
+
+    workspace = request.session.get("workspace")
+    if not workspace:
+        return JsonResponse({"error": "Not logged in"}, status=401)
+
+    upload = request.FILES.get("file")
+    if upload is None:
+        return JsonResponse({"error": "Missing file"}, status=400)
+
+    if upload.size > settings.ORDER_IMPORT_MAX_UPLOAD_BYTES:
+        return JsonResponse({
+            "error": f"File is larger than {settings.ORDER_IMPORT_MAX_UPLOAD_BYTES} bytes; "
+                     f"import it with: manage.py import_orders {workspace} <path>"
+        }, status=413)
+
+    fmt = request.POST.get("format") or detect_format(upload.name)
+    if fmt not in IMPORT_FORMATS:
+        return JsonResponse({"error": f"Unsupported format: {fmt}"}, status=400)
+
+    report = import_orders_from_stream(
+        get_db(workspace),
+        text_stream(upload),
+        fmt=fmt,
+        apply_inventory=request.POST.get("apply_inventory") in ("1", "true"),
+    )
+    return JsonResponse(report, status=400 if "error" in report else 200)
+
 
 
 
         # -------------------- Workspace & Menu Views -------------------- #
 def get_workspaces(request):
     """Fetches all registered workspaces."""
-    workspaces = list(main_db["workplace_details"].find({}, {"_id": 0}))
-    return JsonResponse({"workspaces": workspaces})
+    try:
+        listing = Listing.from_request(request)
+    except ListingError as e:
+        return JsonResponse({"error": e.message}, status=e.status)
+
+    collection = get_db("workplaces")["workplace_details"]
+    if listing.stream:
+        return listing.stream_response(collection, {"_id": 0})
+    workspaces, next_cursor = listing.page(collection, {"_id": 0})
+    return JsonResponse(listing.payload({"workspaces": workspaces}, next_cursor))
 
 
 
@@ -237,194 +294,81 @@ def get_workspaces(request):
 
 
 
+@cached_response("get_sales_stats", daily=True)
 def get_sales_stats(request):
+    """Fetches weekly, monthly, yearly and total sales from the daily rollups."""
     workspace = request.session.get("workspace")
     if not workspace:
         return JsonResponse({"error": "Not logged in"}, status=401)
 
-    db = client[workspace]
-
-    now = datetime.utcnow()
-    week_ago = now - timedelta(days=6)  # last 7 days including today
-    week_days = [(now - timedelta(days=i)).date() for i in range(6, -1, -1)]  # Mon to Sun
-
-    def parse_date(order):
-        if "date" in order:
-            try:
-                if isinstance(order["date"], str):
-                    try:
-                        # Try parsing ISO 8601 string like: "2025-05-02T18:47:28.470091+00:00"
-                        return parse_iso_date(order["date"]).date()
-                    except:
-                        # Fallback: try old format like "24/02/17 13:10"
-                        return datetime.strptime(order["date"], "%d/%m/%y %H:%M").date()
-                elif isinstance(order["date"], datetime):
-                    return order["date"].date()
-            except:
-                return None
-        elif "created_at" in order:
-            try:
-                return order["created_at"].date()
-            except:
-                return None
-        return None
-
-    # Fetch all orders and parse dates
-    all_orders = list(db.orders.find({}))
-    sales_this_week = {day.strftime("%a"): 0 for day in week_days}
-    sales_month = 0
-    sales_year = 0
-    total_sales = 0
-
-    for order in all_orders:
-        date = parse_date(order)
-        if not date:
-            continue
-        quantity = order.get("quantity", 0)
-
-        # Weekly
-        if week_ago.date() <= date <= now.date():
-            day_label = date.strftime("%a")
-            sales_this_week[day_label] += quantity
-
-        # Monthly
-        if date.month == now.month and date.year == now.year:
-            sales_month += quantity
-
-        # Yearly
-        if date.year == now.year:
-            sales_year += quantity
-
-        # Overall
-        total_sales += quantity
-
-    return JsonResponse({
-        "weekly_sales": sales_this_week,
-        "sales_month": sales_month,
-        "sales_year": sales_year,
-        "sales_total": total_sales
-    })
-
-
-
-
+    db = get_db(workspace)
+    return JsonResponse(sales_stats(db, datetime.utcnow().date()))
 
 
+@cached_response("get_inventory_stats")
 def get_inventory_stats(request):
     """Fetches inventory statistics: total items, out-of-stock count, and low-stock count."""
     workspace = request.session.get("workspace")
     if not workspace:
         return JsonResponse({"error": "Not logged in"}, status=401)
     
-    db = client[workspace]
-    inventory = list(db.inventory.find())
-    
-    stats = {
-        "total_items": len(inventory),
-        "out_of_stock": sum(1 for item in inventory if item.get("quantity", 0) <= 0),
-        "low_stock": sum(1 for item in inventory if 0 < item.get("quantity", 0) < 10)
-    }
+    db = get_db(workspace)
+    inventory = list(db.inventory.find({}, {"_id": 0, "quantity": 1}))
     
-    return JsonResponse(stats)
+    return JsonResponse(inventory_stats(inventory))
 
 # -------------------- Data Visualization -------------------- #
 
 # Example sales data endpoint
+@cached_response("get_sales_data")
 def get_sales_data(request):
+    """Fetches total sales amount per item, highest first, from the per-item revenue rollup."""
     workspace = request.session.get("workspace")
     if not workspace:
         return JsonResponse({"error": "Not logged in"}, status=401)
     
-    db = client[workspace]
-    
-    # Perform aggregation to calculate total sales per item
-    sales_data = db.orders.aggregate([
-        # Lookup to join the orders with the items collection based on item_id
-        {
-            "$lookup": {
-                "from": "items",              # Collection to join
-                "localField": "item_id",      # Field in the orders collection
-                "foreignField": "_id",        # Field in the items collection
-                "as": "item_details"          # Alias for the joined items data
-            }
-        },
-        # Unwind the item_details array to simplify access to item data
-        {
-            "$unwind": "$item_details"
-        },
-        # Calculate the total sales amount for each order (quantity * price)
-        {
-            "$addFields": {
-                "sales_amount_calculated": {
-                    "$multiply": ["$quantity", "$item_details.price"]
-                }
-            }
-        },
-        # Group by item name and sum up the sales amounts
-        {
-            "$group": {
-                "_id": "$item_details.name",   # Group by item name
-                "total_sales": {"$sum": "$sales_amount_calculated"}  # Sum the sales amount
-            }
-        },
-        # Sort the items by total sales in descending order
-        {
-            "$sort": {"total_sales": -1}
-        }
-    ])
-
-    # Convert the aggregation result into a list and return it
-    sales_data = list(sales_data)
+    db = get_db(workspace)
     
-    return JsonResponse({"sales_data": sales_data})
+    return JsonResponse({"sales_data": sales_by_item(db)})
 
 
 #  inventory data endpoint
+@cached_response("get_inventory_data")
 def get_inventory_data(request):
+    """Fetches ingredient IDs, names and quantities for the inventory chart.
+
+    In streaming mode each line is one ``{ing_id, name, quantity}`` document
+    rather than the chart's parallel arrays.
+    """
     workspace = request.session.get("workspace")
     if not workspace:
         return JsonResponse({"error": "Not logged in"}, status=401)
     
-    db = client[workspace]
+    try:
+        listing = Listing.from_request(request)
+    except ListingError as e:
+        return JsonResponse({"error": e.message}, status=e.status)
+
+    db = get_db(workspace)
+    if listing.stream:
+        return listing.stream_response(db.inventory, INVENTORY_DATA_PROJECTION)
     
     # Fetch inventory data
-    inventory_data = list(db.inventory.find({}, {"_id": 0, "ing_id": 1, "name": 1, "quantity": 1}))  # You can adjust the query to group by ingredient type
-    
-    name = []
-    inventory = []
-    labels = []
-    for item in inventory_data:
-        name.append(item["name"])
-        labels.append(item["ing_id"])  # Ingredient IDs or names
-        inventory.append(item["quantity"])  # Inventory quantity
+    inventory_data, next_cursor = listing.page(db.inventory, INVENTORY_DATA_PROJECTION)
     
-    return JsonResponse({"labels": labels, "inventory": inventory, "name" : name })
+    return JsonResponse(listing.payload(inventory_chart(inventory_data), next_cursor))
 
+@cached_response("get_sales_distribution")
 def get_sales_distribution(request):
     workspace = request.session.get("workspace")
     if not workspace:
         return JsonResponse({"error": "Not logged in"}, status=401)
     
-    db = client[workspace]
+    db = get_db(workspace)
     
-    # Aggregation to count the number of orders grouped by order type (Dine-In, Takeout)
-    sales_data = db.orders.aggregate([
-        {
-            "$group": {
-                "_id": "$in_or_out",  # Group by 'order_type' (Dine-In, Takeout, etc.)
-                "order_count": {"$sum": 1}  # Count the number of orders for each type
-            }
-        },
-        {
-            "$match": {
-                "_id": {"$in": ["dine-in", "takeout"]}  # Filter to only include Dine-In and Takeout
-            }
-        }
-    ])
-    
-    # Convert the aggregated data to a dictionary format
+    # Order line counts per order type (Dine-In, Takeout), maintained by add_sale
     result = {
-        "sales_types": {data["_id"]: data["order_count"] for data in sales_data}
+        "sales_types": sales_distribution(db)
     }
     
     return JsonResponse(result)
@@ -434,84 +378,59 @@ def get_sales_distribution(request):
 
 @csrf_exempt
 def get_inventory_restocking_recommendations(request):
+    """Serves the stored forecast, starting a background forecast job when it is missing or stale.
 
+    Answers 200 with the result when it is fresh, otherwise 202 with the job
+    status (plus the previous result, if any) for the page to poll.
+    ``?refresh=1`` starts a new job even if the stored result is fresh.
+    """
     workspace = request.session.get("workspace")
     if not workspace:
         return JsonResponse({"error": "Not logged in"}, status=401)
 
     try:
+        job = request_forecast(get_db(workspace), force=request.GET.get("refresh") == "1")
+        payload = job_payload(job)
+        return JsonResponse(payload, status=200 if payload["status"] == "done" else 202)
 
-        subprocess.run([
-            r'C:\Volume_d\sem6BCA\MajorP2\projest\mjp2\Scripts\python.exe',
-            r'C:\Volume_d\sem6BCA\MajorP2\projest\Major2\inventory\management\mlload.py'
-        ], check=True)
-
-        db = client[workspace]
-        predictions_col = db["prediction"]
-        items_col = db["items"]
-        recipe_col = db["recipe"]
-        inventory_col = db["inventory"]
+    except Exception as e:
+        return JsonResponse({"error": str(e)}, status=500)
 
-        predictions = list(predictions_col.find())
+def get_inventory_predictions_status(request):
+    """Reports the state of the workspace's forecast job, including its result once done."""
+    workspace = request.session.get("workspace")
+    if not workspace:
+        return JsonResponse({"error": "Not logged in"}, status=401)
 
-        restocking_recommendations = []
-        item_sales_predictions = []
-        seen_ing_ids = set()  # Track already added ingredient IDs
+    return JsonResponse(job_payload(job_status(get_db(workspace))))
 
-        for pred in predictions:
-            item_id = pred["item_id"]
-            predicted_qty = pred["predicted_quantity"]
+def get_catalog_cache_stats(request):
+    """Reports this worker's catalog cache hit/miss counters."""
+    workspace = request.session.get("workspace")
+    if not workspace:
+        return JsonResponse({"error": "Not logged in"}, status=401)
 
-            item = items_col.find_one({"item_id": item_id})
-            if not item:
-                continue
+    return JsonResponse(catalog_cache.stats())
 
-            sku = item.get("sku")
-            item_name = item.get("item_name", "Unknown")
-            item_size = item.get("item_size", "Unknown")
+def get_response_cache_stats(request):
+    """Reports this worker's response cache hit ratio and bytes saved per endpoint."""
+    workspace = request.session.get("workspace")
+    if not workspace:
+        return JsonResponse({"error": "Not logged in"}, status=401)
 
-            item_sales_predictions.append({
-                "item_id": item_id,
-                "item_name": item_name,
-                "item_size": item_size,
-                "predicted_quantity": predicted_qty
-            })
+    return JsonResponse(response_cache_stats.stats())
 
-            recipe_entries = list(recipe_col.find({"sku": sku}))
-            for entry in recipe_entries:
-                ing_id = entry["ing_id"]
-                qty_per_item = entry["quantity"]
-                total_needed = predicted_qty * qty_per_item
-
-                if ing_id in seen_ing_ids:
-                    continue  # Skip if already added
-
-                inv = inventory_col.find_one({"ing_id": ing_id})
-                if not inv:
-                    continue
-
-                current_stock = inv.get("quantity", 0)
-                shortage = max(0, total_needed - current_stock)
-
-                if shortage > 0:
-                    seen_ing_ids.add(ing_id)
-                    restocking_recommendations.append({
-                        "ing_id": ing_id,
-                        "ing_name": inv.get("name", "Unknown Ingredient"),
-                        "inv_id": inv.get("inv_id", "N/A"),
-                        "current_stock": current_stock,
-                        "predicted_usage": total_needed,
-                        "shortage": shortage,
-                        "unit": inv.get("ing_meas", "")
-                    })
+def metrics(request):
+    """Serves this worker's request metrics in the Prometheus text format."""
+    return HttpResponse(request_metrics.render(), content_type="text/plain; version=0.0.4; charset=utf-8")
 
-        return JsonResponse({
-            "item_sales_predictions": item_sales_predictions,
-            "restocking_recommendations": restocking_recommendations
-        })
+def get_mongo_pool_stats(request):
+    """Reports this worker's MongoDB connection pool gauges."""
+    workspace = request.session.get("workspace")
+    if not workspace:
+        return JsonResponse({"error": "Not logged in"}, status=401)
 
-    except Exception as e:
-        return JsonResponse({"error": str(e)}, status=500)
+    return JsonResponse(pool_monitor.stats())
 
 def prediction_page(request):
     workspace = request.session.get("workspace")
@@ -667,10 +586,6 @@ def prediction_page(request):
 def about_us_view(request):
     return render(request, 'aboutUs.html')
 
-client = MongoClient("mongodb://localhost:27017/")  # Update if remote DB
-db = client["invmng"]
-contact_collection = db["contact"]
-
 def contact_us_view(request):
     if request.method == 'POST':
         name = request.POST.get('name', '').strip()
@@ -678,7 +593,7 @@ def contact_us_view(request):
         message = request.POST.get('message', '').strip()
 
         if name and email and message:
-            contact_collection.insert_one({
+            get_main_db()["contact"].insert_one({
                 'name': name,
                 'email': email,
                 'message': message